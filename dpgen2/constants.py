@@ -3,6 +3,8 @@ train_task_pattern = 'task.' + train_index_pattern
 train_script_name = 'input.json'
 train_log_name = 'train.log'
 model_name_pattern = 'model.%03d.pb'
+data_index_name = 'data_index.json'
+data_provenance_name = 'data_provenance.json'
 lmp_index_pattern = "%06d"
 lmp_task_pattern = 'task.' + lmp_index_pattern
 lmp_conf_name = 'conf.lmp'
@@ -10,9 +12,10 @@ lmp_input_name = 'in.lammps'
 lmp_traj_name = 'traj.dump'
 lmp_log_name = 'log.lammps'
 lmp_model_devi_name = 'model_devi.out'
+lmp_model_devi_npy_name = 'model_devi.npy'
 vasp_index_pattern = '%06d'
 vasp_task_pattern = 'task.' + vasp_index_pattern
 vasp_conf_name = 'POSCAR'
 vasp_input_name = 'INCAR'
 vasp_pot_name = 'POTCAR'
-
+vasp_log_name = 'vasp.log'
@@ -4,3 +4,7 @@ from .report import (
 from .naive_report import (
     NaiveExplorationReport,
 )
+from .hist_report import (
+    DeviHistogram,
+    HistExplorationReport,
+)
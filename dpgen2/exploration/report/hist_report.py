@@ -0,0 +1,291 @@
+from __future__ import annotations
+import copy
+import numpy as np
+from collections import Counter
+from typing import (
+    Dict,
+)
+from . import ExplorationReport
+from .naive_report import NaiveExplorationReport
+
+class DeviHistogram():
+    """The histogram and the moments of model deviations.
+
+    The histogram has `nbins` bins of equal width in [0, `devi_max`),
+    and an overflow bin that counts the deviations not smaller than
+    `devi_max`. The histograms with the same bins can be merged, and so
+    do the moments (Chan's parallel algorithm).
+
+    Parameters
+    ----------
+    devi_max : float
+        The upper bound of the bins.
+    nbins : int
+        The number of bins.
+
+    """
+    def __init__(
+            self,
+            devi_max : float = 1.0,
+            nbins : int = 200,
+    ):
+        self.devi_max = devi_max
+        self.nbins = nbins
+        self.counts = np.zeros(nbins + 1, dtype=int)
+        self.numb = 0
+        self.mean = 0.
+        self.m2 = 0.
+        self.min = np.inf
+        self.max = -np.inf
+
+    @property
+    def bin_size(self) -> float:
+        return self.devi_max / self.nbins
+
+    @property
+    def var(self) -> float:
+        """The variance, `None` if empty."""
+        return self.m2 / self.numb if self.numb > 0 else None
+
+    @property
+    def std(self) -> float:
+        """The standard deviation, `None` if empty."""
+        return np.sqrt(self.var) if self.numb > 0 else None
+
+    def add(
+            self,
+            devi : np.array,
+    ) -> DeviHistogram :
+        """Add the deviations."""
+        devi = np.asarray(devi, dtype=float).reshape([-1])
+        if devi.size == 0:
+            return self
+        ibin = np.clip((devi / self.bin_size).astype(int), 0, self.nbins)
+        other = DeviHistogram(self.devi_max, self.nbins)
+        other.counts = np.bincount(ibin, minlength=self.nbins + 1)
+        other.numb = devi.size
+        other.mean = devi.mean()
+        other.m2 = np.sum((devi - other.mean)**2)
+        other.min = devi.min()
+        other.max = devi.max()
+        return self.merge(other)
+
+    def merge(
+            self,
+            other : DeviHistogram,
+    ) -> DeviHistogram :
+        """Merge another histogram to this one."""
+        if self.nbins != other.nbins or not np.isclose(self.devi_max, other.devi_max):
+            raise RuntimeError('cannot merge histograms with different bins')
+        numb = self.numb + other.numb
+        if numb > 0:
+            delta = other.mean - self.mean
+            self.m2 += other.m2 + delta**2 * self.numb * other.numb / numb
+            self.mean += delta * other.numb / numb
+        self.numb = numb
+        self.counts = self.counts + other.counts
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def __add__(
+            self,
+            other : DeviHistogram,
+    ) -> DeviHistogram :
+        return copy.deepcopy(self).merge(other)
+
+    def _bin_range(self, kk):
+        if kk < self.nbins:
+            return kk * self.bin_size, (kk + 1) * self.bin_size
+        else:
+            return self.devi_max, max(self.max, self.devi_max)
+
+    def quantile(
+            self,
+            qq : float,
+    ) -> float :
+        """The `qq`-quantile estimated by linear interpolation in the bins.
+        `None` if empty."""
+        if self.numb == 0:
+            return None
+        target = qq * self.numb
+        cum = np.cumsum(self.counts)
+        kk = min(int(np.searchsorted(cum, target, side='left')), self.nbins)
+        lo, hi = self._bin_range(kk)
+        below = cum[kk] - self.counts[kk]
+        frac = (target - below) / self.counts[kk] if self.counts[kk] > 0 else 0.
+        return float(np.clip(lo + frac * (hi - lo), self.min, self.max))
+
+    def count_below(
+            self,
+            devi : float,
+    ) -> float :
+        """The number of deviations smaller than `devi`, estimated by
+        linear interpolation in the bins."""
+        if self.numb == 0 or devi <= self.min:
+            return 0.
+        if devi > self.max:
+            return float(self.numb)
+        kk = min(int(devi / self.bin_size), self.nbins)
+        lo, hi = self._bin_range(kk)
+        frac = (devi - lo) / (hi - lo) if hi > lo else 1.
+        return float(np.sum(self.counts[:kk]) + self.counts[kk] * frac)
+
+
+class HistExplorationReport(ExplorationReport):
+    """The exploration report that keeps the histograms of the model
+    deviations in addition to the ratios of `NaiveExplorationReport`.
+
+    The reports are mergeable by `merge` or `+`, so the partial reports
+    of trajectories selected in parallel can be combined. A report may
+    also record its statistics under a tag (see `tagged`), e.g. the
+    name of a trajectory or a task group. The tags are kept by the
+    merge, so the statistics of each tag can be queried by the methods
+    accepting `tag`.
+
+    Parameters
+    ----------
+    counter_f : Counter
+        The numbers of candidate, accurate and failed frames judged
+        by the force model deviation.
+    counter_v : Counter
+        The numbers judged by the virial model deviation.
+    hist_f : DeviHistogram
+        The histogram of the force model deviation.
+    hist_v : DeviHistogram
+        The histogram of the virial model deviation.
+
+    """
+    valid_quantities = ['force', 'virial']
+    valid_items = ['accurate', 'candidate', 'failed']
+
+    def __init__(
+            self,
+            counter_f : Counter = None,
+            counter_v : Counter = None,
+            hist_f : DeviHistogram = None,
+            hist_v : DeviHistogram = None,
+    ):
+        self.counter = {
+            'force' : Counter({kk : 0 for kk in self.valid_items}),
+            'virial' : Counter({kk : 0 for kk in self.valid_items}),
+        }
+        self.counter['force'].update(counter_f if counter_f is not None else {})
+        self.counter['virial'].update(counter_v if counter_v is not None else {})
+        self.hist = {
+            'force' : hist_f if hist_f is not None else DeviHistogram(),
+            'virial' : hist_v if hist_v is not None else DeviHistogram(),
+        }
+        self.tags = {}
+
+    def tagged(
+            self,
+            tag : str,
+    ) -> HistExplorationReport :
+        """Return a copy of the report whose statistics are also
+        recorded under `tag`."""
+        ret = copy.deepcopy(self)
+        untagged = copy.deepcopy(self)
+        untagged.tags = {}
+        if tag in ret.tags:
+            ret.tags[tag].merge(untagged)
+        else:
+            ret.tags[tag] = untagged
+        return ret
+
+    def merge(
+            self,
+            other : HistExplorationReport,
+    ) -> HistExplorationReport :
+        """Merge another report to this one."""
+        for qq in self.valid_quantities:
+            self.counter[qq].update(other.counter[qq])
+            self.hist[qq].merge(other.hist[qq])
+        for tag, rr in other.tags.items():
+            if tag in self.tags:
+                self.tags[tag].merge(rr)
+            else:
+                self.tags[tag] = copy.deepcopy(rr)
+        return self
+
+    def __add__(
+            self,
+            other : HistExplorationReport,
+    ) -> HistExplorationReport :
+        return copy.deepcopy(self).merge(other)
+
+    def _get(
+            self,
+            tag : str = None,
+    ) -> HistExplorationReport :
+        if tag is None:
+            return self
+        if tag not in self.tags:
+            raise RuntimeError(f'unknown tag {tag}')
+        return self.tags[tag]
+
+    def _check_quantity(self, quantity):
+        if not quantity in self.valid_quantities:
+            raise RuntimeError(f'invalid quantity {quantity}, must in [{" ".join(self.valid_quantities)}]')
+
+    def failed_ratio (
+            self,
+            tag = None,
+    ) -> float :
+        return self.ratio('force', 'failed', tag)
+
+    def accurate_ratio (
+            self,
+            tag = None,
+    ) -> float :
+        return self.ratio('force', 'accurate', tag)
+
+    def candidate_ratio (
+            self,
+            tag = None,
+    ) -> float :
+        return self.ratio('force', 'candidate', tag)
+
+    def ratio(
+            self,
+            quantity : str,
+            item : str,
+            tag : str = None,
+    )-> float:
+        self._check_quantity(quantity)
+        if not item in self.valid_items:
+            raise RuntimeError(f'invalid item {item}, must in [{" ".join(self.valid_items)}]')
+        cc = self._get(tag).counter[quantity]
+        rc, ra, rf = NaiveExplorationReport.calculate_ratio(
+            cc['candidate'], cc['accurate'], cc['failed'])
+        return {'candidate' : rc, 'accurate' : ra, 'failed' : rf}[item]
+
+    def histogram(
+            self,
+            quantity : str,
+            tag : str = None,
+    ) -> DeviHistogram :
+        """The histogram of the model deviation of `quantity`."""
+        self._check_quantity(quantity)
+        return self._get(tag).hist[quantity]
+
+    def quantile(
+            self,
+            quantity : str,
+            qq : float,
+            tag : str = None,
+    ) -> float :
+        """The `qq`-quantile of the model deviation of `quantity`."""
+        return self.histogram(quantity, tag).quantile(qq)
+
+    def count(
+            self,
+            quantity : str,
+            level_lo : float,
+            level_hi : float,
+            tag : str = None,
+    ) -> float :
+        """The estimated number of frames with the model deviation of
+        `quantity` in [`level_lo`, `level_hi`)."""
+        hist = self.histogram(quantity, tag)
+        return hist.count_below(level_hi) - hist.count_below(level_lo)
@@ -4,6 +4,9 @@ from .stage_scheduler import (
 from .const_trust_level_stage_scheduler import (
     ConstTrustLevelStageScheduler,
 )
+from .adaptive_trust_level_stage_scheduler import (
+    AdaptiveTrustLevelStageScheduler,
+)
 from .scheduler import (
     ExplorationScheduler,
 )
@@ -0,0 +1,188 @@
+import numpy as np
+from typing import (
+    List,
+    Tuple,
+)
+from dflow.python import (
+    FatalError,
+)
+from pathlib import Path
+from dpgen2.exploration.report import ExplorationReport, HistExplorationReport
+from dpgen2.exploration.task import ExplorationTaskGroup, ExplorationStage
+from dpgen2.exploration.selector import (
+    ConfFilters,
+    ConfSelectorLammpsFrames,
+    TrustLevel,
+)
+from . import StageScheduler
+
+class AdaptiveTrustLevelStageScheduler(StageScheduler):
+    """The stage scheduler that adjusts the force trust levels in each
+    iteration to keep the number of candidates in a target band.
+
+    The number of candidates of the next iteration is estimated from
+    the force model deviation histograms of the reports of the stage
+    (`HistExplorationReport`). The candidate fraction at a trust level
+    is averaged over the reports with weights decaying by `hist_decay`
+    per iteration back from the current one, and is scaled by the
+    number of frames of the current report. If the estimated number at
+    the current trust levels is out of [`numb_cand_lo`, `numb_cand_hi`],
+    the lower trust level is moved on the histogram bin edges to the
+    value that brings the estimate closest to the middle of the band.
+    The upper trust level keeps its ratio to the lower one. The virial
+    trust levels are not changed.
+
+    The convergence is judged at the initial trust levels, so adjusting
+    the levels does not change the accurate ratio used for it. For a
+    `HistExplorationReport` the accurate ratio at the initial lower
+    trust level is estimated from the histogram.
+
+    Parameters
+    ----------
+    stage : ExplorationStage
+        The exploration stage.
+    trust_level : TrustLevel
+        The trust levels of the first iteration.
+    numb_cand_lo : int
+        The lower bound of the target number of candidates.
+    numb_cand_hi : int
+        The upper bound of the target number of candidates.
+    conv_accuracy : float
+        The stage is converged if the accurate ratio is not smaller than it.
+    max_numb_iter : int
+        The maximal number of iterations of the stage.
+    hist_decay : float
+        The decay of the weights of the earlier reports in the estimate 
+        of the number of candidates. 0 uses the current report only.
+    level_f_lo_min : float
+        The minimal lower trust level. Defaults to half of the initial one.
+    level_f_lo_max : float
+        The maximal lower trust level. Defaults to twice of the initial one.
+    conf_filters : ConfFilters
+        The configuration filters of the selector.
+
+    """
+    def __init__(
+            self,
+            stage : ExplorationStage,
+            trust_level : TrustLevel,
+            numb_cand_lo : int,
+            numb_cand_hi : int,
+            conv_accuracy : float = 0.9,
+            max_numb_iter : int = None,
+            hist_decay : float = 0.5,
+            level_f_lo_min : float = None,
+            level_f_lo_max : float = None,
+            conf_filters : ConfFilters = None,
+    ):
+        if numb_cand_lo > numb_cand_hi:
+            raise RuntimeError('numb_cand_lo should not be larger than numb_cand_hi')
+        if not 0. <= hist_decay <= 1.:
+            raise RuntimeError('hist_decay should be in [0, 1]')
+        self.stage = stage
+        self.init_trust_level = trust_level
+        self.trust_level = trust_level
+        self.numb_cand_lo = numb_cand_lo
+        self.numb_cand_hi = numb_cand_hi
+        self.conv_accuracy = conv_accuracy
+        self.max_numb_iter = max_numb_iter
+        self.hist_decay = hist_decay
+        self.level_ratio = trust_level.level_f_hi / trust_level.level_f_lo
+        self.level_f_lo_min = level_f_lo_min if level_f_lo_min is not None \
+            else 0.5 * trust_level.level_f_lo
+        self.level_f_lo_max = level_f_lo_max if level_f_lo_max is not None \
+            else 2.0 * trust_level.level_f_lo
+        self.conf_filters = conf_filters
+        self.nxt_iter = 0
+
+    def plan_next_iteration(
+            self,
+            hist_reports : List[ExplorationReport] = [],
+            report : ExplorationReport = None,
+            trajs : List[Path] = None,
+    ) -> Tuple[bool, ExplorationTaskGroup, ConfSelectorLammpsFrames] :
+        if report is None:
+            converged = False
+            lmp_task_grp = self.stage.make_task()
+            ret_selector = self._make_selector()
+        else :
+            converged = self.accurate_ratio(report) >= self.conv_accuracy
+            if converged:
+                # if converged, no more lmp task
+                lmp_task_grp = None
+                ret_selector = None
+            else :
+                # if not converged, check max iter and make lmp tasks
+                if self.max_numb_iter is not None and self.nxt_iter == self.max_numb_iter:
+                    raise FatalError('reached maximal number of iterations')
+                if isinstance(report, HistExplorationReport):
+                    self.trust_level = self._adjust_trust_level(hist_reports, report)
+                lmp_task_grp = self.stage.make_task()
+                ret_selector = self._make_selector()
+        self.nxt_iter += 1
+        return converged, lmp_task_grp, ret_selector
+
+    def _make_selector(self):
+        return ConfSelectorLammpsFrames(
+            self.trust_level, conf_filters = self.conf_filters,
+            task_group_ids = self.stage.task_group_ids)
+
+    def accurate_ratio(
+            self,
+            report : ExplorationReport,
+    ) -> float :
+        """
+        The accurate ratio at the initial lower trust level.
+        """
+        if isinstance(report, HistExplorationReport):
+            hist = report.histogram('force')
+            if hist.numb > 0:
+                return hist.count_below(self.init_trust_level.level_f_lo) / hist.numb
+        return report.accurate_ratio()
+
+    def _estimate_numb_cand(
+            self,
+            reports : List[HistExplorationReport],
+            level_lo : float,
+    ) -> float :
+        # the weighted candidate fraction of the reports (the latest is
+        # the last) times the number of frames of the latest report
+        level_hi = level_lo * self.level_ratio
+        weights = self.hist_decay ** np.arange(len(reports))[::-1]
+        fracs = [
+            rr.count('force', level_lo, level_hi) / rr.histogram('force').numb
+            for rr in reports]
+        return np.dot(weights, fracs) / np.sum(weights) * \
+            reports[-1].histogram('force').numb
+
+    def _adjust_trust_level(
+            self,
+            hist_reports : List[ExplorationReport],
+            report : HistExplorationReport,
+    ) -> TrustLevel :
+        hist = report.histogram('force')
+        if hist.numb == 0:
+            return self.trust_level
+        # the reports of the first iterations are None
+        reports = [
+            rr for rr in hist_reports 
+            if isinstance(rr, HistExplorationReport) and rr.histogram('force').numb > 0
+        ] + [report]
+        level_lo = self.trust_level.level_f_lo
+        numb_cand = self._estimate_numb_cand(reports, level_lo)
+        if self.numb_cand_lo <= numb_cand <= self.numb_cand_hi:
+            return self.trust_level
+        grid = np.arange(hist.nbins + 1) * hist.bin_size
+        grid = grid[(grid >= self.level_f_lo_min) & (grid <= self.level_f_lo_max)]
+        grid = np.unique(np.concatenate(
+            [grid, [self.level_f_lo_min, self.level_f_lo_max, level_lo]]))
+        numb_cands = np.array([
+            self._estimate_numb_cand(reports, lo) for lo in grid])
+        target = 0.5 * (self.numb_cand_lo + self.numb_cand_hi)
+        # the closest to the target, then the closest to the current level
+        idx = np.lexsort((np.abs(grid - level_lo), np.abs(numb_cands - target)))[0]
+        new_lo = float(grid[idx])
+        return TrustLevel(
+            new_lo, new_lo * self.level_ratio,
+            self.trust_level.level_v_lo, self.trust_level.level_v_hi,
+        )
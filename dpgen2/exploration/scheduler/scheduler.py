@@ -1,3 +1,4 @@
+import numpy as np
 from typing import (
     List,
     Tuple,
@@ -18,15 +19,39 @@ class ExplorationScheduler():
     """
     The exploration scheduler.
 
+    Parameters
+    ----------
+    early_conv_window: int
+        The number of latest iterations of a stage used to predict the 
+        convergence. A straight line is fitted to the accurate ratios of 
+        these iterations. If `None`, the convergence is not predicted.
+    early_conv_gain: float
+        The stage is treated as converged if the slope of the fitted 
+        line, i.e. the expected gain of the accurate ratio in the next 
+        iteration, is positive but smaller than `early_conv_gain`, and 
+        the projected accurate ratio of the next iteration is within 
+        `early_conv_margin` below the `conv_accuracy` of the stage. 
+        Only the stages having `conv_accuracy` are predicted.
+    early_conv_margin: float
+        See `early_conv_gain`.
+
     """
 
     def __init__(
             self,
+            early_conv_window : int = None,
+            early_conv_gain : float = 0.01,
+            early_conv_margin : float = 0.05,
     ):
+        if early_conv_window is not None and early_conv_window < 2:
+            raise RuntimeError('early_conv_window should be at least 2')
         self.stage_schedulers = []
         self.stage_reports = [[]]
         self.cur_stage = 0
         self.iteration = -1
+        self.early_conv_window = early_conv_window
+        self.early_conv_gain = early_conv_gain
+        self.early_conv_margin = early_conv_margin
         
     def add_stage_scheduler(
             self,
@@ -91,12 +116,17 @@ class ExplorationScheduler():
         """
 
         try:
-            converged, lmp_task_grp, conf_selector = \
-                self.stage_schedulers[self.cur_stage].plan_next_iteration(
-                    self.stage_reports[self.cur_stage],
-                    report,
-                    trajs,
-                )
+            if self._early_converged(
+                    self.stage_schedulers[self.cur_stage],
+                    self.stage_reports[self.cur_stage] + [report]):
+                converged, lmp_task_grp, conf_selector = True, None, None
+            else:
+                converged, lmp_task_grp, conf_selector = \
+                    self.stage_schedulers[self.cur_stage].plan_next_iteration(
+                        self.stage_reports[self.cur_stage],
+                        report,
+                        trajs,
+                    )
             self.stage_reports[self.cur_stage].append(report)
         except FatalError as e:
             raise FatalError(f'stage {self.cur_stage}: ' + str(e))
@@ -114,3 +144,22 @@ class ExplorationScheduler():
             self.iteration += 1
             return converged, lmp_task_grp, conf_selector
 
+    def _early_converged(
+            self,
+            stage_scheduler : StageScheduler,
+            reports : List[ExplorationReport],
+    ) -> bool :
+        if self.early_conv_window is None or stage_scheduler.conv_accuracy is None:
+            return False
+        # the report is None in the first iteration of a stage
+        ratios = [stage_scheduler.accurate_ratio(rr) for rr in reports if rr is not None]
+        ratios = [rr for rr in ratios if rr is not None][-self.early_conv_window:]
+        if len(ratios) < self.early_conv_window:
+            return False
+        coeff = np.polyfit(np.arange(len(ratios)), ratios, 1)
+        slope = coeff[0]
+        projected = np.polyval(coeff, len(ratios))
+        # a stalled or worsening stage is not converged, it is left to 
+        # the stage scheduler, e.g. to reach the max number of iterations
+        return 0. < slope < self.early_conv_gain and \
+            projected >= stage_scheduler.conv_accuracy - self.early_conv_margin
@@ -14,7 +14,23 @@ from dpgen2.exploration.selector import ConfSelector, TrustLevelConfSelector, Tr
 class StageScheduler(ABC):
     """
     The scheduler for an exploration stage.
+
+    Attributes
+    ----------
+    conv_accuracy: float
+        The stage is converged if the accurate ratio is not smaller than 
+        it. `None` if the stage is not converged by the accurate ratio.
     """
+    conv_accuracy = None
+
+    def accurate_ratio(
+            self,
+            report : ExplorationReport,
+    ) -> float :
+        """
+        The accurate ratio of the report that the convergence of the stage is judged by.
+        """
+        return report.accurate_ratio()
 
     @abstractmethod
     def plan_next_iteration(
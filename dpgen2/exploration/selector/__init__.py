@@ -5,12 +5,30 @@ from .conf_filter import (
     ConfFilter,
     ConfFilters,
 )
+from .distance_conf_filter import (
+    DistanceConfFilter,
+    CoordinationConfFilter,
+)
+from .conf_dedup import (
+    ConfDedup,
+    RdfConfDedup,
+)
 from .conf_selector import (
     ConfSelector,
 )
 from .trust_level_conf_selector import (
     TrustLevelConfSelector,
 )
+from .model_devi import (
+    load_model_devi,
+    dump_model_devi_npy,
+)
+from .cand_budget import (
+    budget_candidates,
+)
+from .lmp_dump_reader import (
+    LammpsDumpReader,
+)
 from .conf_selector_frame import (
     ConfSelectorLammpsFrames,
 )
@@ -0,0 +1,59 @@
+import numpy as np
+
+budget_strategies = ['max_devi', 'stratified']
+
+
+def budget_candidates(
+        score : np.array,
+        max_numb : int,
+        strategy : str = 'max_devi',
+        numb_bins : int = 10,
+) -> np.array :
+    """Select at most `max_numb` candidates ranked by their scores.
+
+    Parameters
+    ----------
+    score : numpy.array
+        The score of each candidate, e.g. the model deviation.
+    max_numb : int
+        The maximal number of selected candidates. If `None`, all
+        the candidates are selected.
+    strategy : str
+        `max_devi`: the candidates with the highest scores are selected.
+        `stratified`: the range of the scores is divided into `numb_bins`
+        bins of equal width, the candidates are taken from each bin in
+        turn, from the highest score to the lowest score in the bin.
+    numb_bins : int
+        The number of bins used by the `stratified` strategy.
+
+    Returns
+    -------
+    idx : numpy.array
+        The sorted indexes of the selected candidates.
+
+    """
+    score = np.asarray(score, dtype=float)
+    nn = score.size
+    if max_numb is None or max_numb >= nn:
+        return np.arange(nn)
+    if max_numb <= 0:
+        return np.array([], dtype=int)
+    if strategy == 'max_devi':
+        idx = np.argpartition(-score, max_numb - 1)[:max_numb]
+    elif strategy == 'stratified':
+        lo, hi = score.min(), score.max()
+        if hi > lo:
+            bins = np.minimum(
+                ((score - lo) / (hi - lo) * numb_bins).astype(int), numb_bins - 1)
+        else:
+            bins = np.zeros(nn, dtype=int)
+        # the rank of each candidate in its bin, by decreasing score
+        order = np.lexsort((-score, bins))
+        sorted_bins = bins[order]
+        rank = np.empty(nn, dtype=int)
+        rank[order] = np.arange(nn) - np.searchsorted(sorted_bins, sorted_bins, side='left')
+        idx = np.lexsort((-score, rank))[:max_numb]
+    else:
+        raise RuntimeError(f'unknown budget strategy {strategy}, '
+                           f'should be one of {budget_strategies}')
+    return np.sort(idx)
@@ -0,0 +1,139 @@
+from abc import ABC, abstractmethod
+import dpdata
+import numpy as np
+from .distance_conf_filter import _neighbor_pairs
+
+class ConfDedup(ABC):
+    @abstractmethod
+    def select (
+            self,
+            coords : np.array,
+            cells : np.array,
+            atom_types : np.array,
+            nopbc : bool,
+    ) -> np.array :
+        """Select the representative configurations.
+
+        Parameters
+        ----------
+        coords : numpy.array
+                The coordinates, numpy array of shape nframes x natoms x 3
+        cells : numpy.array
+                The cell tensors. numpy array of shape nframes x 3 x 3
+        atom_types : numpy.array
+                The atom types. numpy array of shape natoms
+        nopbc : bool
+                If no periodic boundary condition.
+
+        Returns
+        -------
+        idx : numpy.array
+                The sorted indexes of the representative configurations.
+
+        """
+        pass
+
+    def dedup(
+            self,
+            conf : dpdata.System,
+    ) -> dpdata.System :
+        """Remove the duplicated configurations.
+
+        Parameters
+        ----------
+        conf : dpdata.System
+                The configurations.
+
+        Returns
+        -------
+        selected : dpdata.System
+                The representative configurations.
+
+        """
+        if conf.get_nframes() == 0:
+            return conf
+        idx = self.select(
+            conf['coords'], conf['cells'], conf['atom_types'], conf.nopbc)
+        return conf.sub_system(idx)
+
+
+class RdfConfDedup(ConfDedup):
+    """Remove the configurations that have similar radial distribution
+    functions.
+
+    Each configuration is described by the histograms of the pair
+    distances of each pair of atom types, normalized by the number of
+    atoms. The representatives are chosen by farthest point sampling
+    in the descriptor space, starting from the first configuration,
+    until all the remaining configurations are closer than `threshold`
+    to a representative, or `max_numb` representatives are chosen.
+
+    Parameters
+    ----------
+    rcut : float
+        The cut-off radius of the histograms.
+    threshold : float
+        Two configurations are duplicated if the Euclidean distance
+        between their descriptors is smaller than `threshold`.
+    nbins : int
+        The number of bins of each histogram.
+    max_numb : int
+        The maximal number of representatives. If `None`, the number
+        is not limited.
+
+    """
+    def __init__(
+            self,
+            rcut : float,
+            threshold : float,
+            nbins : int = 50,
+            max_numb : int = None,
+    ):
+        self.rcut = rcut
+        self.threshold = threshold
+        self.nbins = nbins
+        self.max_numb = max_numb
+
+    def select (
+            self,
+            coords : np.array,
+            cells : np.array,
+            atom_types : np.array,
+            nopbc : bool,
+    ) -> np.array :
+        nframes = coords.shape[0]
+        max_numb = nframes if self.max_numb is None else min(self.max_numb, nframes)
+        if nframes == 0 or max_numb <= 0:
+            return np.array([], dtype=int)
+        desc = self.descriptor(coords, cells, atom_types, nopbc)
+        sel = [0]
+        min_dist = np.linalg.norm(desc - desc[0], axis=1)
+        while len(sel) < max_numb:
+            ii = int(np.argmax(min_dist))
+            if min_dist[ii] < self.threshold:
+                break
+            sel.append(ii)
+            min_dist = np.minimum(min_dist, np.linalg.norm(desc - desc[ii], axis=1))
+        return np.sort(sel)
+
+    def descriptor(
+            self,
+            coords : np.array,
+            cells : np.array,
+            atom_types : np.array,
+            nopbc : bool,
+    ) -> np.array :
+        """The descriptors of the configurations, numpy array of shape
+        nframes x (ntypes * ntypes * nbins)."""
+        atom_types = np.array(atom_types, dtype=int)
+        natoms = atom_types.size
+        ntypes = atom_types.max() + 1 if natoms > 0 else 1
+        nframes = coords.shape[0]
+        bin_size = self.rcut / self.nbins
+        desc = np.zeros([nframes, ntypes * ntypes * self.nbins])
+        for ff in range(nframes):
+            ii, jj, dist = _neighbor_pairs(coords[ff], cells[ff], self.rcut, nopbc)
+            ibin = np.minimum((dist / bin_size).astype(int), self.nbins - 1)
+            key = (atom_types[ii] * ntypes + atom_types[jj]) * self.nbins + ibin
+            desc[ff] = np.bincount(key, minlength=desc.shape[1])
+        return desc / max(natoms, 1)
@@ -33,6 +33,41 @@ class ConfFilter(ABC):
         """
         pass
 
+    def check_batch (
+            self,
+            coords : np.array,
+            cells : np.array,
+            atom_types : np.array,
+            nopbc : bool,
+    ) -> np.array :
+        """Check if the configurations are valid.
+        
+        The default implementation calls `check` frame by frame. A
+        derived class may override it with a vectorized implementation.
+
+        Parameters
+        ----------
+        coords : numpy.array
+                The coordinates, numpy array of shape nframes x natoms x 3
+        cells : numpy.array
+                The cell tensors. numpy array of shape nframes x 3 x 3
+        atom_types : numpy.array
+                The atom types. numpy array of shape natoms
+        nopbc : bool
+                If no periodic boundary condition.
+
+        Returns
+        -------
+        valid : numpy.array
+                Bool array of shape nframes. `True` if the configuration is a valid configuration, else `False`.
+
+        """
+        return np.array(
+            [ self.check(coords[ii], cells[ii], atom_types, nopbc)
+              for ii in range(coords.shape[0]) ],
+            dtype = bool,
+        ).reshape([-1])
+
 class ConfFilters():
     def __init__(
             self,
@@ -49,17 +84,33 @@ class ConfFilters():
     def check(
             self,
             conf : dpdata.System,
-    ) -> bool : 
-        natoms = sum(conf['atom_numbs'])
-        selected_idx = np.arange(conf.get_nframes())
-        for ff in self._filters:                         
-            fsel = np.where (
-                [ ff.check(conf['coords'][ii], 
-                           conf['cells'][ii],
-                           conf['atom_types'],
-                           conf.nopbc)
-                  for ii in range(conf.get_nframes()) ]
-            )[0]
-            selected_idx = np.intersect1d(selected_idx, fsel)
-        return conf.sub_system(selected_idx)
+    ) -> dpdata.System : 
+        """Select the valid configurations.
+
+        The filters are applied in the order they are added. A frame
+        rejected by one filter is not passed to the following filters.
+
+        Parameters
+        ----------
+        conf : dpdata.System
+                The configurations to check.
+
+        Returns
+        -------
+        selected : dpdata.System
+                The configurations that are valid for all the filters.
+
+        """
+        valid = np.ones(conf.get_nframes(), dtype=bool)
+        for ff in self._filters:
+            idx = np.where(valid)[0]
+            if idx.size == 0:
+                break
+            valid[idx] = ff.check_batch(
+                conf['coords'][idx], 
+                conf['cells'][idx],
+                conf['atom_types'],
+                conf.nopbc,
+            )
+        return conf.sub_system(np.where(valid)[0])
     
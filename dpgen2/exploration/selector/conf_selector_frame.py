@@ -1,6 +1,7 @@
 import dpdata
 import numpy as np
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from typing import (
     List,
     Tuple,
@@ -9,8 +10,21 @@ from pathlib import Path
 from . import (
     ConfSelector,
     ConfFilters,
+    ConfDedup,
 )
-from dpgen2.exploration.report import ExplorationReport, NaiveExplorationReport
+from .lmp_dump_reader import LammpsDumpReader
+from .model_devi import load_model_devi
+from .cand_budget import budget_candidates, budget_strategies
+from dpgen2.exploration.report import (
+    ExplorationReport,
+    DeviHistogram,
+    HistExplorationReport,
+)
+from dpgen2.utils.multi_sys_writer import MultiSystemsWriter
+
+# the tags of the statistics of a trajectory and a task group in the report
+traj_tag_format = 'traj:{}'
+task_group_tag_format = 'task_group:{}'
 
 class ConfSelectorLammpsFrames(ConfSelector):
     """Select frames from trajectories as confs.
@@ -20,15 +34,62 @@ class ConfSelectorLammpsFrames(ConfSelector):
         The trust level
     conf_filter: ConfFilters
         The configuration filter
+    conf_dedup: ConfDedup
+        Remove the duplicated candidates of each trajectory after 
+        the configuration filter. If `None`, no candidate is removed.
+    numb_workers: int
+        The number of worker processes used to select the trajectories
+        in parallel. If `None` or 1, the trajectories are selected
+        serially. The result does not depend on the number of workers.
+    max_numb_sel: int
+        The maximal number of selected candidates of all the trajectories.
+        If `None`, the number is not limited.
+    max_numb_sel_traj: int
+        The maximal number of selected candidates of each trajectory.
+        If `None`, the number is not limited.
+    budget_strategy: str
+        How the candidates are ranked when the number of candidates
+        exceeds the budget, `max_devi` or `stratified`. 
+        See `budget_candidates`.
+    budget_numb_bins: int
+        The number of deviation bins of the `stratified` strategy.
+    task_group_ids: List[int]
+        The index of the task group of each trajectory, in the order of
+        the trajectories, see `ExplorationStage.task_group_ids`. If 
+        `None`, the statistics are not recorded by task group.
+    traj_tags: bool
+        If the statistics of each trajectory are recorded in the report.
+        The report is passed between the steps of the workflow and kept
+        in the history of the scheduler, so this is off by default: the
+        size of the report grows with the number of trajectories.
 
     """
     def __init__(
             self,
             trust_level,
             conf_filters : ConfFilters = None,
+            conf_dedup : ConfDedup = None,
+            numb_workers : int = None,
+            max_numb_sel : int = None,
+            max_numb_sel_traj : int = None,
+            budget_strategy : str = 'max_devi',
+            budget_numb_bins : int = 10,
+            task_group_ids : List[int] = None,
+            traj_tags : bool = False,
     ):
         self.trust_level = trust_level
         self.conf_filters = conf_filters
+        self.conf_dedup = conf_dedup
+        self.numb_workers = numb_workers
+        self.max_numb_sel = max_numb_sel
+        self.max_numb_sel_traj = max_numb_sel_traj
+        if budget_strategy not in budget_strategies:
+            raise RuntimeError(f'unknown budget strategy {budget_strategy}, '
+                               f'should be one of {budget_strategies}')
+        self.budget_strategy = budget_strategy
+        self.budget_numb_bins = budget_numb_bins
+        self.task_group_ids = task_group_ids
+        self.traj_tags = traj_tags
     
     def select (
             self,
@@ -47,7 +108,9 @@ class ConfSelectorLammpsFrames(ConfSelector):
                 A `list` of `Path` to model deviation files generated by LAMMPS.
                 Format: each line has 7 numbers they are used as
                 # frame_id  md_v_max md_v_min md_v_mean  md_f_max md_f_min md_f_mean
-                where `md` stands for model deviation, v for virial and f for force
+                where `md` stands for model deviation, v for virial and f for force.
+                The same columns stored in the binary format written by 
+                `dump_model_devi_npy` are also accepted.
         traj_fmt : str
                 Format of the trajectory, by default it is the dump file of LAMMPS
         type_map : List[str]
@@ -59,45 +122,72 @@ class ConfSelectorLammpsFrames(ConfSelector):
                 The selected confgurations, stored in a folder that can be parsed as dpdata.MultiSystems. The `list` only has one item.
         report : ExplorationReport
                 The exploration report recoding the status of the exploration. 
+                It is a `HistExplorationReport` that also keeps the histograms
+                of the model deviations. The ratios are computed before the 
+                candidates are limited by the budget. The statistics of each
+                task group are recorded under the tag `task_group:<index of the group>`,
+                and, if `traj_tags`, those of each trajectory under 
+                `traj:<path of the trajectory>`.
 
         """
         ntraj = len(trajs)
         assert(ntraj == len(model_devis))
+        if self.task_group_ids is not None and len(self.task_group_ids) != ntraj:
+            raise RuntimeError(
+                f'the number of task group ids {len(self.task_group_ids)} does not '
+                f'match the number of trajectories {ntraj}')
         self.v_level = ( (self.trust_level.level_v_lo is not None) and \
                          (self.trust_level.level_v_hi is not None) )
 
-        cf = Counter()
-        cv = Counter()
-        cf['candidate'] = cf['accurate'] = cf['failed'] = 0
-        cv['candidate'] = cv['accurate'] = cv['failed'] = 0
-        ms = dpdata.MultiSystems()
-
-        for ii in range(ntraj):
-            ss, icf, icv = \
-                self.select_one_traj(trajs[ii], model_devis[ii], traj_fmt, type_map)
-            ms.append(ss)
-            cf = cf + icf
-            cv = cv + icv
-            
+        report = HistExplorationReport()
+        id_cands = []
+        scores = []
+        for ii, (id_cand, score, ireport) in enumerate(self._map(
+                self._select_indexes_one_traj, model_devis)):
+            id_cands.append(id_cand)
+            scores.append(score)
+            if self.traj_tags:
+                ireport = ireport.tagged(traj_tag_format.format(trajs[ii]))
+            if self.task_group_ids is not None:
+                ireport = ireport.tagged(task_group_tag_format.format(self.task_group_ids[ii]))
+            report.merge(ireport)
+        id_cands = self._apply_budget(id_cands, scores)
+
         out_path = Path('confs')
-        ms.to_deepmd_npy(out_path)
-        report = NaiveExplorationReport(cf, cv)
+        with MultiSystemsWriter(out_path) as writer:
+            for ss in self._map(
+                    self._extract_one_traj, 
+                    trajs, id_cands, [traj_fmt] * ntraj, [type_map] * ntraj):
+                # the writer keeps at most one set per formula in memory,
+                # the remaining frames are flushed on leaving the context
+                writer.append(ss)
 
         return [out_path], report
-        
 
-    def select_one_traj(
+
+    def _map(
+            self,
+            func,
+            *iterables,
+    ):
+        ntraj = len(iterables[0])
+        if self.numb_workers is not None and self.numb_workers > 1 and ntraj > 1:
+            # executor.map returns the results in the order of trajs
+            chunksize = max(1, ntraj // (4 * self.numb_workers))
+            with ProcessPoolExecutor(max_workers=self.numb_workers) as executor:
+                yield from executor.map(func, *iterables, chunksize = chunksize)
+        else:
+            yield from map(func, *iterables)
+
+
+    def _select_indexes_one_traj(
             self,
-            traj, 
             model_devi,
-            traj_fmt, 
-            type_map,
-    ) -> Tuple[dpdata.System, Counter, Counter ]:
+    ) -> Tuple[np.array, np.array, HistExplorationReport ]:
         cf = Counter()
         cv = Counter()
         cf['candidate'] = cf['accurate'] = cf['failed'] = 0
         cv['candidate'] = cv['accurate'] = cv['failed'] = 0
-        ss = ConfSelectorLammpsFrames._load_traj(traj, traj_fmt, type_map)
         mdf, mdv = ConfSelectorLammpsFrames._load_model_devi(model_devi)
         id_f_cand, id_f_accu, id_f_fail = ConfSelectorLammpsFrames._get_indexes(
             mdf, self.trust_level.level_f_lo, self.trust_level.level_f_hi)
@@ -113,9 +203,60 @@ class ConfSelectorLammpsFrames(ConfSelector):
         else :
             id_v_cand = id_v_accu = id_v_fail = np.array([], dtype=int)
         id_cand = np.unique(np.concatenate((id_f_cand, id_v_cand)))        
-        ss = dpdata.System(traj, fmt=traj_fmt, type_map=type_map)
-        ss = ss.sub_system(id_cand)        
-        return ss, cf, cv
+        # the score is the deviation relative to the trust levels
+        score = (mdf[id_cand] - self.trust_level.level_f_lo) / \
+            (self.trust_level.level_f_hi - self.trust_level.level_f_lo)
+        if self.v_level:
+            score = np.maximum(
+                score, 
+                (mdv[id_cand] - self.trust_level.level_v_lo) / \
+                (self.trust_level.level_v_hi - self.trust_level.level_v_lo))
+        sel = budget_candidates(
+            score, self.max_numb_sel_traj, 
+            self.budget_strategy, self.budget_numb_bins)
+        report = HistExplorationReport(
+            cf, cv, DeviHistogram().add(mdf), DeviHistogram().add(mdv))
+        return id_cand[sel], score[sel], report
+
+
+    def _apply_budget(
+            self,
+            id_cands : List[np.array],
+            scores : List[np.array],
+    ) -> List[np.array] :
+        if self.max_numb_sel is None or \
+           sum([ii.size for ii in id_cands]) <= self.max_numb_sel:
+            return id_cands
+        traj_idx = np.concatenate([
+            np.full(ii.size, jj, dtype=int) for jj, ii in enumerate(id_cands)])
+        sel = budget_candidates(
+            np.concatenate(scores), self.max_numb_sel, 
+            self.budget_strategy, self.budget_numb_bins)
+        # split the selection by trajectory, sel is sorted
+        counts = np.bincount(traj_idx[sel], minlength=len(id_cands))
+        offsets = np.cumsum([0] + [ii.size for ii in id_cands])
+        ret = []
+        start = 0
+        for jj, ii in enumerate(id_cands):
+            ret.append(ii[sel[start:start+counts[jj]] - offsets[jj]])
+            start += counts[jj]
+        return ret
+
+
+    def _extract_one_traj(
+            self,
+            traj, 
+            id_cand,
+            traj_fmt, 
+            type_map,
+    ) -> dpdata.System :
+        ss = ConfSelectorLammpsFrames._load_traj_frames(
+            traj, traj_fmt, type_map, id_cand)
+        if self.conf_filters is not None:
+            ss = self.conf_filters.check(ss)
+        if self.conf_dedup is not None:
+            ss = self.conf_dedup.dedup(ss)
+        return ss
 
                 
     @staticmethod
@@ -137,9 +278,22 @@ class ConfSelectorLammpsFrames(ConfSelector):
     ) -> dpdata.System : 
         return dpdata.System(str(fname), fmt = fmt, type_map = type_map)
 
+    @staticmethod
+    def _load_traj_frames(
+            fname : Path,
+            fmt : str,
+            type_map : List[str],
+            idx : np.array,
+    ) -> dpdata.System :
+        if fmt == 'lammps/dump':
+            # only the frames in idx are decoded
+            return LammpsDumpReader(fname, type_map).read_frames(idx)
+        else:
+            ss = ConfSelectorLammpsFrames._load_traj(fname, fmt, type_map)
+            return ss.sub_system(idx)
+
     @staticmethod
     def _load_model_devi(
             fname : Path,
     ) -> Tuple[np.array, np.array] : 
-        dd = np.loadtxt(fname)
-        return dd[:,4], dd[:,1]
+        return load_model_devi(fname)
@@ -0,0 +1,174 @@
+import itertools
+import numpy as np
+from typing import (
+    List,
+    Tuple,
+    Union,
+)
+from . import ConfFilter
+
+class DistanceConfFilter(ConfFilter):
+    """Reject the configurations that have too close atoms.
+
+    Parameters
+    ----------
+    min_dist : float or List[List[float]]
+        The minimal allowed distance between two atoms. If a matrix of
+        shape ntypes x ntypes is provided, the minimal distance between
+        an atom of type i and an atom of type j is `min_dist[i][j]`.
+
+    """
+    def __init__(
+            self,
+            min_dist : Union[float, List[List[float]]],
+    ):
+        self.min_dist = np.array(min_dist, dtype=float)
+        if self.min_dist.ndim not in [0, 2]:
+            raise RuntimeError('min_dist should be a float or a ntypes x ntypes matrix')
+        if self.min_dist.ndim == 2 and \
+           not np.allclose(self.min_dist, self.min_dist.T):
+            raise RuntimeError('the type pair min_dist matrix should be symmetric')
+
+    def check (
+            self,
+            coords : np.array,
+            cell: np.array,
+            atom_types : np.array,
+            nopbc: bool,
+    ) -> bool :
+        rcut = np.max(self.min_dist)
+        ii, jj, dist = _neighbor_pairs(coords, cell, rcut, nopbc)
+        if self.min_dist.ndim == 0:
+            threshold = self.min_dist
+        else:
+            atom_types = np.array(atom_types, dtype=int)
+            threshold = self.min_dist[atom_types[ii], atom_types[jj]]
+        return not np.any(dist < threshold)
+
+
+class CoordinationConfFilter(ConfFilter):
+    """Reject the configurations that have over-coordinated atoms.
+
+    Parameters
+    ----------
+    rcut : float
+        Two atoms are neighbors if their distance is smaller than `rcut`.
+    max_coord : int
+        The maximal allowed number of neighbors of an atom.
+
+    """
+    def __init__(
+            self,
+            rcut : float,
+            max_coord : int,
+    ):
+        self.rcut = rcut
+        self.max_coord = max_coord
+
+    def check (
+            self,
+            coords : np.array,
+            cell: np.array,
+            atom_types : np.array,
+            nopbc: bool,
+    ) -> bool :
+        natoms = coords.shape[0]
+        ii, jj, dist = _neighbor_pairs(coords, cell, self.rcut, nopbc)
+        coord = np.bincount(ii, minlength=natoms)
+        return natoms == 0 or coord.max() <= self.max_coord
+
+
+def _neighbor_pairs(
+        coords : np.array,
+        cell : np.array,
+        rcut : float,
+        nopbc : bool,
+) -> Tuple[np.array, np.array, np.array] :
+    """Find all the pairs of atoms that are closer than `rcut`.
+
+    The search uses a cell list, so the cost is linear in the number
+    of atoms. The periodic images, also in triclinic cells, are
+    explicitly constructed up to `rcut` from the cell.
+
+    Returns
+    -------
+    ii : numpy.array
+        The index of the center atom.
+    jj : numpy.array
+        The index of the neighbor atom. An atom may be the neighbor of
+        itself via the periodic images. Each pair of atoms is found
+        from both atoms, i.e. both (i, j) and (j, i) are returned.
+    dist : numpy.array
+        The distance of the pair.
+
+    """
+    coords = np.array(coords, dtype=float).reshape([-1, 3])
+    natoms = coords.shape[0]
+    if natoms == 0 or rcut <= 0:
+        empty = np.array([], dtype=int)
+        return empty, empty, np.array([], dtype=float)
+    if nopbc:
+        points = coords
+        point_atom = np.arange(natoms)
+    else:
+        points, point_atom = _extend_images(coords, cell, rcut)
+    # the first natoms points are the atoms in the home cell
+    lo = points.min(axis=0)
+    extent = points.max(axis=0) - lo
+    nbins = np.maximum(np.floor(extent / rcut).astype(int), 1)
+    bin_size = np.maximum(extent / nbins, rcut)
+    bins = np.minimum(np.floor((points - lo) / bin_size).astype(int), nbins - 1)
+    keys = (bins[:,0] * nbins[1] + bins[:,1]) * nbins[2] + bins[:,2]
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+
+    home_bins = bins[:natoms]
+    all_ii = []
+    all_jj = []
+    for shift in itertools.product([-1, 0, 1], repeat=3):
+        nbr_bins = home_bins + np.array(shift)
+        valid = np.all((nbr_bins >= 0) & (nbr_bins < nbins), axis=1)
+        nbr_keys = (nbr_bins[:,0] * nbins[1] + nbr_bins[:,1]) * nbins[2] + nbr_bins[:,2]
+        start = np.searchsorted(sorted_keys, nbr_keys, side='left')
+        end = np.searchsorted(sorted_keys, nbr_keys, side='right')
+        counts = np.where(valid, end - start, 0)
+        total = counts.sum()
+        if total == 0:
+            continue
+        ii = np.repeat(np.arange(natoms), counts)
+        offset = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        all_ii.append(ii)
+        all_jj.append(order[np.repeat(start, counts) + offset])
+    if len(all_ii) == 0:
+        empty = np.array([], dtype=int)
+        return empty, empty, np.array([], dtype=float)
+    ii = np.concatenate(all_ii)
+    jj = np.concatenate(all_jj)
+    dist = np.linalg.norm(points[jj] - points[ii], axis=1)
+    mask = (dist < rcut) & (jj != ii)
+    return ii[mask], point_atom[jj[mask]], dist[mask]
+
+
+def _extend_images(
+        coords : np.array,
+        cell : np.array,
+        rcut : float,
+) -> Tuple[np.array, np.array] :
+    cell = np.array(cell, dtype=float).reshape([3, 3])
+    natoms = coords.shape[0]
+    frac = coords @ np.linalg.inv(cell)
+    frac -= np.floor(frac)
+    # distances between the opposite faces of the cell
+    volume = np.abs(np.linalg.det(cell))
+    face_dist = volume / np.linalg.norm(
+        np.cross(cell[[1, 2, 0]], cell[[2, 0, 1]]), axis=1)
+    margin = rcut / face_dist
+    nrep = np.ceil(margin).astype(int)
+    shifts = np.array(list(itertools.product(
+        *[range(-nn, nn+1) for nn in nrep])), dtype=float)
+    # put the zero shift first, so the home atoms come first
+    shifts = shifts[np.argsort(np.linalg.norm(shifts, axis=1), kind='stable')]
+    ext_frac = (frac[None,:,:] + shifts[:,None,:]).reshape([-1, 3])
+    ext_atom = np.tile(np.arange(natoms), shifts.shape[0])
+    keep = np.all((ext_frac >= -margin) & (ext_frac < 1. + margin), axis=1)
+    return ext_frac[keep] @ cell, ext_atom[keep]
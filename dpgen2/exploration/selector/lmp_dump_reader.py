@@ -0,0 +1,98 @@
+import os, mmap
+import dpdata
+import dpdata.lammps.dump
+import numpy as np
+from pathlib import Path
+from typing import (
+    List,
+)
+
+class LammpsDumpReader():
+    """Random access reader of a LAMMPS dump file.
+
+    The byte offsets of the `ITEM: TIMESTEP` blocks are indexed when
+    the reader is created. Only the requested frames are decoded by
+    `read_frames`, thus the cost of reading the candidates scales with
+    the number of candidates rather than the length of the trajectory.
+
+    Parameters
+    ----------
+    fname : Path
+        The LAMMPS dump file.
+    type_map : List[str]
+        The `type_map` of the system.
+
+    """
+    frame_mark = b'ITEM: TIMESTEP'
+
+    def __init__(
+            self,
+            fname : Path,
+            type_map : List[str] = None,
+    ):
+        self.fname = Path(fname)
+        self.type_map = type_map
+        self._offsets = LammpsDumpReader._index_frames(self.fname)
+
+    def get_nframes(self) -> int:
+        """Get the number of frames in the dump file."""
+        return len(self._offsets) - 1
+
+    def __len__(self) -> int:
+        return self.get_nframes()
+
+    def read_frames(
+            self,
+            idx : List[int],
+    ) -> dpdata.System :
+        """Decode the frames of the dump file.
+
+        Parameters
+        ----------
+        idx : List[int]
+            The indexes of the frames to decode.
+
+        Returns
+        -------
+        system : dpdata.System
+            The decoded frames, ordered as in `idx`. If `idx` is empty, a
+            system with zero frames is returned.
+
+        """
+        idx = np.array(idx, dtype=int).reshape([-1])
+        nframes = self.get_nframes()
+        if nframes == 0:
+            raise RuntimeError(f'no frame is found in the dump file {self.fname}')
+        if np.any(idx < 0) or np.any(idx >= nframes):
+            raise RuntimeError(
+                f'frame index out of range [0, {nframes}) in dump file {self.fname}')
+        # the first frame is decoded to get the atom info of an empty system
+        read_idx = idx if len(idx) > 0 else np.array([0])
+        lines = []
+        with open(self.fname, 'rb') as fp:
+            for ii in read_idx:
+                fp.seek(self._offsets[ii])
+                block = fp.read(self._offsets[ii+1] - self._offsets[ii])
+                lines += [ll for ll in block.decode().splitlines() if ll.strip()]
+        data = dpdata.lammps.dump.system_data(lines, self.type_map)
+        ss = dpdata.System(data=data)
+        if len(idx) == 0:
+            ss = ss.sub_system([])
+        return ss
+
+    @staticmethod
+    def _index_frames(
+            fname : Path,
+    ) -> List[int] :
+        mark = LammpsDumpReader.frame_mark
+        offsets = []
+        with open(fname, 'rb') as fp:
+            size = os.fstat(fp.fileno()).st_size
+            if size > 0:
+                with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    pos = mm.find(mark)
+                    while pos >= 0:
+                        offsets.append(pos)
+                        pos = mm.find(mark, pos + len(mark))
+        offsets.append(size)
+        return offsets
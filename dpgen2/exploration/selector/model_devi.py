@@ -0,0 +1,130 @@
+import os
+import numpy as np
+from pathlib import Path
+from typing import (
+    Tuple,
+)
+
+# the columns of the model deviation file written by LAMMPS
+# frame_id  md_v_max md_v_min md_v_mean  md_f_max md_f_min md_f_mean
+model_devi_col_v = 1
+model_devi_col_f = 4
+model_devi_cache_suffix = '.fv.npy'
+
+
+def dump_model_devi_npy(
+        fname : Path,
+        out : Path,
+) -> Path:
+    """Convert a text model deviation file to the binary format.
+
+    The binary format is a numpy `.npy` file storing the same columns
+    as the text file. It can be loaded by `load_model_devi` without
+    parsing text.
+
+    Parameters
+    ----------
+    fname : Path
+        The text model deviation file written by LAMMPS.
+    out : Path
+        The output binary file.
+
+    Returns
+    -------
+    out : Path
+        The output binary file.
+
+    """
+    out = Path(out)
+    np.save(out, np.loadtxt(fname, ndmin=2), allow_pickle=False)
+    # np.save appends .npy if the suffix is missing
+    return out if out.suffix == '.npy' else Path(str(out) + '.npy')
+
+
+def load_model_devi(
+        fname : Path,
+        cache : bool = True,
+) -> Tuple[np.array, np.array] :
+    """Load the max force and virial model deviations.
+
+    The format of the file is detected automatically. A binary file
+    written by `dump_model_devi_npy` is loaded directly. For a text
+    file, the binary file with the same stem and suffix `.npy` next to
+    it (e.g. `model_devi.npy` written by `RunLmp` next to
+    `model_devi.out`) is loaded instead, if it is not older than the
+    text file. Otherwise only the needed columns of the text file are
+    parsed, and if `cache` is true the result is cached in a sidecar
+    file (suffix `.fv.npy`) next to the text file. The cache is used as
+    long as it is not older than the text file.
+
+    Parameters
+    ----------
+    fname : Path
+        The model deviation file.
+    cache : bool
+        Read and write the sidecar cache of a text file.
+
+    Returns
+    -------
+    mdf : numpy.array
+        The max force model deviation of each frame.
+    mdv : numpy.array
+        The max virial model deviation of each frame.
+
+    """
+    fname = Path(fname)
+    if _is_npy(fname):
+        return _load_npy(fname)
+    npy_file = fname.with_suffix('.npy')
+    if _is_fresh(npy_file, fname) and _is_npy(npy_file):
+        return _load_npy(npy_file)
+    cache_file = Path(str(fname) + model_devi_cache_suffix)
+    if cache and _is_fresh(cache_file, fname):
+        dd = np.load(cache_file, allow_pickle=False)
+    else:
+        dd = np.loadtxt(
+            fname, ndmin=2,
+            usecols=(model_devi_col_f, model_devi_col_v),
+        )
+        if cache:
+            _write_cache(cache_file, dd)
+    return dd[:,0], dd[:,1]
+
+
+def _load_npy(
+        fname : Path,
+) -> Tuple[np.array, np.array] :
+    dd = np.load(fname, allow_pickle=False)
+    dd = dd.reshape([1, -1]) if dd.ndim == 1 else dd
+    return dd[:,model_devi_col_f], dd[:,model_devi_col_v]
+
+
+def _is_fresh(
+        derived : Path,
+        fname : Path,
+) -> bool :
+    # the file derived from fname exists and is not older than fname
+    return derived.is_file() and \
+        os.stat(derived).st_mtime_ns >= os.stat(fname).st_mtime_ns
+
+
+def _is_npy(
+        fname : Path,
+) -> bool :
+    with open(fname, 'rb') as fp:
+        return fp.read(len(np.lib.format.MAGIC_PREFIX)) == np.lib.format.MAGIC_PREFIX
+
+
+def _write_cache(
+        cache_file : Path,
+        dd : np.array,
+):
+    # the input artifact may be read-only, the cache is then skipped
+    tmp_file = cache_file.with_name(cache_file.name + '.tmp')
+    try:
+        with open(tmp_file, 'wb') as fp:
+            np.save(fp, dd, allow_pickle=False)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        if tmp_file.is_file():
+            tmp_file.unlink()
@@ -1,6 +1,7 @@
 from .task import (
     ExplorationTask,
     ExplorationTaskGroup,
+    TaskFileTemplate,
 )
 from .npt_task_group import (
     NPTTaskGroup,
@@ -8,3 +9,8 @@ from .npt_task_group import (
 from .stage import (
     ExplorationStage,
 )
+from .task_group_store import (
+    dump_task_group,
+    load_task_group_index,
+    render_task_file,
+)
@@ -1 +1 @@
-from .lmp_input import make_lmp_input
+from .lmp_input import make_lmp_input, LmpInputTemplate
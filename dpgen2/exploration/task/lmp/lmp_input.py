@@ -40,6 +40,146 @@ def make_lmp_input(
         deepmd_version = '2.0', 
         trj_seperate_files = True,
 ) :
+    if pka_e is None:
+        return LmpInputTemplate(
+            conf_file, ensemble, graphs, nsteps, dt, neidelay, trj_freq, mass_map,
+            tau_t = tau_t,
+            has_pres = pres is not None,
+            tau_p = tau_p,
+            use_clusters = use_clusters,
+            relative_f_epsilon = relative_f_epsilon,
+            relative_v_epsilon = relative_v_epsilon,
+            ele_temp_f = ele_temp_f,
+            ele_temp_a = ele_temp_a,
+            nopbc = nopbc,
+            deepmd_version = deepmd_version,
+            trj_seperate_files = trj_seperate_files,
+        ).render(temp, pres, max_seed)
+    # the initial velocity of the primary knock-on atom depends on the conf
+    sys = dpdata.System(conf_file, fmt = 'lammps/lmp')
+    sys_data = sys.data
+    pka_mass = mass_map[sys_data['atom_types'][0] - 1]
+    pka_vn = pka_e * pc.electron_volt / \
+             (0.5 * pka_mass * 1e-3 / pc.Avogadro * (pc.angstrom / pc.pico) ** 2)
+    pka_vn = np.sqrt(pka_vn)
+    print(pka_vn)
+    pka_vec = _sample_sphere()
+    pka_vec *= pka_vn
+    velocity = 'group           first id 1\n'
+    velocity+= 'if \"${restart} == 0\" then \"velocity        first set %f %f %f\"\n' % (pka_vec[0], pka_vec[1], pka_vec[2])
+    velocity+= 'fix	       2 all momentum 1 linear 1 1 1\n'
+    return _make_lmp_input_text(
+        conf_file, ensemble, graphs, nsteps, dt, neidelay, trj_freq, mass_map,
+        "%f" % temp, tau_t, "%f" % pres if pres is not None else None, tau_p,
+        use_clusters, relative_f_epsilon, relative_v_epsilon,
+        ele_temp_f, ele_temp_a, nopbc, velocity, deepmd_version, trj_seperate_files,
+    )
+
+
+class LmpInputTemplate():
+    """The LAMMPS input with the temperature, the pressure and the
+    velocity seed left as variables.
+
+    The input text is built once, and `render` only substitutes the
+    variables, so a template can be rendered for many tasks. The
+    primary knock-on atom (`pka_e` of `make_lmp_input`) is not supported
+    by the template because its velocity depends on the configuration.
+
+    Parameters
+    ----------
+    has_pres : bool
+        If the pressure is set. It should be `True` for the npt ensembles.
+
+    See `make_lmp_input` for the other parameters.
+
+    """
+    def __init__(
+            self,
+            conf_file : str,
+            ensemble : str,
+            graphs : List[str],
+            nsteps : int,
+            dt : float,
+            neidelay : int,
+            trj_freq : int,
+            mass_map : List[float],
+            tau_t : float = 0.1,
+            has_pres : bool = False,
+            tau_p : float = 0.5,
+            use_clusters : bool = False,        
+            relative_f_epsilon : float = None,
+            relative_v_epsilon : float = None,
+            ele_temp_f : float = None,
+            ele_temp_a : float = None,
+            nopbc : bool = False,
+            deepmd_version = '2.0', 
+            trj_seperate_files = True,
+    ):
+        self.has_pres = has_pres
+        # the % in the user provided names are escaped
+        self.template = _make_lmp_input_text(
+            conf_file.replace('%', '%%'), ensemble, 
+            [ii.replace('%', '%%') for ii in graphs],
+            nsteps, dt, neidelay, trj_freq, mass_map,
+            "%(temp)f", tau_t, "%(pres)f" if has_pres else None, tau_p,
+            use_clusters, relative_f_epsilon, relative_v_epsilon,
+            ele_temp_f, ele_temp_a, nopbc, 
+            "if \"${restart} == 0\" then \"velocity        all create ${TEMP} %(seed)d\"",
+            deepmd_version, trj_seperate_files,
+        )
+
+    def render(
+            self,
+            temp : float,
+            pres : float = None,
+            max_seed : int = 1000000,
+    ) -> str :
+        """Render the LAMMPS input of the temperature `temp` and the
+        pressure `pres`. The velocity seed is randomly drawn from
+        [1, `max_seed`)."""
+        return self.template % self.make_params(temp, pres, max_seed)
+
+    def make_params(
+            self,
+            temp : float,
+            pres : float = None,
+            max_seed : int = 1000000,
+    ) -> dict :
+        """The variables of the template substituted by `render`, i.e.
+        `template % params` is the rendered input."""
+        if self.has_pres and pres is None:
+            raise RuntimeError('the pressure should be provided by the template')
+        return {
+            'temp' : temp,
+            'pres' : pres,
+            'seed' : random.randrange(max_seed-1)+1,
+        }
+
+
+def _make_lmp_input_text(
+        conf_file : str,
+        ensemble : str,
+        graphs : List[str],
+        nsteps : int,
+        dt : float,
+        neidelay : int,
+        trj_freq : int,
+        mass_map : List[float],
+        temp : str,
+        tau_t : float,
+        pres : str,
+        tau_p : float,
+        use_clusters : bool,
+        relative_f_epsilon : float,
+        relative_v_epsilon : float,
+        ele_temp_f : float,
+        ele_temp_a : float,
+        nopbc : bool,
+        velocity : str,
+        deepmd_version, 
+        trj_seperate_files,
+) -> str :
+    # temp, pres and velocity are the text inserted to the input
     if (ele_temp_f is not None or ele_temp_a is not None) and LooseVersion(deepmd_version) < LooseVersion('1'):
         raise RuntimeError('the electron temperature is only supported by deepmd-kit >= 1.0.0, please upgrade your deepmd-kit')
     if ele_temp_f is not None and ele_temp_a is not None:
@@ -49,13 +189,13 @@ def make_lmp_input(
     ret = "variable        NSTEPS          equal %d\n" % nsteps
     ret+= "variable        THERMO_FREQ     equal %d\n" % trj_freq
     ret+= "variable        DUMP_FREQ       equal %d\n" % trj_freq
-    ret+= "variable        TEMP            equal %f\n" % temp
+    ret+= "variable        TEMP            equal %s\n" % temp
     if ele_temp_f is not None:
         ret+= "variable        ELE_TEMP        equal %f\n" % ele_temp_f
     if ele_temp_a is not None:
         ret+= "variable        ELE_TEMP        equal %f\n" % ele_temp_a
     if pres is not None:
-        ret+= "variable        PRES            equal %f\n" % pres
+        ret+= "variable        PRES            equal %s\n" % pres
     ret+= "variable        TAU_T           equal %f\n" % tau_t
     if pres is not None:
         ret+= "variable        TAU_P           equal %f\n" % tau_p
@@ -106,21 +246,7 @@ def make_lmp_input(
         ret+= "dump            1 all custom ${DUMP_FREQ} dump.traj id type x y z fx fy fz\n"
     ret+= "restart         10000 dpgen.restart\n"
     ret+= "\n"
-    if pka_e is None :
-        ret+= "if \"${restart} == 0\" then \"velocity        all create ${TEMP} %d\"" % (random.randrange(max_seed-1)+1)
-    else :
-        sys = dpdata.System(conf_file, fmt = 'lammps/lmp')
-        sys_data = sys.data
-        pka_mass = mass_map[sys_data['atom_types'][0] - 1]
-        pka_vn = pka_e * pc.electron_volt / \
-                 (0.5 * pka_mass * 1e-3 / pc.Avogadro * (pc.angstrom / pc.pico) ** 2)
-        pka_vn = np.sqrt(pka_vn)
-        print(pka_vn)
-        pka_vec = _sample_sphere()
-        pka_vec *= pka_vn
-        ret+= 'group           first id 1\n'
-        ret+= 'if \"${restart} == 0\" then \"velocity        first set %f %f %f\"\n' % (pka_vec[0], pka_vec[1], pka_vec[2])
-        ret+= 'fix	       2 all momentum 1 linear 1 1 1\n'
+    ret+= velocity
     ret+= "\n"
     if ensemble.split('-')[0] == 'npt' :
         assert (pres is not None)
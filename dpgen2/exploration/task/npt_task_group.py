@@ -6,7 +6,7 @@ from . import (
     ExplorationTask,
     ExplorationTaskGroup,
 )
-from .lmp import make_lmp_input
+from .lmp import make_lmp_input, LmpInputTemplate
 from dpgen2.constants import (
     lmp_conf_name, 
     lmp_input_name,
@@ -93,6 +93,8 @@ class NPTTaskGroup(ExplorationTaskGroup):
         self.relative_v_epsilon = relative_v_epsilon
         self.ele_temp_f = ele_temp_f
         self.ele_temp_a = ele_temp_a
+        # the compiled LAMMPS input templates, reused by make_task
+        self.lmp_templates = {}
         self.md_set = True
 
     def make_task(
@@ -140,34 +142,68 @@ class NPTTaskGroup(ExplorationTaskGroup):
             pp : float,
     ) -> ExplorationTask:
         task = ExplorationTask()
-        task\
-            .add_file(
-                lmp_conf_name, 
-                conf,
-            )\
-            .add_file(
+        task.add_file(lmp_conf_name, conf)
+        if self.pka_e is None:
+            # the tasks share the template, each keeps its temperature, 
+            # pressure and velocity seed
+            template = self._get_lmp_template(pp is not None)
+            return task.add_file_template(
                 lmp_input_name,
-                make_lmp_input(
-                    lmp_conf_name,
-                    self.ens,
-                    self.graphs,
-                    self.nsteps,
-                    self.dt,
-                    self.neidelay,
-                    self.trj_freq,
-                    self.mass_map,
-                    tt,
-                    self.tau_t,
-                    pp,
-                    self.tau_p,
-                    self.use_clusters,
-                    self.relative_f_epsilon,
-                    self.relative_v_epsilon,
-                    self.pka_e,
-                    self.ele_temp_f,
-                    self.ele_temp_a,
-                    self.no_pbc,
-                )
+                template.template,
+                template.make_params(tt, pp),
+            )
+        else:
+            lmp_input = make_lmp_input(
+                lmp_conf_name,
+                self.ens,
+                self.graphs,
+                self.nsteps,
+                self.dt,
+                self.neidelay,
+                self.trj_freq,
+                self.mass_map,
+                tt,
+                self.tau_t,
+                pp,
+                self.tau_p,
+                self.use_clusters,
+                self.relative_f_epsilon,
+                self.relative_v_epsilon,
+                self.pka_e,
+                self.ele_temp_f,
+                self.ele_temp_a,
+                self.no_pbc,
+            )
+            return task.add_file(
+                lmp_input_name,
+                lmp_input,
             )
-        return task
 
+    def _get_lmp_template(
+            self,
+            has_pres : bool,
+    ) -> LmpInputTemplate:
+        # the key is a str, the keys of other types become str after
+        # the jsonpickle round trip of the scheduler between iterations
+        key = 'pres' if has_pres else 'nopres'
+        if key not in self.lmp_templates:
+            self.lmp_templates[key] = LmpInputTemplate(
+                lmp_conf_name,
+                self.ens,
+                self.graphs,
+                self.nsteps,
+                self.dt,
+                self.neidelay,
+                self.trj_freq,
+                self.mass_map,
+                tau_t = self.tau_t,
+                has_pres = has_pres,
+                tau_p = self.tau_p,
+                use_clusters = self.use_clusters,
+                relative_f_epsilon = self.relative_f_epsilon,
+                relative_v_epsilon = self.relative_v_epsilon,
+                ele_temp_f = self.ele_temp_f,
+                ele_temp_a = self.ele_temp_a,
+                nopbc = self.no_pbc,
+            )
+        return self.lmp_templates[key]
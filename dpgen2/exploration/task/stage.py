@@ -20,6 +20,13 @@ class ExplorationStage():
     """
     The exploration stage.
 
+    Attributes
+    ----------
+    task_group_ids: List[int]
+        The index of the exploration group of each task of the task 
+        group last made by `make_task`, in the order of the tasks. `None`
+        if no task group is made.
+
     """
 
     def __init__(self):
@@ -31,6 +38,7 @@ class ExplorationStage():
 
         """
         self.explor_groups = []
+        self.task_group_ids = None
 
     def add_task_group(
             self,
@@ -64,9 +72,12 @@ class ExplorationStage():
         """
 
         lmp_task_grp = ExplorationTaskGroup()
-        for ii in self.explor_groups:
+        self.task_group_ids = []
+        for idx, ii in enumerate(self.explor_groups):
             # lmp_task_grp.add_group(ii.make_task())
-            lmp_task_grp += ii.make_task()
+            grp = ii.make_task()
+            lmp_task_grp += grp
+            self.task_group_ids += [idx] * len(grp)
         return lmp_task_grp
 
 
@@ -12,6 +12,36 @@ from typing import (
     Dict,
 )
 
+class TaskFileTemplate():
+    """The content of a task file rendered from a template, as
+    `template % params`.
+
+    The tasks sharing a template keep a reference to it and their own
+    small `params`, e.g. the temperature, the pressure and the random
+    seed of a LAMMPS input. `dump_task_group` stores the template once.
+
+    Parameters
+    ----------
+    template : str
+        The template.
+    params : dict
+        The parameters substituted to the template. They should be
+        JSON serializable.
+
+    """
+    def __init__(
+            self,
+            template : str,
+            params : Dict,
+    ):
+        self.template = template
+        self.params = dict(params)
+
+    def render(self) -> str:
+        """The rendered content."""
+        return self.template % self.params
+
+
 class ExplorationTask():
     """Define the files needed by an exploration task. 
 
@@ -47,6 +77,27 @@ class ExplorationTask():
         self._files[fname] = fcont
         return self
 
+    def add_file_template(
+            self,
+            fname : str,
+            template : str,
+            params : Dict,
+    ):
+        """Add file rendered from a template to the task
+        
+        Parameters
+        ----------
+        fname : str
+            The name of the file
+        template : str
+            The template of the file content, see `TaskFileTemplate`.
+        params : dict
+            The parameters of the template.
+
+        """
+        self._files[fname] = TaskFileTemplate(template, params)
+        return self
+
     def files(self) -> Dict:
         """Get all files for the task.
         
@@ -55,6 +106,14 @@ class ExplorationTask():
         files : dict
             The dict storing all files for the task. The file name is a key of the dict, and the file content is the corresponding value.
         """
+        return {
+            fname : fcont.render() if isinstance(fcont, TaskFileTemplate) else fcont
+            for fname, fcont in self._files.items()
+        }
+
+    def file_entries(self) -> Dict:
+        """Get all files for the task, the files added by `add_file_template`
+        are given as `TaskFileTemplate` and are not rendered."""
         return self._files
 
 
@@ -0,0 +1,120 @@
+import json, hashlib
+from pathlib import Path
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Union,
+)
+from .task import (
+    ExplorationTaskGroup,
+    TaskFileTemplate,
+)
+
+task_group_index_name = 'index.json'
+task_group_blob_dir = 'blobs'
+task_group_format_version = 2
+
+
+def content_hash(
+        fcont : str,
+) -> str :
+    """The sha256 hex digest of a file content."""
+    return hashlib.sha256(fcont.encode('utf-8')).hexdigest()
+
+
+def dump_task_group(
+        task_grp : Optional[ExplorationTaskGroup],
+        path : Path,
+) -> Path :
+    """Dump a task group to a directory.
+
+    Each unique file content, and each unique template of the files
+    added by `ExplorationTask.add_file_template`, is stored once in
+    `blobs/`, named by its sha256 hash. The tasks are stored in
+    `index.json` as a table. For each task it maps the file names to
+    the hashes of the contents, or, for a templated file, to a dict with
+    the hash of the template (key `template`) and the parameters of the
+    task (key `params`). Thus the LAMMPS inputs that differ only by the
+    temperature, the pressure and the velocity seed share one blob.
+
+    Parameters
+    ----------
+    task_grp : ExplorationTaskGroup
+        The task group. `None` is dumped as an empty group.
+    path : Path
+        The output directory.
+
+    Returns
+    -------
+    path : Path
+        The output directory.
+
+    """
+    path = Path(path)
+    blob_path = path / task_group_blob_dir
+    blob_path.mkdir(exist_ok=True, parents=True)
+    # content -> hash, the tasks usually share the content objects
+    hashes = {}
+
+    def add_blob(fcont):
+        if fcont not in hashes:
+            hh = content_hash(fcont)
+            (blob_path / hh).write_text(fcont)
+            hashes[fcont] = hh
+        return hashes[fcont]
+
+    tasks = []
+    for tt in (task_grp if task_grp is not None else []):
+        record = {}
+        for fname, fcont in tt.file_entries().items():
+            if isinstance(fcont, TaskFileTemplate):
+                record[fname] = {
+                    'template' : add_blob(fcont.template),
+                    'params' : fcont.params,
+                }
+            else:
+                record[fname] = add_blob(fcont)
+        tasks.append(record)
+    index = {
+        'version' : task_group_format_version,
+        'tasks' : tasks,
+    }
+    (path / task_group_index_name).write_text(json.dumps(index))
+    return path
+
+
+def load_task_group_index(
+        path : Path,
+) -> List[Dict[str, Union[str, Dict]]] :
+    """Load the table of tasks of a task group dumped by `dump_task_group`.
+
+    Returns
+    -------
+    tasks : List[Dict[str, Union[str, Dict]]]
+        The file names of each task mapped to the hashes of the contents,
+        or to the hash of the template and the parameters of a templated
+        file (see `dump_task_group` and `render_task_file`). The content
+        is stored in `path/blobs/<hash>`.
+
+    """
+    index = json.loads((Path(path) / task_group_index_name).read_text())
+    if index.get('version') != task_group_format_version:
+        raise RuntimeError(f'unsupported task group format version {index.get("version")}')
+    return index['tasks']
+
+
+def render_task_file(
+        template : str,
+        params : Dict,
+) -> str :
+    """Render the content of a templated file from the template and the
+    parameters recorded by `dump_task_group`."""
+    return TaskFileTemplate(template, params).render()
+
+
+def is_task_group_dir(
+        path : Path,
+) -> bool :
+    """If `path` is a task group dumped by `dump_task_group`."""
+    return (Path(path) / task_group_index_name).is_file()
@@ -30,7 +30,7 @@ from typing import (
 from pathlib import Path
 from dpgen2.exploration.scheduler import ExplorationScheduler
 from dpgen2.exploration.report import ExplorationReport
-from dpgen2.exploration.task import ExplorationTaskGroup
+from dpgen2.exploration.task import ExplorationTaskGroup, dump_task_group
 from dpgen2.exploration.selector import ConfSelector
 from dpgen2.superop.block import ConcurrentLearningBlock
 
@@ -64,14 +64,13 @@ class SchedulerWrapper(OP):
 
         conv, lmp_task_grp, selector = scheduler.plan_next_iteration(report, trajs)
 
-        with open('lmp_task_grp.dat', 'wb') as fp:
-            pickle.dump(lmp_task_grp, fp)
+        lmp_task_grp_path = dump_task_group(lmp_task_grp, Path('lmp_task_grp'))
 
         return OPIO({
             "exploration_scheduler" : scheduler,
             "converged" : conv,
             "conf_selector" : selector,
-            "lmp_task_grp" : Path('lmp_task_grp.dat'),
+            "lmp_task_grp" : lmp_task_grp_path,
         })
 
 
@@ -0,0 +1,103 @@
+import re
+import numpy as np
+from pathlib import Path
+from typing import (
+    Dict,
+    Optional,
+    Union,
+)
+
+# kB * Angstrom^3 to eV, the same as dpdata
+_virial_pref = 1e3 / 1.602176621e6
+_energy_token = 'free  energy   TOTEN'
+_force_token = 'TOTAL-FORCE'
+_cell_token = 'direct lattice vectors'
+_stress_token = 'FORCE on cell =-STRESS'
+_iteration_re = re.compile(r'Iteration\s*(\d+)\s*\(\s*(\d+)\)')
+_nelm_re = re.compile(r'NELM\s*=\s*(\d+)')
+
+
+def read_outcar_last_frame(
+        fname : Union[str, Path],
+) -> Optional[Dict] :
+    """Read the final ionic step of an OUTCAR.
+
+    The file is read line by line, and only the quantities of the
+    current and the last finished ionic steps are kept, so the memory
+    does not depend on the length of the OUTCAR. The quantities are
+    parsed in the same way as the `vasp/outcar` format of `dpdata`.
+
+    Parameters
+    ----------
+    fname : Path
+        The OUTCAR file.
+
+    Returns
+    -------
+    frame : dict
+        The final ionic step with keys `atom_numbs` (list of int),
+        `cells` (3 x 3), `coords` (natoms x 3), `energies` (float),
+        `forces` (natoms x 3), `virials` (3 x 3, in eV, `None` if the
+        stress is not printed), and `converged` (if the SCF of the step
+        converged in NELM iterations). `None` if no ionic step is
+        finished.
+
+    """
+    atom_numbs = None
+    nelm = None
+    last = None
+    # the current ionic step
+    cell = None
+    coord = force = None
+    virial = None
+    scf_index = 0
+    with open(fname) as fp:
+        for line in fp:
+            if nelm is None:
+                mm = _nelm_re.search(line)
+                if mm:
+                    nelm = int(mm.group(1))
+            if atom_numbs is None and 'ions per type' in line:
+                atom_numbs = [int(ss) for ss in line.split()[4:]]
+            if 'Iteration' in line:
+                mm = _iteration_re.search(line)
+                if mm:
+                    scf_index = int(mm.group(2))
+            elif _energy_token in line:
+                if coord is None or cell is None:
+                    raise RuntimeError(f'cannot find the forces or the cell before the energy in {fname}')
+                last = {
+                    'atom_numbs' : atom_numbs,
+                    'cells' : cell,
+                    'coords' : coord,
+                    'energies' : float(line.split()[4]),
+                    'forces' : force,
+                    'virials' : None if virial is None else \
+                        virial * _virial_pref * np.linalg.det(cell),
+                    'converged' : nelm is None or scf_index < nelm,
+                }
+                coord = force = virial = None
+            elif _cell_token in line:
+                cell = np.array([
+                    [float(ss) for ss in next(fp).replace('-', ' -').split()[0:3]]
+                    for _ in range(3)])
+            elif _stress_token in line:
+                for sline in fp:
+                    if sline.strip().startswith('in kB'):
+                        break
+                vv = [float(ss) for ss in sline.split()[2:8]]
+                virial = np.array([
+                    [vv[0], vv[3], vv[5]],
+                    [vv[3], vv[1], vv[4]],
+                    [vv[5], vv[4], vv[2]],
+                ])
+            elif _force_token in line and 'ML' not in line:
+                if atom_numbs is None:
+                    raise RuntimeError(f'cannot find the number of ions per type in {fname}')
+                next(fp)
+                data = np.array([
+                    [float(ss) for ss in next(fp).split()[0:6]]
+                    for _ in range(sum(atom_numbs))])
+                coord = data[:, 0:3]
+                force = data[:, 3:6]
+    return last
@@ -1,4 +1,4 @@
-from typing import Dict
+from typing import Dict, List
 
 class VaspInputs():
     def __init__(
@@ -21,6 +21,20 @@ class VaspInputs():
             self, 
             poscar : str,
     ) -> str:
-        raise NotImplementedError
+        """Make the POTCAR of a POSCAR (VASP 5 format). The POTCARs of the
+        elements are concatenated in the order of the elements in the
+        POSCAR."""
+        atom_names = poscar.split('\n')[5].split()
+        return self.make_potcar_by_atom_names(atom_names)
 
-    
+    def make_potcar_by_atom_names(
+            self,
+            atom_names : List[str],
+    ) -> str:
+        """Make the POTCAR by concatenating the POTCARs of `atom_names`."""
+        potcar_contents = []
+        for nn in atom_names:
+            if nn not in self._potcars:
+                raise RuntimeError(f'no POTCAR is provided for element {nn}')
+            potcar_contents.append(self._potcars[nn])
+        return "".join(potcar_contents)
@@ -4,9 +4,14 @@ from dflow.python import (
     OPIOSign,
     Artifact
 )
-import os, json
+import os, json, dpdata
 from typing import Tuple, List, Set
 from pathlib import Path
+from dpgen2.constants import (
+    data_provenance_name,
+)
+from dpgen2.utils.multi_sys_writer import MultiSystemsWriter
+from dpgen2.utils.data_index import make_data_index
 
 class CollectData(OP):
     """Collect labeled data and add to the iteration dataset.
@@ -17,7 +22,19 @@ class CollectData(OP):
     this iteration will be place in `ip["name"]` subdirectory of the
     iteration data directory.
 
+    The labeled frames of the same formula are merged into one system,
+    written in `set.*` directories of at most `set_size` frames. The
+    source (the name of the labeled data) of each frame is recorded in
+    the sidecar file `data_provenance_name` of the data directory, in
+    the order of the frames of each system.
+
+    The index of the frame numbers of the systems (see
+    `dpgen2.utils.data_index`) is written to the data directory, so
+    the size of the data is known without loading the data.
+
     """
+    # the number of frames in each set.* directory of the merged systems
+    set_size = 5000
 
     @classmethod
     def get_input_sign(cls):
@@ -56,5 +73,34 @@ class CollectData(OP):
             - `iter_data`: (`Artifact(List[Path])`) The paths of iteration data, added with labeled data generated by this iteration.
         
         """
-        raise NotImplementedError
+        name = Path(ip['name'])
+        labeled_data = ip['labeled_data']
+        iter_data = ip['iter_data']
+
+        # merge the labeled data
+        with MultiSystemsWriter(name, set_size=self.set_size) as writer:
+            for ii in labeled_data:
+                for source, ss in _load_labeled_systems(ii):
+                    writer.append(ss, source)
+        provenance = {
+            'version' : 1,
+            'systems' : {ff : writer.sources(ff) for ff in writer.formulas},
+        }
+        (name / data_provenance_name).write_text(json.dumps(provenance, indent=2))
+        make_data_index(name)
+
+        return OPIO({
+            "iter_data" : list(iter_data) + [name],
+        })
+
 
+def _load_labeled_systems(path):
+    # the labeled data is a deepmd/npy system or a directory of systems
+    path = Path(path)
+    if (path / 'type.raw').is_file():
+        sys_paths = [path]
+    else:
+        sys_paths = [ii.parent for ii in sorted(path.glob('*/type.raw'), key=str)]
+    for ii in sys_paths:
+        source = str(ii.relative_to(path.parent))
+        yield source, dpdata.LabeledSystem(str(ii), fmt='deepmd/npy')
@@ -8,10 +8,23 @@ from dflow.python import (
 import json, pickle
 from typing import Tuple, List
 from pathlib import Path
-from dpgen2.exploration.task import ExplorationTaskGroup
+from dpgen2.exploration.task import (
+    ExplorationTaskGroup,
+    load_task_group_index,
+    render_task_file,
+)
+from dpgen2.exploration.task.task_group_store import (
+    task_group_blob_dir,
+)
 from dpgen2.constants import (
     lmp_task_pattern,
 )
+from dpgen2.utils.blob_store import (
+    BlobStore,
+    link_file,
+)
+
+lmp_blob_store_name = 'lmp_blobs'
 
 class PrepLmp(OP):
     r"""Prepare the working directories for LAMMPS tasks.
@@ -22,6 +35,11 @@ class PrepLmp(OP):
     `op["task_paths"]`. The identities of the tasks are returned as
     `op["task_names"]`.
 
+    Each unique file content is written once to a content-addressed
+    store, and hard linked (copied if linking fails) into the task
+    directories. The templated files of a task group directory are
+    rendered from the shared template and the parameters of each task.
+
     """
 
     @classmethod
@@ -48,7 +66,7 @@ class PrepLmp(OP):
         ----------
         ip : dict
             Input dict with components:
-            - `lmp_task_grp` : (`Artifact(Path)`) Can be pickle loaded as a ExplorationTaskGroup. Definitions for LAMMPS tasks
+            - `lmp_task_grp` : (`Artifact(Path)`) Definitions for LAMMPS tasks. A directory written by `dump_task_group`, or a file that can be pickle loaded as a ExplorationTaskGroup.
         
         Returns
         -------
@@ -59,15 +77,38 @@ class PrepLmp(OP):
             - `task_paths`: (`Artifact(List[Path])`) The parepared working paths of the tasks. Contains all input files needed to start the LAMMPS simulation. The order fo the Paths should be consistent with `op["task_names"]`
         """
 
-        with open(ip['lmp_task_grp'], 'rb') as fp:
-            lmp_task_grp = pickle.load(fp)
-        cc = 0
-        task_paths = []
-        for tt in lmp_task_grp:
-            ff = tt.files()
-            tname = _mk_task_from_files(cc, ff)
-            task_paths.append(tname)
-            cc += 1
+        store = BlobStore(lmp_blob_store_name)
+        grp_path = Path(ip['lmp_task_grp'])
+        if grp_path.is_dir():
+            # the contents are stored by hash in the task group
+            grp_blobs = grp_path / task_group_blob_dir
+            templates = {}
+            task_blobs = []
+            for record in load_task_group_index(grp_path):
+                blobs = {}
+                for fname, entry in record.items():
+                    if isinstance(entry, dict):
+                        hh = entry['template']
+                        if hh not in templates:
+                            templates[hh] = (grp_blobs / hh).read_text()
+                        blobs[fname] = store.add_text(
+                            render_task_file(templates[hh], entry['params']))
+                    else:
+                        blobs[fname] = store.add_file(grp_blobs / entry, entry)
+                task_blobs.append(blobs)
+        else:
+            with open(grp_path, 'rb') as fp:
+                lmp_task_grp = pickle.load(fp)
+            task_blobs = [
+                { fname : store.add_text(fcont) for fname, fcont in tt.files().items() }
+                for tt in lmp_task_grp
+            ]
+        task_paths = [Path(lmp_task_pattern % cc) for cc in range(len(task_blobs))]
+        for tname in task_paths:
+            tname.mkdir(exist_ok=True, parents=True)
+        for tname, blobs in zip(task_paths, task_blobs):
+            for fname, blob in blobs.items():
+                link_file(blob, tname / fname)
         task_names = [str(ii) for ii in task_paths]
         return OPIO({
             'task_names' : task_names,
@@ -75,13 +116,3 @@ class PrepLmp(OP):
         })
 
 PrepExplorationTaskGroup = PrepLmp
-
-def _mk_task_from_files(cc, ff):
-    tname = Path(lmp_task_pattern % cc)
-    tname.mkdir(exist_ok=True, parents=True)
-    for nn in ff.keys():
-        (tname/nn).write_text(ff[nn])
-    return tname
-
-
-        
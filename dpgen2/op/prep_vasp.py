@@ -4,10 +4,23 @@ from dflow.python import (
     OPIOSign,
     Artifact
 )
-import os, json
+import os, json, dpdata
+import numpy as np
 from typing import Tuple, List, Set, Dict
 from pathlib import Path
 from dpgen2.fp.vasp import VaspInputs
+from dpgen2.constants import (
+    vasp_task_pattern,
+    vasp_conf_name,
+    vasp_input_name,
+    vasp_pot_name,
+)
+from dpgen2.utils.blob_store import (
+    BlobStore,
+    link_file,
+)
+
+vasp_blob_store_name = 'vasp_blobs'
 
 class PrepVasp(OP):
     r"""Prepares the working directories for VASP tasks.
@@ -18,6 +31,11 @@ class PrepVasp(OP):
     `op["task_paths"]`. The identities of the tasks are returned as
     `op["task_names"]`.
 
+    The configurations are read as `dpdata.MultiSystems`, each frame
+    makes a task. The INCAR is shared by all the tasks, and the POTCAR
+    is made once for each ordering of the elements. They are linked to
+    the task directories from a content-addressed store.
+
     """
 
     @classmethod
@@ -57,4 +75,67 @@ class PrepVasp(OP):
             - `task_names`: (`List[str]`) The name of tasks. Will be used as the identities of the tasks. The names of different tasks are different.
             - `task_paths`: (`Artifact(List[Path])`) The parepared working paths of the tasks. Contains all input files needed to start the VASP. The order fo the Paths should be consistent with `op["task_names"]`
         """
-        raise NotImplementedError
+        vasp_inputs = ip['inputs']
+        store = BlobStore(vasp_blob_store_name)
+        incar_blob = store.add_text(vasp_inputs.incar_temp)
+        potcar_blobs = {}
+
+        task_paths = []
+        for conf in ip['confs']:
+            for ss in _load_confs(conf):
+                atom_names = tuple(nn for nn, cc in zip(ss['atom_names'], ss['atom_numbs']) if cc > 0)
+                if atom_names not in potcar_blobs:
+                    potcar_blobs[atom_names] = store.add_text(
+                        vasp_inputs.make_potcar_by_atom_names(atom_names))
+                for poscar in make_poscars(ss):
+                    task_path = Path(vasp_task_pattern % len(task_paths))
+                    task_path.mkdir(exist_ok=True, parents=True)
+                    (task_path / vasp_conf_name).write_text(poscar)
+                    link_file(incar_blob, task_path / vasp_input_name)
+                    link_file(potcar_blobs[atom_names], task_path / vasp_pot_name)
+                    task_paths.append(task_path)
+
+        task_names = [str(ii) for ii in task_paths]
+        return OPIO({
+            'task_names' : task_names,
+            'task_paths' : task_paths,
+        })
+
+
+def _load_confs(conf):
+    # a deepmd/npy system or a directory of systems
+    conf = Path(conf)
+    if (conf / 'type.raw').is_file():
+        return [dpdata.System(str(conf), fmt='deepmd/npy')]
+    ms = dpdata.MultiSystems()
+    ms.from_deepmd_npy(str(conf), labeled=False)
+    return [ms[ii] for ii in range(len(ms))]
+
+
+def make_poscars(
+        system : dpdata.System,
+) -> List[str] :
+    """Make the POSCARs of all the frames of a system.
+
+    The POSCARs are the same as `dpdata.vasp.poscar.from_system_data`,
+    but the parts shared by the frames are formatted only once, and
+    each frame is formatted by one operation.
+
+    """
+    atom_numbs = system['atom_numbs']
+    atom_names = system['atom_names']
+    atom_types = np.array(system['atom_types'])
+    natoms = atom_types.size
+    numbs_names = [(nn, cc) for nn, cc in zip(atom_names, atom_numbs) if cc > 0]
+    title = ''.join(['%s%d ' % (nn, cc) for nn, cc in numbs_names]) + '\n1.0\n'
+    species = ''.join(['%s ' % nn for nn, cc in numbs_names]) + '\n' + \
+        ''.join(['%d ' % cc for nn, cc in numbs_names]) + '\nCartesian\n'
+    cell_fmt = '%.16e %.16e %.16e \n' * 3
+    coord_fmt = '%15.10f %15.10f %15.10f\n' * natoms
+    sort_idx = np.lexsort((np.arange(natoms), atom_types))
+    cells = np.reshape(system['cells'], [-1, 9])
+    coords = np.reshape(system['coords'][:, sort_idx], [-1, natoms * 3])
+    return [
+        title + (cell_fmt % tuple(cc)) + species + (coord_fmt % tuple(xx))
+        for cc, xx in zip(cells, coords)
+    ]
@@ -2,6 +2,11 @@ import os, json, dpdata, glob
 from pathlib import Path
 from dpgen2.utils.run_command import run_command
 from dpgen2.utils.chdir import set_directory
+from dpgen2.utils.data_index import (
+    count_frames,
+    get_data_size,
+    load_data_index,
+)
 from dflow.python import (
     OP,
     OPIO,
@@ -25,6 +30,10 @@ from dargs import (
     ArgumentEncoder,
 )
 
+# the outputs of the commands are written to the log as they arrive,
+# only the last lines are kept in memory
+log_tail_lines = 100
+
 
 class RunDPTrain(OP):
     r"""Execute a DP training task. Train and freeze a DP model. 
@@ -140,18 +149,16 @@ class RunDPTrain(OP):
                 command = ['dp', 'train', '--init-frz-model', str(init_model), train_script_name]
             else:
                 command = ['dp', 'train', train_script_name]
-            ret, out, err = run_command(command)
+            ret, out, err = run_command(command, log=fplog, tail_lines=log_tail_lines)
             if ret != 0:
                 clean_before_quit()
-                raise FatalError('dp train failed')
-            fplog.write(out)
+                raise FatalError('dp train failed\n', 'err msg', err)
 
             # freeze model
-            ret, out, err = run_command(['dp', 'freeze', '-o', 'frozen_model.pb'])
+            ret, out, err = run_command(['dp', 'freeze', '-o', 'frozen_model.pb'], log=fplog, tail_lines=log_tail_lines)
             if ret != 0:
                 clean_before_quit()
-                raise FatalError('dp freeze failed')
-            fplog.write(out)
+                raise FatalError('dp freeze failed\n', 'err msg', err)
 
             clean_before_quit()
         
@@ -276,8 +283,7 @@ class RunDPTrain(OP):
 
 
 def _get_data_size_of_system(data_dir):
-    ss = dpdata.System(data_dir, fmt='deepmd/npy')
-    return ss.get_nframes()
+    return count_frames(data_dir)
 
 def _get_data_size_of_all_systems(data_dirs):
     count = 0
@@ -286,9 +292,7 @@ def _get_data_size_of_all_systems(data_dirs):
     return count
 
 def _get_data_size_of_mult_sys(data_dir):
-    ms = dpdata.MultiSystems()
-    ms.from_deepmd_npy(data_dir)
-    return ms.get_nframes()
+    return get_data_size(data_dir)
 
 def _get_data_size_of_all_mult_sys(data_dirs):
     count = 0
@@ -297,6 +301,10 @@ def _get_data_size_of_all_mult_sys(data_dirs):
     return count
 
 def _expand_multi_sys_to_sys(multi_sys_dir):
+    # the systems are listed by the data index if exists
+    systems = load_data_index(multi_sys_dir)
+    if systems is not None:
+        return [ os.path.join(multi_sys_dir, ii['path']) for ii in systems ]
     all_type_raws = sorted(glob.glob(os.path.join(multi_sys_dir, '*', 'type.raw')))
     all_sys_dirs = [ str(Path(ii).parent) for ii in all_type_raws ]
     return all_sys_dirs
@@ -304,5 +312,5 @@ def _expand_multi_sys_to_sys(multi_sys_dir):
 def _expand_all_multi_sys_to_sys(list_multi_sys):
     all_sys_dirs = []
     for ii in list_multi_sys:
-        all_sys_dirs = all_sys_dirs + _expand_multi_sys_to_sys(ii)
+        all_sys_dirs.extend(_expand_multi_sys_to_sys(ii))
     return all_sys_dirs
@@ -2,11 +2,25 @@ from dflow.python import (
     OP,
     OPIO,
     OPIOSign,
-    Artifact
+    Artifact,
+    TransientError,
 )
 import os, json
-from typing import Tuple, List, Set
+from typing import Tuple, List, Set, Dict
 from pathlib import Path
+from dargs import (
+    Argument,
+)
+from dpgen2.constants import (
+    lmp_input_name,
+    lmp_log_name,
+    lmp_traj_name,
+    lmp_model_devi_name,
+    lmp_model_devi_npy_name,
+)
+from dpgen2.exploration.selector.model_devi import dump_model_devi_npy
+from dpgen2.utils.run_command import run_command
+from dpgen2.utils.chdir import set_directory
 
 class RunLmp(OP):
     r"""Execute a LAMMPS task.
@@ -15,7 +29,10 @@ class RunLmp(OP):
     are copied or symbol linked to directory `task_name`. The LAMMPS
     command is exectuted from directory `task_name`. The trajectory
     and the model deviation will be stored in files `op["traj"]` and
-    `op["model_devi"]`, respectively.
+    `op["model_devi"]`, respectively. The model deviation written by
+    LAMMPS is converted to the binary format of `dump_model_devi_npy`,
+    so the selection does not parse the text. The text file is kept
+    next to the binary one in the working directory.
 
     """
 
@@ -48,6 +65,7 @@ class RunLmp(OP):
         ip : dict
             Input dict with components:
         
+            - `config`: (`dict`) The config of the LAMMPS task. Check `RunLmp.lmp_args` for definitions.
             - `task_name`: (`str`) The name of the task.
             - `task_path`: (`Artifact(Path)`) The path that contains all input files prepareed by `PrepLmp`.
             - `models`: (`Artifact(List[Path])`) The frozen model to estimate the model deviation. The first model with be used to drive molecular dynamics simulation.
@@ -58,13 +76,62 @@ class RunLmp(OP):
         
             - `log`: (`Artifact(Path)`) The log file of LAMMPS.
             - `traj`: (`Artifact(Path)`) The output trajectory.
-            - `model_devi`: (`Artifact(Path)`) The model deviation. The order of recorded model deviations should be consistent with the order of frames in `traj`.
+            - `model_devi`: (`Artifact(Path)`) The model deviation in the binary format of `dump_model_devi_npy`. The order of recorded model deviations should be consistent with the order of frames in `traj`.
         
         Exceptions
         ----------
         TransientError
             On the failure of LAMMPS execution. Handle different failure cases? e.g. loss atoms.
         """
-        raise NotImplementedError
+        config = RunLmp.normalize_config(ip['config'])
+        command = config['command']
+        task_name = ip['task_name']
+        task_path = Path(ip['task_path']).resolve()
+        models = [Path(ii).resolve() for ii in ip['models']]
+        work_dir = Path(task_name)
+
+        with set_directory(work_dir):
+            # link input files
+            for ii in sorted(task_path.iterdir()):
+                Path(ii.name).symlink_to(ii)
+            # link models
+            for mm in models:
+                Path(mm.name).symlink_to(mm)
+            # run lmp
+            ret, out, err = run_command(
+                ' '.join([command, '-i', lmp_input_name, '-log', lmp_log_name]),
+                shell=True,
+            )
+            if ret != 0:
+                raise TransientError(
+                    'lmp failed\n', 
+                    'out msg', out, '\n',
+                    'err msg', err, '\n'
+                )
+            dump_model_devi_npy(lmp_model_devi_name, lmp_model_devi_npy_name)
+
+        return OPIO({
+            "log" : work_dir / lmp_log_name,
+            "traj" : work_dir / lmp_traj_name,
+            "model_devi" : work_dir / lmp_model_devi_npy_name,
+        })
+
+
+    @staticmethod
+    def lmp_args():
+        doc_lmp_cmd = "The command of LAMMPS"
+        return [
+            Argument("command", str, optional=True, default='lmp', doc=doc_lmp_cmd),
+        ]
+
+
+    @staticmethod
+    def normalize_config(data = {}):
+        ta = RunLmp.lmp_args()
+
+        base = Argument("base", dict, ta)
+        data = base.normalize_value(data, trim_pattern="_*")
+        base.check_value(data, strict=True)
 
+        return data
 
@@ -2,11 +2,26 @@ from dflow.python import (
     OP,
     OPIO,
     OPIOSign,
-    Artifact
+    Artifact,
+    TransientError,
 )
-import os, json
-from typing import Tuple, List, Set
+import os, json, shutil, dpdata
+import numpy as np
+from typing import Tuple, List, Set, Optional
 from pathlib import Path
+from dargs import (
+    Argument,
+)
+from dpgen2.constants import (
+    vasp_conf_name,
+    vasp_log_name,
+)
+from dpgen2.fp.outcar import read_outcar_last_frame
+from dpgen2.utils.run_command import run_command
+from dpgen2.utils.chdir import set_directory
+
+# the files reused by a task from a finished task of the same system
+vasp_restart_files = ['WAVECAR', 'CHGCAR']
 
 class RunVasp(OP):
     r"""Execute a VASP task.
@@ -17,6 +32,17 @@ class RunVasp(OP):
     `op["labeled_data"]` in `"deepmd/npy"` format (HF5 in the future)
     provided by `dpdata` will be created.
 
+    If `reuse_wavefunction` is set in the config, the WAVECAR and CHGCAR
+    are copied from the nearest (by task index) finished task found in
+    the current directory, e.g. an earlier task of the same group, if
+    it has the same atoms and cell. VASP starts from the wavefunction by
+    default if the WAVECAR exists; set ICHARG in the INCAR to use the
+    CHGCAR.
+
+    The final ionic step is read from the OUTCAR by a streaming reader
+    and written as a `deepmd/npy` system. If the SCF of the step is not
+    converged, the labeled data is left empty.
+
     """
 
     @classmethod
@@ -46,6 +72,7 @@ class RunVasp(OP):
         ip : dict
             Input dict with components:
         
+            - `config`: (`dict`) The config of the VASP task. Check `RunVasp.vasp_args` for definitions.
             - `task_name`: (`str`) The name of task.
             - `task_path`: (`Artifact(Path)`) The path that contains all input files prepareed by `PrepVasp`.
 
@@ -61,5 +88,133 @@ class RunVasp(OP):
         TransientError
             On the failure of VASP execution. 
         """
-        raise NotImplementedError
+        config = RunVasp.normalize_config(ip['config'])
+        task_name = ip['task_name']
+        task_path = Path(ip['task_path']).resolve()
+        work_dir = Path(task_name)
+        labeled_data = Path(_labeled_data_name(task_name))
+
+        with set_directory(work_dir):
+            # link input files
+            for ii in sorted(task_path.iterdir()):
+                Path(ii.name).symlink_to(ii)
+            with open(vasp_log_name, 'w') as fplog:
+                # reuse the wavefunction of a finished task
+                if config['reuse_wavefunction']:
+                    restart_path = _find_restart_task(Path('..'), task_name)
+                    if restart_path is not None:
+                        for ii in vasp_restart_files:
+                            if (restart_path / ii).is_file():
+                                shutil.copyfile(restart_path / ii, ii)
+                        fplog.write(f'reuse {" ".join(vasp_restart_files)} of {restart_path.name}\n')
+                # run vasp
+                ret, out, err = run_command(
+                    config['command'], shell=True, log=fplog, tail_lines=100)
+                if ret != 0:
+                    raise TransientError(
+                        'vasp failed\n', 
+                        'out msg', out, '\n',
+                        'err msg', err, '\n'
+                    )
+                # convert the final ionic step
+                labeled_data.mkdir(exist_ok=True, parents=True)
+                if not Path('OUTCAR').is_file():
+                    raise TransientError('vasp failed, no OUTCAR is found')
+                frame = read_outcar_last_frame('OUTCAR')
+                if frame is None or not frame['converged']:
+                    fplog.write('the SCF is not converged, no labeled data\n')
+                else:
+                    _make_labeled_system(frame, vasp_conf_name).to('deepmd/npy', str(labeled_data))
+
+        return OPIO({
+            "log" : work_dir / vasp_log_name,
+            "labeled_data" : work_dir / labeled_data,
+        })
+
+
+    @staticmethod
+    def vasp_args():
+        doc_vasp_cmd = "The command of VASP"
+        doc_reuse_wfc = "Reuse the WAVECAR and CHGCAR of the nearest finished task of the same atoms and cell."
+        return [
+            Argument("command", str, optional=True, default='vasp_std', doc=doc_vasp_cmd),
+            Argument("reuse_wavefunction", bool, optional=True, default=True, doc=doc_reuse_wfc),
+        ]
+
+
+    @staticmethod
+    def normalize_config(data = {}):
+        ta = RunVasp.vasp_args()
+
+        base = Argument("base", dict, ta)
+        data = base.normalize_value(data, trim_pattern="_*")
+        base.check_value(data, strict=True)
+
+        return data
+
+
+def _labeled_data_name(task_name):
+    return 'data_' + task_name
+
+
+def _poscar_system_lines(poscar):
+    # the scale, cell, species and numbers of atoms of a POSCAR
+    lines = Path(poscar).read_text().split('\n')
+    cell = np.array([[float(ss) for ss in ll.split()[0:3]] for ll in lines[2:5]])
+    return float(lines[1]), cell, lines[5].split(), lines[6].split()
+
+
+def _find_restart_task(
+        path : Path,
+        task_name : str,
+) -> Optional[Path] :
+    """Find the finished task in `path` nearest to `task_name` that has
+    the same atoms and cell, and has all the restart files."""
+    scale, cell, species, numbs = _poscar_system_lines(vasp_conf_name)
+    task_index = int(task_name.split('.')[-1])
+    candidates = []
+    for ii in path.glob(task_name.split('.')[0] + '.*'):
+        if ii.name == task_name or \
+           not (ii / _labeled_data_name(ii.name) / 'type.raw').is_file() or \
+           not all((ii / ff).is_file() for ff in vasp_restart_files) or \
+           not (ii / vasp_conf_name).is_file():
+            continue
+        try:
+            index = int(ii.name.split('.')[-1])
+        except ValueError:
+            continue
+        candidates.append((abs(index - task_index), index, ii))
+    for _, _, ii in sorted(candidates):
+        oscale, ocell, ospecies, onumbs = _poscar_system_lines(ii / vasp_conf_name)
+        if ospecies == species and onumbs == numbs and \
+           np.allclose(oscale * ocell, scale * cell):
+            return ii
+    return None
+
+
+def _make_labeled_system(
+        frame : dict,
+        poscar : Path,
+) -> dpdata.LabeledSystem :
+    _, _, atom_names, _ = _poscar_system_lines(poscar)
+    atom_numbs = frame['atom_numbs']
+    if len(atom_names) != len(atom_numbs):
+        raise RuntimeError('the species in POSCAR and OUTCAR are not consistent')
+    natoms = sum(atom_numbs)
+    data = {
+        'atom_names' : atom_names,
+        'atom_numbs' : atom_numbs,
+        'atom_types' : np.repeat(np.arange(len(atom_numbs)), atom_numbs),
+        'orig' : np.zeros(3),
+        'cells' : np.reshape(frame['cells'], [1, 3, 3]),
+        'coords' : np.reshape(frame['coords'], [1, natoms, 3]),
+        'energies' : np.array([frame['energies']]),
+        'forces' : np.reshape(frame['forces'], [1, natoms, 3]),
+    }
+    if frame['virials'] is not None:
+        data['virials'] = np.reshape(frame['virials'], [1, 3, 3])
+    ss = dpdata.LabeledSystem(data=data)
+    # as the vasp/outcar format of dpdata
+    ss.rot_lower_triangular()
+    return ss
 
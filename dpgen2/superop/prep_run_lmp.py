@@ -31,6 +31,19 @@ from pathlib import Path
 
 
 class PrepRunLmp(Steps):
+    r"""Prepare and run LAMMPS tasks.
+
+    Parameters
+    ----------
+    group_size : int
+        The number of LAMMPS tasks run by one `run_op` step. If `None`, 
+        each task is run by a step. The outputs are returned in the order 
+        of the tasks anyway.
+    pool_size : int
+        The number of tasks in a group run concurrently by a process pool. 
+        If `None` or 1, the tasks in a group are run serially.
+
+    """
     def __init__(
             self,
             name : str,
@@ -39,6 +52,8 @@ class PrepRunLmp(Steps):
             prep_image : str = "dflow:v1.0",
             run_image : str = "dflow:v1.0",
             upload_python_package : str = None,
+            group_size : int = None,
+            pool_size : int = None,
     ):
         self._input_parameters = {
             "block_id" : InputParameter(type=str, value=""),
@@ -88,6 +103,8 @@ class PrepRunLmp(Steps):
             prep_image = prep_image,
             run_image = run_image,
             upload_python_package = upload_python_package,
+            group_size = group_size,
+            pool_size = pool_size,
         )            
         
     @property
@@ -119,6 +136,8 @@ def _prep_run_lmp(
         prep_image : str = "dflow:v1.0",
         run_image : str = "dflow:v1.0",
         upload_python_package : str = None,
+        group_size : int = None,
+        pool_size : int = None,
 ):
 
     prep_lmp = Step(
@@ -150,6 +169,8 @@ def _prep_run_lmp(
                 input_parameter = ["task_name"],
                 input_artifact = ["task_path"],
                 output_artifact = ["log", "traj", "model_devi"],
+                group_size = group_size,
+                pool_size = pool_size,
             ),
             python_packages = upload_python_package,
         ),
@@ -0,0 +1,110 @@
+import os, shutil, hashlib
+from pathlib import Path
+from typing import (
+    Union,
+)
+
+
+class BlobStore():
+    """A content-addressed store of files.
+
+    Each unique content is stored once as a file named by its sha256
+    hash. The stored files are put into the working directories of
+    tasks by `link_file`, so identical inputs of many tasks are
+    written to the disk only once.
+
+    Parameters
+    ----------
+    path : Path
+        The directory of the store.
+
+    Examples
+    --------
+    >>> store = BlobStore('blobs')
+    >>> blob = store.add_text('some content')
+    >>> link_file(blob, Path('task.000000')/'input')
+
+    """
+    def __init__(
+            self,
+            path : Path,
+    ):
+        self.path = Path(path)
+        self.path.mkdir(exist_ok=True, parents=True)
+        self._stored = set()
+
+    def blob_path(
+            self,
+            hh : str,
+    ) -> Path :
+        """The path to the blob of hash `hh`."""
+        return self.path / hh
+
+    def add_bytes(
+            self,
+            content : bytes,
+    ) -> Path :
+        """Add a content to the store, return the path to the blob."""
+        hh = hashlib.sha256(content).hexdigest()
+        blob = self.blob_path(hh)
+        if hh not in self._stored:
+            if not blob.is_file():
+                tmp = blob.with_name(blob.name + '.tmp')
+                tmp.write_bytes(content)
+                os.replace(tmp, blob)
+            self._stored.add(hh)
+        return blob
+
+    def add_text(
+            self,
+            content : str,
+    ) -> Path :
+        """Add a text content to the store, return the path to the blob."""
+        return self.add_bytes(content.encode('utf-8'))
+
+    def add_file(
+            self,
+            fname : Path,
+            hh : str = None,
+    ) -> Path :
+        """Add a file to the store, return the path to the blob.
+
+        Parameters
+        ----------
+        fname : Path
+            The file.
+        hh : str
+            The sha256 hash of the file if known, e.g. the file is
+            itself a blob of another store. It is not verified.
+
+        """
+        if hh is None:
+            hh = hashlib.sha256(Path(fname).read_bytes()).hexdigest()
+        blob = self.blob_path(hh)
+        if hh not in self._stored:
+            if not blob.is_file():
+                tmp = blob.with_name(blob.name + '.tmp')
+                link_file(fname, tmp)
+                os.replace(tmp, blob)
+            self._stored.add(hh)
+        return blob
+
+
+def link_file(
+        src : Union[str, Path],
+        dst : Union[str, Path],
+):
+    """Hard link `src` to `dst`, copy the file if the hard link fails,
+    e.g. `src` and `dst` are on different file systems. An existing
+    `dst` is replaced.
+
+    The linked files share the content, so they should not be modified.
+
+    """
+    dst = Path(dst)
+    if dst.is_file() or dst.is_symlink():
+        dst.unlink()
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
@@ -0,0 +1,93 @@
+import json
+import numpy as np
+from pathlib import Path
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Union,
+)
+from dpgen2.constants import (
+    data_index_name,
+)
+
+data_index_format_version = 1
+
+
+def npy_nframes(
+        fname : Union[str, Path],
+) -> int :
+    """The number of frames (the length of the first axis) of a `.npy`
+    file. Only the header of the file is read."""
+    with open(fname, 'rb') as fp:
+        version = np.lib.format.read_magic(fp)
+        if version == (1, 0):
+            shape, _, _ = np.lib.format.read_array_header_1_0(fp)
+        elif version == (2, 0):
+            shape, _, _ = np.lib.format.read_array_header_2_0(fp)
+        else:
+            raise RuntimeError(f'unsupported npy format version {version} of {fname}')
+    return shape[0] if len(shape) > 0 else 1
+
+
+def count_frames(
+        sys_dir : Union[str, Path],
+) -> int :
+    """The number of frames of a `deepmd/npy` system, counted from the
+    headers of the coordinate files of the sets."""
+    return sum(npy_nframes(ii) for ii in sorted(Path(sys_dir).glob('set.*/coord.npy')))
+
+
+def make_data_index(
+        data_dir : Union[str, Path],
+) -> List[Dict] :
+    """Make the index of a `deepmd/npy` multi-system data directory and
+    write it to `data_index_name` in the directory.
+
+    The index records the path of each system relative to `data_dir`
+    and its number of frames. It also serves as the manifest of the
+    systems in the directory, so the directory need not be scanned.
+
+    Returns
+    -------
+    systems : List[Dict]
+        The records of the systems, each has keys `path` and `nframes`.
+
+    """
+    data_dir = Path(data_dir)
+    systems = [
+        {'path' : ii.parent.name, 'nframes' : count_frames(ii.parent)}
+        for ii in sorted(data_dir.glob('*/type.raw'), key=str)
+    ]
+    index = {
+        'version' : data_index_format_version,
+        'systems' : systems,
+    }
+    (data_dir / data_index_name).write_text(json.dumps(index, indent=2))
+    return systems
+
+
+def load_data_index(
+        data_dir : Union[str, Path],
+) -> Optional[List[Dict]] :
+    """Load the index of a data directory written by `make_data_index`.
+    Return `None` if the directory has no index."""
+    fname = Path(data_dir) / data_index_name
+    if not fname.is_file():
+        return None
+    index = json.loads(fname.read_text())
+    if index.get('version') != data_index_format_version:
+        raise RuntimeError(f'unsupported data index format version {index.get("version")}')
+    return index['systems']
+
+
+def get_data_size(
+        data_dir : Union[str, Path],
+) -> int :
+    """The number of frames of a `deepmd/npy` multi-system data
+    directory. The index of the directory is used if exists, otherwise
+    the frames are counted from the headers of the data files."""
+    systems = load_data_index(data_dir)
+    if systems is not None:
+        return sum(ii['nframes'] for ii in systems)
+    return sum(count_frames(ii.parent) for ii in Path(data_dir).glob('*/type.raw'))
@@ -0,0 +1,234 @@
+import os
+import dpdata
+import numpy as np
+from pathlib import Path
+from typing import (
+    Dict,
+    List,
+)
+
+# (key in dpdata, file name in the set.* directory, reshape of one frame)
+_set_items = [
+    ('cells', 'box', [9]),
+    ('coords', 'coord', [-1]),
+    ('energies', 'energy', []),
+    ('forces', 'force', [-1]),
+    ('virials', 'virial', [9]),
+]
+
+
+def _data_keys(system):
+    # the keys of the data written to the set.* directories
+    return {key for key, name, shape in _set_items if key in system.data}
+
+
+class MultiSystemsWriter():
+    """Incrementally write systems in the `deepmd/npy` format of
+    `dpdata.MultiSystems`.
+
+    Like `dpdata.MultiSystems`, the appended systems are grouped by
+    formula and the atom names of all systems are made consistent. The
+    frames of each formula are buffered until a set of `set_size`
+    frames is full, then the set is written to disk as a `set.*`
+    directory. Thus the memory is bounded by the appended system and
+    one set per formula, rather than by all the appended frames. The
+    remaining frames are written by `flush`, which is called when the
+    writer is used as a context manager.
+
+    Parameters
+    ----------
+    path : Path
+        The output directory. The systems are written to its sub-directories
+        named by formula.
+    type_map : List[str]
+        The type map. If `None`, the atom names are collected from the
+        appended systems, as `dpdata.MultiSystems` does.
+    set_size : int
+        The number of frames in each `set.*` directory.
+
+    Examples
+    --------
+    >>> with MultiSystemsWriter('confs') as writer:
+    ...     for ss in systems:
+    ...         writer.append(ss)
+
+    """
+    def __init__(
+            self,
+            path : Path,
+            type_map : List[str] = None,
+            set_size : int = 5000,
+    ):
+        self.path = Path(path)
+        self.path.mkdir(exist_ok=True, parents=True)
+        self.atom_names = list(type_map) if type_map is not None else []
+        self.set_size = set_size
+        self._systems = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+
+    @property
+    def formulas(self) -> List[str]:
+        """The formulas of the written systems."""
+        return list(self._systems.keys())
+
+    def system_path(self, formula : str) -> Path:
+        """The path to the system of `formula`."""
+        return self.path / formula
+
+    def get_nframes(self, formula : str = None) -> int:
+        """The number of appended frames of `formula`, or of all systems if `formula` is `None`."""
+        if formula is None:
+            return sum([rec['nframes'] for rec in self._systems.values()])
+        return self._systems[formula]['nframes']
+
+    def sources(self, formula : str) -> List[Dict]:
+        """The sources of the frames of `formula` in the order of the
+        frames. Each source has the keys `source`, the name given to
+        `append`, `frame_start`, the index of its first frame in the
+        system, and `nframes`."""
+        ret = []
+        frame_start = 0
+        for source, nframes in self._systems[formula]['sources']:
+            ret.append({'source' : source, 'frame_start' : frame_start, 'nframes' : nframes})
+            frame_start += nframes
+        return ret
+
+    def append(
+            self,
+            system : dpdata.System,
+            source : str = None,
+    ):
+        """Append a system. Systems with no frame are ignored. The
+        frames of a formula must have the same data, e.g. frames
+        without virials can not be appended to a system with virials.
+
+        Parameters
+        ----------
+        system : dpdata.System
+            The appended system. It is not modified.
+        source : str
+            The name of the source of the system, see `sources`.
+
+        """
+        if system.get_nframes() == 0 or not system.formula:
+            return self
+        system = system.copy()
+        self._check_atom_names(system)
+        formula = system.formula
+        if formula not in self._systems:
+            self._new_system(formula, system)
+        rec = self._systems[formula]
+        keys = _data_keys(system)
+        if keys != rec['keys']:
+            # the npy files of a set must have the same frames
+            raise RuntimeError(
+                f'cannot append frames with data {sorted(keys)} to the system {formula} '
+                f'with data {sorted(rec["keys"])}')
+        if np.any(system['atom_types'] != rec['atom_types']):
+            # allow to append a system with different atom_types order
+            system.sort_atom_types()
+            self._sort_atom_types(formula)
+        if rec['nopbc'] and not system.nopbc:
+            # appended system uses PBC, cancel nopbc
+            rec['nopbc'] = False
+            nopbc_file = self.system_path(formula) / 'nopbc'
+            if nopbc_file.is_file():
+                os.remove(nopbc_file)
+        nframes = system.get_nframes()
+        for key, name, shape in _set_items:
+            if key in rec['keys']:
+                rec['buffer'][key].append(
+                    np.reshape(system[key], [nframes] + shape).astype(np.float64))
+        rec['nbuffer'] += nframes
+        rec['nframes'] += nframes
+        rec['sources'].append((source, nframes))
+        while rec['nbuffer'] >= self.set_size:
+            self._write_set(formula, self.set_size)
+        return self
+
+    def flush(self):
+        """Write all the buffered frames."""
+        for formula, rec in self._systems.items():
+            if rec['nbuffer'] > 0:
+                self._write_set(formula, rec['nbuffer'])
+
+    def _new_system(self, formula, system):
+        sys_path = self.system_path(formula)
+        sys_path.mkdir(exist_ok=True, parents=True)
+        np.savetxt(sys_path / 'type.raw', system['atom_types'], fmt='%d')
+        np.savetxt(sys_path / 'type_map.raw', system['atom_names'], fmt='%s')
+        if system.nopbc:
+            (sys_path / 'nopbc').write_text('')
+        self._systems[formula] = {
+            'atom_numbs' : list(system['atom_numbs']),
+            'atom_types' : np.array(system['atom_types'], dtype=int),
+            'keys' : _data_keys(system),
+            'nopbc' : system.nopbc,
+            'nsets' : 0,
+            'nframes' : 0,
+            'nbuffer' : 0,
+            'sources' : [],
+            'buffer' : {key : [] for key, name, shape in _set_items},
+        }
+
+    def _write_set(self, formula, nframes):
+        rec = self._systems[formula]
+        set_path = self.system_path(formula) / ('set.%03d' % rec['nsets'])
+        set_path.mkdir(exist_ok=True, parents=True)
+        for key, name, shape in _set_items:
+            if len(rec['buffer'][key]) == 0:
+                continue
+            data = np.concatenate(rec['buffer'][key], axis=0)
+            np.save(set_path / name, data[:nframes])
+            rec['buffer'][key] = [data[nframes:]] if data.shape[0] > nframes else []
+        rec['nbuffer'] -= nframes
+        rec['nsets'] += 1
+
+    def _sort_atom_types(self, formula):
+        # sort the atoms of the written sets and the buffered frames by type
+        rec = self._systems[formula]
+        idx = np.argsort(rec['atom_types'])
+        if np.all(idx == np.arange(idx.size)):
+            return
+        sys_path = self.system_path(formula)
+        natoms = idx.size
+        for key, name, shape in _set_items:
+            if key not in ['coords', 'forces']:
+                continue
+            for set_path in sorted(sys_path.glob('set.*')):
+                fname = set_path / (name + '.npy')
+                if fname.is_file():
+                    data = np.load(fname).reshape([-1, natoms, 3])[:, idx]
+                    np.save(fname, data.reshape([-1, natoms * 3]))
+            rec['buffer'][key] = [
+                bb.reshape([-1, natoms, 3])[:, idx].reshape([-1, natoms * 3])
+                for bb in rec['buffer'][key] ]
+        rec['atom_types'] = rec['atom_types'][idx]
+        np.savetxt(sys_path / 'type.raw', rec['atom_types'], fmt='%d')
+
+    def _check_atom_names(self, system):
+        # make the atom names of all the systems consistent,
+        # see dpdata.MultiSystems.check_atom_names
+        new_in_system = [e for e in system['atom_names'] if e not in self.atom_names]
+        new_in_self = [e for e in self.atom_names if e not in system['atom_names']]
+        if len(new_in_system) > 0:
+            self.atom_names.extend(new_in_system)
+            # the new names are appended with zero atoms to the written
+            # systems, their atom types are not changed.
+            new_systems = {}
+            for formula, rec in self._systems.items():
+                rec['atom_numbs'] += [0] * len(new_in_system)
+                new_formula = formula + ''.join([f'{ee}0' for ee in new_in_system])
+                os.rename(self.system_path(formula), self.system_path(new_formula))
+                np.savetxt(self.system_path(new_formula) / 'type_map.raw',
+                           self.atom_names, fmt='%s')
+                new_systems[new_formula] = rec
+            self._systems = new_systems
+        if len(new_in_self) > 0:
+            system.add_atom_names(new_in_self)
+        system.sort_atom_names(type_map=self.atom_names)
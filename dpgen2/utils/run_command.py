@@ -1,18 +1,90 @@
-import sys, subprocess
+import os, sys, signal, subprocess, threading
+from collections import deque
+from typing import (
+    IO,
+    Optional,
+)
 
 def run_command(
         cmd,
         shell = None,
+        log : Optional[IO] = None,
+        tail_lines : Optional[int] = None,
+        timeout : Optional[float] = None,
 ):
+    """Run a command and return its return code, stdout and stderr.
+
+    The outputs are read line by line while the command is running.
+
+    Parameters
+    ----------
+    cmd : str or List[str]
+        The command.
+    shell : bool
+        If the command is executed through the shell.
+    log : IO
+        A text file the stdout and stderr are written to as they arrive,
+        so the outputs are kept even if the process running
+        `run_command` is killed.
+    tail_lines : int
+        Only the last `tail_lines` lines of the stdout and stderr are
+        kept in memory and returned. If `None`, all lines are kept.
+    timeout : float
+        The command, with its child processes, is killed if it does not
+        finish in `timeout` seconds. A message is appended to the stderr
+        and the return code of the killed command is returned.
+
+    Returns
+    -------
+    return_code : int
+        The return code.
+    out : str
+        The stdout, or the tail of it.
+    err : str
+        The stderr, or the tail of it.
+
+    """
+    encoding = sys.stdin.encoding or 'utf-8'
     pp = subprocess.Popen(
-        cmd, 
-        stdout=subprocess.PIPE, 
+        cmd,
+        stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
         shell=shell,
+        # a new process group, so the children of a shell are also killed on timeout
+        start_new_session=timeout is not None,
     )
-    out, err = pp.communicate()
+    lock = threading.Lock()
+    bufs = [deque(maxlen=tail_lines), deque(maxlen=tail_lines)]
+
+    def read_stream(stream, buf):
+        for line in iter(stream.readline, b''):
+            line = line.decode(encoding, errors='replace')
+            buf.append(line)
+            if log is not None:
+                with lock:
+                    log.write(line)
+                    log.flush()
+        stream.close()
+
+    readers = [
+        threading.Thread(target=read_stream, args=(stream, buf), daemon=True)
+        for stream, buf in zip([pp.stdout, pp.stderr], bufs)
+    ]
+    for tt in readers:
+        tt.start()
+    try:
+        pp.wait(timeout=timeout)
+        timed_out = False
+    except subprocess.TimeoutExpired:
+        os.killpg(pp.pid, signal.SIGKILL)
+        pp.wait()
+        timed_out = True
+    for tt in readers:
+        tt.join()
     return_code = pp.poll()
-    out = out.decode(sys.stdin.encoding)
-    err = err.decode(sys.stdin.encoding)
+    out = ''.join(bufs[0])
+    err = ''.join(bufs[1])
+    if timed_out:
+        err += f'command timed out after {timeout} seconds\n'
     return return_code, out, err
-    
+
@@ -0,0 +1,34 @@
+from context import dpgen2
+import numpy as np
+import unittest
+from dpgen2.exploration.selector import (
+    budget_candidates,
+)
+
+class TestBudgetCandidates(unittest.TestCase):
+    def setUp(self):
+        self.score = np.array([0.05, 0.9, 0.15, 0.55, 0.95, 0.1, 0.5, 0.85, 0.0, 0.6])
+
+    def test_no_budget(self):
+        np.testing.assert_equal(budget_candidates(self.score, None), np.arange(10))
+        np.testing.assert_equal(budget_candidates(self.score, 20), np.arange(10))
+        self.assertEqual(budget_candidates(self.score, 0).size, 0)
+
+    def test_max_devi(self):
+        idx = budget_candidates(self.score, 3, 'max_devi')
+        np.testing.assert_equal(idx, [1, 4, 7])
+
+    def test_stratified(self):
+        # bins of width 0.19: [0, 0.05, 0.1, 0.15], [], [0.5, 0.55], [0.6], [0.85, 0.9, 0.95]
+        idx = budget_candidates(self.score, 3, 'stratified', numb_bins=5)
+        np.testing.assert_equal(idx, [3, 4, 9])
+        idx = budget_candidates(self.score, 5, 'stratified', numb_bins=5)
+        np.testing.assert_equal(idx, [1, 2, 3, 4, 9])
+
+    def test_stratified_same_score(self):
+        idx = budget_candidates(np.ones(5), 2, 'stratified')
+        np.testing.assert_equal(idx, [0, 1])
+
+    def test_unknown(self):
+        with self.assertRaises(RuntimeError):
+            budget_candidates(self.score, 3, 'foo')
@@ -0,0 +1,52 @@
+from context import dpgen2
+import numpy as np
+import unittest
+from dpgen2.exploration.selector import (
+    RdfConfDedup,
+)
+from fake_data_set import fake_system
+
+class TestRdfConfDedup(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(5)
+        self.natoms = 20
+        self.cell = np.diag([6., 6., 6.])
+        conf_a = rng.random([self.natoms, 3]) * 6.
+        conf_b = rng.random([self.natoms, 3]) * 6.
+        # frames 0-2 are close to conf_a, frames 3-5 are close to conf_b
+        self.coords = np.array(
+            [conf_a + rng.normal(scale=1e-3, size=conf_a.shape) for ii in range(3)] + 
+            [conf_b + rng.normal(scale=1e-3, size=conf_b.shape) for ii in range(3)])
+        self.cells = np.tile(self.cell, [6, 1, 1])
+        self.atom_types = np.array([0] * 10 + [1] * 10)
+
+    def test_descriptor(self):
+        dedup = RdfConfDedup(3.0, 0.5, nbins=10)
+        desc = dedup.descriptor(self.coords, self.cells, self.atom_types, False)
+        self.assertEqual(desc.shape, (6, 40))
+        # translation does not change the descriptor
+        desc_t = dedup.descriptor(self.coords + 1.5, self.cells, self.atom_types, False)
+        np.testing.assert_almost_equal(desc, desc_t)
+
+    def test_select(self):
+        dedup = RdfConfDedup(3.0, 0.5, nbins=10)
+        idx = dedup.select(self.coords, self.cells, self.atom_types, False)
+        np.testing.assert_equal(idx, [0, 3])
+
+    def test_max_numb(self):
+        dedup = RdfConfDedup(3.0, 0.5, nbins=10, max_numb=1)
+        idx = dedup.select(self.coords, self.cells, self.atom_types, False)
+        np.testing.assert_equal(idx, [0])
+        dedup = RdfConfDedup(3.0, 0., nbins=10, max_numb=4)
+        idx = dedup.select(self.coords, self.cells, self.atom_types, False)
+        self.assertEqual(idx.size, 4)
+
+    def test_dedup(self):
+        ss = fake_system(6, self.natoms)
+        ss.data['coords'] = self.coords
+        ss.data['cells'] = self.cells
+        sel = RdfConfDedup(3.0, 0.5, nbins=10).dedup(ss)
+        self.assertEqual(sel.get_nframes(), 2)
+        np.testing.assert_almost_equal(sel['coords'][1], self.coords[3])
+        empty = RdfConfDedup(3.0, 0.5).dedup(ss.sub_system([]))
+        self.assertEqual(empty.get_nframes(), 0)
@@ -32,10 +32,11 @@ class TestConfFilter(unittest.TestCase):
     @patch.object(FooFilter, "check", faked_filter.faked_check)
     def test_filter_0(self):
         faked_filter.myiter = -1
+        # rejected frames are not checked by the following filters
         faked_filter.myret = [
             True, True, False, True,
-            False, True, True, False,
-            True, True, False, False,
+            False, True, False,
+            True,
         ]
         faked_sys = fake_system(4, 3)
         # expected only frame 1 is preseved.
@@ -49,10 +50,11 @@ class TestConfFilter(unittest.TestCase):
     @patch.object(FooFilter, "check", faked_filter.faked_check)
     def test_filter_1(self):
         faked_filter.myiter = -1
+        # rejected frames are not checked by the following filters
         faked_filter.myret = [
             True, True, False, True,
-            False, True, True, True,
-            True, True, False, True,
+            False, True, True,
+            True, True,
         ]
         faked_sys = fake_system(4, 3)
         # expected frame 1 and 3 are preseved.
@@ -98,3 +100,67 @@ class TestConfFilter(unittest.TestCase):
         sel_sys = filters.check(faked_sys)
         self.assertEqual(sel_sys.get_nframes(), 0)
         
+
+
+class BatchFilter(ConfFilter):
+    def __init__(self, max_x):
+        self.max_x = max_x
+        self.checked = []
+
+    def check (
+            self,
+            coords : np.array,
+            cell: np.array,
+            atom_types : np.array,
+            nopbc: bool,
+    ) -> bool :
+        raise RuntimeError('should not be called')
+
+    def check_batch (
+            self,
+            coords : np.array,
+            cells: np.array,
+            atom_types : np.array,
+            nopbc: bool,
+    ) -> np.array :
+        self.checked.append(coords.shape[0])
+        return coords[:,0,0] < self.max_x
+
+
+class TestConfFilterBatch(unittest.TestCase):
+    def test_batch(self):
+        faked_sys = fake_system(5, 3)
+        for ii in range(5):
+            faked_sys['coords'][ii][0][0] = float(ii)
+        f0 = BatchFilter(4.)
+        f1 = BatchFilter(2.)
+        f2 = BatchFilter(1.)
+        filters = ConfFilters()
+        filters.add(f0).add(f1).add(f2)
+        sel_sys = filters.check(faked_sys)
+        self.assertEqual(sel_sys.get_nframes(), 1)
+        self.assertAlmostEqual(sel_sys['coords'][0][0][0], 0.)
+        # the filters only check the frames that are not rejected
+        self.assertEqual(f0.checked, [5])
+        self.assertEqual(f1.checked, [4])
+        self.assertEqual(f2.checked, [2])
+
+    def test_batch_short_circuit(self):
+        faked_sys = fake_system(3, 3)
+        faked_sys.data['coords'] += 10.
+        f0 = BatchFilter(4.)
+        f1 = BatchFilter(2.)
+        filters = ConfFilters()
+        filters.add(f0).add(f1)
+        sel_sys = filters.check(faked_sys)
+        self.assertEqual(sel_sys.get_nframes(), 0)
+        self.assertEqual(f0.checked, [3])
+        self.assertEqual(f1.checked, [])
+
+    def test_default_batch(self):
+        faked_sys = fake_system(2, 3)
+        ff = FooFilter()
+        valid = ff.check_batch(
+            faked_sys['coords'], faked_sys['cells'], faked_sys['atom_types'], False)
+        self.assertEqual(valid.dtype, bool)
+        self.assertEqual(list(valid), [True, True])
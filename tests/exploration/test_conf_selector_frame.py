@@ -3,10 +3,16 @@ import os, textwrap, dpdata, shutil
 import numpy as np
 import unittest
 from pathlib import Path
+from mock import patch
 from dpgen2.exploration.selector import (
     TrustLevel,
     ConfSelectorLammpsFrames,
+    ConfFilters,
+    DistanceConfFilter,
+    RdfConfDedup,
+    dump_model_devi_npy,
 )
+from dpgen2.exploration.selector.lmp_dump_reader import LammpsDumpReader
 
 class TestConfSelectorLammpsFrames(unittest.TestCase):
     def setUp(self):
@@ -66,7 +72,8 @@ class TestConfSelectorLammpsFrames(unittest.TestCase):
         self.type_map = ['O', 'H']
 
     def tearDown(self):
-        for ii in ['foo.dump', 'bar.dump', 'foo.md', 'bar.md']:
+        for ii in ['foo.dump', 'bar.dump', 'foo.md', 'bar.md', 
+                   'foo.md.fv.npy', 'bar.md.fv.npy', 'foo.npy', 'bar.npy']:
             if Path(ii).is_file():
                 os.remove(ii)
         for ii in ['confs']:
@@ -93,6 +100,11 @@ class TestConfSelectorLammpsFrames(unittest.TestCase):
         self.assertAlmostEqual(report.ratio('force', 'candidate'), 1.)
         self.assertAlmostEqual(report.ratio('force', 'accurate'), 0.)
         self.assertAlmostEqual(report.ratio('force', 'failed'), 0.)
+        self.assertEqual(report.histogram('force').numb, 6)
+        self.assertAlmostEqual(report.histogram('force').max, 0.4)
+        self.assertAlmostEqual(report.histogram('virial').mean, 0.2)
+        # the frames of all the trajectories are written in one set
+        self.assertEqual(len(list(confs[0].glob('*/set.*'))), 1)
 
     def test_f_1(self):
         conf_selector = ConfSelectorLammpsFrames(
@@ -134,3 +146,187 @@ class TestConfSelectorLammpsFrames(unittest.TestCase):
         self.assertAlmostEqual(report.ratio('virial', 'failed'), 2./3.)
 
         
+    def test_parse_traj_once(self):
+        conf_selector = ConfSelectorLammpsFrames(
+            TrustLevel(0.25, 0.35),
+        )
+        with patch.object(LammpsDumpReader, '_index_frames',
+                          wraps=LammpsDumpReader._index_frames) as mocked_index, \
+             patch('dpdata.lammps.dump.system_data',
+                   wraps=dpdata.lammps.dump.system_data) as mocked_decode:
+            confs, report = conf_selector.select(
+                self.trajs, self.model_devis, self.traj_fmt, self.type_map)
+        # each trajectory file is indexed exactly once
+        self.assertEqual(
+            sorted([str(cc.args[0]) for cc in mocked_index.call_args_list]),
+            sorted([str(ii) for ii in self.trajs]))
+        # only the candidate, i.e. the second frame of each trajectory, is decoded
+        self.assertEqual(mocked_decode.call_count, len(self.trajs))
+        for cc in mocked_decode.call_args_list:
+            lines = cc.args[0]
+            self.assertEqual(lines.count('ITEM: TIMESTEP'), 1)
+            self.assertIn('1 2 11.09 3.87 2.74 0.183043 -0.287677 -0.0974527', 
+                          [ll.strip() for ll in lines])
+        ms = dpdata.MultiSystems()
+        ms.from_deepmd_npy(confs[0], labeled=False)
+        self.assertEqual(ms.get_nframes(), 2)
+
+    def test_parallel(self):
+        Path('bar.md').write_text(textwrap.dedent(
+            """ #
+            0 0.1 0.0 0.0 0.3 0.0 0.0
+            0 0.2 0.0 0.0 0.1 0.0 0.0
+            0 0.3 0.0 0.0 0.3 0.0 0.0
+            """))
+        results = []
+        for numb_workers in [None, 2]:
+            conf_selector = ConfSelectorLammpsFrames(
+                TrustLevel(0.25, 0.35),
+                numb_workers = numb_workers,
+            )
+            confs, report = conf_selector.select(
+                self.trajs, self.model_devis, self.traj_fmt, self.type_map)
+            ms = dpdata.MultiSystems()
+            ms.from_deepmd_npy(confs[0], labeled=False)
+            results.append((ms[0]['coords'], report))
+            shutil.rmtree(confs[0])
+        self.assertEqual(results[0][0].shape[0], 3)
+        np.testing.assert_almost_equal(results[0][0], results[1][0])
+        self.assertAlmostEqual(results[1][0][0][0][1], 3.87, places=2)
+        self.assertAlmostEqual(results[1][0][1][0][1], 2.87, places=2)
+        self.assertAlmostEqual(results[1][0][2][0][1], 4.87, places=2)
+        for item in ['candidate', 'accurate', 'failed']:
+            self.assertAlmostEqual(
+                results[0][1].ratio('force', item), 
+                results[1][1].ratio('force', item))
+
+    def test_conf_filters(self):
+        # the closest atoms in the dumped frames are 0.98 away
+        conf_selector = ConfSelectorLammpsFrames(
+            TrustLevel(0.1, 0.5),
+            conf_filters = ConfFilters().add(DistanceConfFilter(0.9)),
+        )
+        confs, report = conf_selector.select(
+            self.trajs, self.model_devis, self.traj_fmt, self.type_map)
+        ms = dpdata.MultiSystems()
+        ms.from_deepmd_npy(confs[0], labeled=False)
+        self.assertEqual(ms.get_nframes(), 6)
+        shutil.rmtree(confs[0])
+        conf_selector = ConfSelectorLammpsFrames(
+            TrustLevel(0.1, 0.5),
+            conf_filters = ConfFilters().add(DistanceConfFilter(1.0)),
+        )
+        confs, report = conf_selector.select(
+            self.trajs, self.model_devis, self.traj_fmt, self.type_map)
+        self.assertEqual(len(list(confs[0].glob('*/type.raw'))), 0)
+        # the report does not depend on the filters
+        self.assertAlmostEqual(report.ratio('force', 'candidate'), 1.)
+
+    def test_budget_traj(self):
+        conf_selector = ConfSelectorLammpsFrames(
+            TrustLevel(0.1, 0.5),
+            max_numb_sel_traj = 1,
+        )
+        confs, report = conf_selector.select(
+            self.trajs, self.model_devis, self.traj_fmt, self.type_map)
+        ms = dpdata.MultiSystems()
+        ms.from_deepmd_npy(confs[0], labeled=False)
+        ss = ms[0]
+        self.assertEqual(ss.get_nframes(), 2)
+        self.assertAlmostEqual(ss['coords'][0][0][1], 4.87, places=2)
+        self.assertAlmostEqual(ss['coords'][1][0][1], 4.87, places=2)
+        # the report is computed before the budget
+        self.assertAlmostEqual(report.ratio('force', 'candidate'), 1.)
+
+    def test_budget(self):
+        Path('bar.md').write_text(textwrap.dedent(
+            """ #
+            0 0.1 0.0 0.0 0.45 0.0 0.0
+            0 0.2 0.0 0.0 0.3 0.0 0.0
+            0 0.3 0.0 0.0 0.4 0.0 0.0
+            """))
+        for numb_workers in [None, 2]:
+            conf_selector = ConfSelectorLammpsFrames(
+                TrustLevel(0.1, 0.5),
+                numb_workers = numb_workers,
+                max_numb_sel = 3,
+            )
+            confs, report = conf_selector.select(
+                self.trajs, self.model_devis, self.traj_fmt, self.type_map)
+            ms = dpdata.MultiSystems()
+            ms.from_deepmd_npy(confs[0], labeled=False)
+            ss = ms[0]
+            self.assertEqual(ss.get_nframes(), 3)
+            self.assertAlmostEqual(ss['coords'][0][0][1], 4.87, places=2)
+            self.assertAlmostEqual(ss['coords'][1][0][1], 2.87, places=2)
+            self.assertAlmostEqual(ss['coords'][2][0][1], 4.87, places=2)
+            self.assertAlmostEqual(report.ratio('force', 'candidate'), 1.)
+            shutil.rmtree(confs[0])
+
+    def test_budget_strategy(self):
+        with self.assertRaises(RuntimeError):
+            ConfSelectorLammpsFrames(TrustLevel(0.1, 0.5), budget_strategy = 'foo')
+
+    def test_conf_dedup(self):
+        # the frames of a trajectory are translations of each other
+        conf_selector = ConfSelectorLammpsFrames(
+            TrustLevel(0.1, 0.5),
+            conf_dedup = RdfConfDedup(3.0, 1e-3),
+        )
+        confs, report = conf_selector.select(
+            self.trajs, self.model_devis, self.traj_fmt, self.type_map)
+        ms = dpdata.MultiSystems()
+        ms.from_deepmd_npy(confs[0], labeled=False)
+        self.assertEqual(ms.get_nframes(), 2)
+        self.assertAlmostEqual(report.ratio('force', 'candidate'), 1.)
+
+    def test_binary_model_devi(self):
+        # the binary model deviations written by RunLmp are next to the text
+        for ii in self.model_devis:
+            dump_model_devi_npy(ii, ii.with_suffix('.npy'))
+        conf_selector = ConfSelectorLammpsFrames(
+            TrustLevel(0.25, 0.35),
+        )
+        with patch('numpy.loadtxt') as mocked_loadtxt:
+            confs, report = conf_selector.select(
+                self.trajs, self.model_devis, self.traj_fmt, self.type_map)
+        mocked_loadtxt.assert_not_called()
+        ms = dpdata.MultiSystems()
+        ms.from_deepmd_npy(confs[0], labeled=False)
+        self.assertEqual(ms.get_nframes(), 2)
+        self.assertAlmostEqual(report.ratio('force', 'candidate'), 1./3.)
+
+    def test_tags(self):
+        Path('bar.md').write_text(textwrap.dedent(
+            """ #
+            0 0.1 0.0 0.0 0.1 0.0 0.0
+            0 0.2 0.0 0.0 0.1 0.0 0.0
+            0 0.3 0.0 0.0 0.3 0.0 0.0
+            """))
+        conf_selector = ConfSelectorLammpsFrames(
+            TrustLevel(0.25, 0.35),
+            task_group_ids = [0, 1],
+            traj_tags = True,
+        )
+        confs, report = conf_selector.select(
+            self.trajs, self.model_devis, self.traj_fmt, self.type_map)
+        self.assertAlmostEqual(report.ratio('force', 'candidate'), 1./3.)
+        self.assertAlmostEqual(report.ratio('force', 'accurate', 'traj:foo.dump'), 1./3.)
+        self.assertAlmostEqual(report.ratio('force', 'accurate', 'traj:bar.dump'), 2./3.)
+        self.assertAlmostEqual(report.ratio('force', 'failed', 'task_group:0'), 1./3.)
+        self.assertAlmostEqual(report.ratio('force', 'candidate', 'task_group:1'), 1./3.)
+        self.assertEqual(report.histogram('force', 'task_group:1').numb, 3)
+        self.assertAlmostEqual(report.histogram('force', 'traj:foo.dump').max, 0.4)
+        shutil.rmtree(confs[0])
+        # only the task groups are tagged by default
+        confs, report = ConfSelectorLammpsFrames(
+            TrustLevel(0.25, 0.35), task_group_ids = [0, 1],
+        ).select(self.trajs, self.model_devis, self.traj_fmt, self.type_map)
+        self.assertEqual(sorted(report.tags.keys()), ['task_group:0', 'task_group:1'])
+        self.assertAlmostEqual(report.ratio('force', 'candidate', 'task_group:1'), 1./3.)
+        with self.assertRaises(RuntimeError):
+            report.ratio('force', 'accurate', 'traj:foo.dump')
+        with self.assertRaises(RuntimeError):
+            ConfSelectorLammpsFrames(
+                TrustLevel(0.25, 0.35), task_group_ids = [0],
+            ).select(self.trajs, self.model_devis, self.traj_fmt, self.type_map)
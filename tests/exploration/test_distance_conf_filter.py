@@ -0,0 +1,95 @@
+from context import dpgen2
+import itertools
+import numpy as np
+import unittest
+from dpgen2.exploration.selector import (
+    DistanceConfFilter,
+    CoordinationConfFilter,
+    ConfFilters,
+)
+from dpgen2.exploration.selector.distance_conf_filter import _neighbor_pairs
+from fake_data_set import fake_system
+
+def _brute_force_dist(coords, cell, nopbc, nimg = 2):
+    natoms = coords.shape[0]
+    if nopbc:
+        shifts = np.zeros([1, 3])
+    else:
+        shifts = np.array(list(itertools.product(range(-nimg, nimg+1), repeat=3))) @ cell
+    # dist[i, j, s]: distance between atom i and image s of atom j
+    diff = coords[None,:,None,:] + shifts[None,None,:,:] - coords[:,None,None,:]
+    dist = np.linalg.norm(diff, axis=-1)
+    zero = np.where(np.linalg.norm(shifts, axis=1) == 0)[0][0]
+    dist[np.arange(natoms), np.arange(natoms), zero] = np.inf
+    return dist
+
+
+class TestNeighborPairs(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(20)
+        self.cell = np.array([[5.0, 0.0, 0.0], [1.5, 4.5, 0.0], [-1.0, 0.8, 4.8]])
+        self.natoms = 40
+        self.coords = rng.random([self.natoms, 3]) @ self.cell + rng.normal(size=[self.natoms, 3])
+        self.atom_types = rng.integers(0, 2, size=self.natoms)
+
+    def _check_pairs(self, rcut, nopbc):
+        ii, jj, dist = _neighbor_pairs(self.coords, self.cell, rcut, nopbc)
+        ref = _brute_force_dist(self.coords, self.cell, nopbc)
+        ref_coord = np.sum(ref < rcut, axis=(1, 2))
+        np.testing.assert_equal(np.bincount(ii, minlength=self.natoms), ref_coord)
+        ref_pair = np.sum(ref < rcut, axis=2)
+        pair = np.zeros([self.natoms, self.natoms], dtype=int)
+        np.add.at(pair, (ii, jj), 1)
+        np.testing.assert_equal(pair, ref_pair)
+        self.assertAlmostEqual(np.min(dist), np.min(ref))
+
+    def test_pbc(self):
+        self._check_pairs(2.5, False)
+
+    def test_pbc_large_rcut(self):
+        # rcut larger than the cell, several images are needed
+        self._check_pairs(6.0, False)
+
+    def test_nopbc(self):
+        self._check_pairs(2.5, True)
+
+    def test_empty(self):
+        ii, jj, dist = _neighbor_pairs(np.zeros([0, 3]), self.cell, 2., False)
+        self.assertEqual(ii.size, 0)
+
+
+class TestDistanceConfFilter(unittest.TestCase):
+    def setUp(self):
+        self.cell = np.diag([10., 10., 10.])
+        self.coords = np.array([[0.2, 0., 0.], [9.4, 0., 0.], [5., 5., 5.]])
+        self.atom_types = np.array([0, 1, 1])
+
+    def test_min_dist(self):
+        # distance between atoms 0 and 1 is 0.8 across the boundary
+        self.assertFalse(DistanceConfFilter(1.0).check(self.coords, self.cell, self.atom_types, False))
+        self.assertTrue(DistanceConfFilter(0.7).check(self.coords, self.cell, self.atom_types, False))
+        # without pbc the distance is 9.2
+        self.assertTrue(DistanceConfFilter(1.0).check(self.coords, self.cell, self.atom_types, True))
+
+    def test_type_pair(self):
+        ff = DistanceConfFilter([[1.0, 0.5], [0.5, 1.0]])
+        self.assertTrue(ff.check(self.coords, self.cell, self.atom_types, False))
+        ff = DistanceConfFilter([[0.5, 1.0], [1.0, 0.5]])
+        self.assertFalse(ff.check(self.coords, self.cell, self.atom_types, False))
+
+    def test_not_symmetric(self):
+        with self.assertRaises(RuntimeError):
+            DistanceConfFilter([[1.0, 0.5], [0.6, 1.0]])
+
+    def test_coordination(self):
+        self.assertFalse(CoordinationConfFilter(1.0, 0).check(self.coords, self.cell, self.atom_types, False))
+        self.assertTrue(CoordinationConfFilter(1.0, 1).check(self.coords, self.cell, self.atom_types, False))
+
+    def test_conf_filters(self):
+        ss = fake_system(3, 2)
+        ss.data['cells'][:] = self.cell
+        ss.data['coords'][:,1,0] = [0.5, 2.0, 9.9]
+        filters = ConfFilters().add(DistanceConfFilter(1.0))
+        sel = filters.check(ss)
+        self.assertEqual(sel.get_nframes(), 1)
+        self.assertAlmostEqual(sel['coords'][0][1][0], 2.0)
@@ -368,6 +368,7 @@ class TestCPTStage(unittest.TestCase):
         
         ngroup = len(task_group)
         self.assertEqual(ngroup, 4)
+        self.assertEqual(stage.task_group_ids, [0, 0, 1, 1])
 
         ii = 0
         self.assertEqual(task_group[ii].files()[lmp_conf_name], 'foo')
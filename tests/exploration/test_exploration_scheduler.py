@@ -14,11 +14,17 @@ from dflow.python import (
 )
 from dpgen2.exploration.scheduler import (
     ConstTrustLevelStageScheduler,
+    AdaptiveTrustLevelStageScheduler,
     ExplorationScheduler,
 )
-from dpgen2.exploration.report import ExplorationReport
+from collections import Counter
+from dpgen2.exploration.report import (
+    ExplorationReport,
+    DeviHistogram,
+    HistExplorationReport,
+)
 from dpgen2.exploration.task import ExplorationTaskGroup, ExplorationStage
-from dpgen2.exploration.selector import TrustLevel, TrustLevelConfSelector
+from dpgen2.exploration.selector import TrustLevel, TrustLevelConfSelector, ConfSelectorLammpsFrames
 from mocked_ops import (
     MockedExplorationReport,
     MockedExplorationTaskGroup,
@@ -27,6 +33,10 @@ from mocked_ops import (
     MockedStage1,
 )
 
+class _MockedGroup(ExplorationTaskGroup):
+    def make_task(self):
+        return MockedExplorationTaskGroup()
+
 class TestConstTrustLevelStageScheduler(unittest.TestCase):
     def test_success(self):
         self.trust_level = TrustLevel(0.1, 0.3)
@@ -137,6 +147,149 @@ class TestConstTrustLevelStageScheduler(unittest.TestCase):
             conv, ltg, sel = self.scheduler.plan_next_iteration([], foo_report, [])
 
 
+class TestAdaptiveTrustLevelStageScheduler(unittest.TestCase):
+    def setUp(self):
+        # uniformly distributed force model deviations in [0, 1)
+        devi = (np.arange(1000) + 0.5) / 1000.
+        self.report = HistExplorationReport(
+            Counter({'candidate' : 200, 'accurate' : 200, 'failed' : 600}), None,
+            DeviHistogram(1.0, 200).add(devi),
+        )
+
+    def test_in_band(self):
+        scheduler = AdaptiveTrustLevelStageScheduler(
+            MockedStage(), TrustLevel(0.2, 0.4), 150, 250)
+        conv, ltg, sel = scheduler.plan_next_iteration()
+        self.assertEqual(conv, False)
+        self.assertTrue(isinstance(ltg, MockedExplorationTaskGroup))
+        self.assertTrue(isinstance(sel, ConfSelectorLammpsFrames))
+        conv, ltg, sel = scheduler.plan_next_iteration([], self.report, [])
+        self.assertEqual(conv, False)
+        self.assertAlmostEqual(sel.trust_level.level_f_lo, 0.2)
+        self.assertAlmostEqual(sel.trust_level.level_f_hi, 0.4)
+
+    def test_adjust(self):
+        scheduler = AdaptiveTrustLevelStageScheduler(
+            MockedStage(), TrustLevel(0.2, 0.4, 0.3, 0.6), 40, 60, 
+            level_f_lo_min = 0.01)
+        conv, ltg, sel = scheduler.plan_next_iteration([], self.report, [])
+        self.assertEqual(conv, False)
+        self.assertAlmostEqual(sel.trust_level.level_f_lo, 0.05)
+        self.assertAlmostEqual(sel.trust_level.level_f_hi, 0.10)
+        self.assertAlmostEqual(sel.trust_level.level_v_lo, 0.3)
+        self.assertAlmostEqual(sel.trust_level.level_v_hi, 0.6)
+
+    def test_bounded(self):
+        scheduler = AdaptiveTrustLevelStageScheduler(
+            MockedStage(), TrustLevel(0.2, 0.4), 40, 60)
+        conv, ltg, sel = scheduler.plan_next_iteration([], self.report, [])
+        self.assertAlmostEqual(sel.trust_level.level_f_lo, 0.1)
+        self.assertAlmostEqual(sel.trust_level.level_f_hi, 0.2)
+        scheduler = AdaptiveTrustLevelStageScheduler(
+            MockedStage(), TrustLevel(0.2, 0.4), 500, 600)
+        conv, ltg, sel = scheduler.plan_next_iteration([], self.report, [])
+        self.assertAlmostEqual(sel.trust_level.level_f_lo, 0.4)
+        self.assertAlmostEqual(sel.trust_level.level_f_hi, 0.8)
+
+    def test_task_group_ids(self):
+        stage = ExplorationStage()
+        stage.add_task_group(_MockedGroup()).add_task_group(_MockedGroup())
+        scheduler = AdaptiveTrustLevelStageScheduler(
+            stage, TrustLevel(0.2, 0.4), 150, 250)
+        conv, ltg, sel = scheduler.plan_next_iteration()
+        ntask = len(MockedExplorationTaskGroup())
+        self.assertEqual(len(ltg), 2 * ntask)
+        self.assertEqual(sel.task_group_ids, [0] * ntask + [1] * ntask)
+        # the trajectories are not tagged in the reports kept by the scheduler
+        self.assertFalse(sel.traj_tags)
+
+    def test_task_group_tagged_reports(self):
+        # the report of the selector: 100 trajectories of 10 frames
+        # in 2 task groups, only the task groups are tagged
+        devi = (np.arange(1000) + 0.5) / 1000.
+        report = HistExplorationReport()
+        for ii in range(100):
+            idevi = devi[ii::100]
+            report.merge(HistExplorationReport(
+                Counter({
+                    'candidate' : np.sum((idevi >= 0.2) & (idevi < 0.4)),
+                    'accurate' : np.sum(idevi < 0.2),
+                    'failed' : np.sum(idevi >= 0.4),
+                }), None,
+                DeviHistogram(1.0, 200).add(idevi),
+            ).tagged(f'task_group:{ii % 2}'))
+        self.assertEqual(sorted(report.tags.keys()), ['task_group:0', 'task_group:1'])
+        levels = []
+        for rr in [self.report, report]:
+            scheduler = AdaptiveTrustLevelStageScheduler(
+                MockedStage(), TrustLevel(0.2, 0.4), 40, 60)
+            conv, ltg, sel = scheduler.plan_next_iteration([None, rr], rr, [])
+            levels.append(sel.trust_level.level_f_lo)
+        self.assertAlmostEqual(levels[0], 0.1)
+        self.assertAlmostEqual(levels[1], levels[0])
+
+    def test_converged(self):
+        scheduler = AdaptiveTrustLevelStageScheduler(
+            MockedStage(), TrustLevel(0.2, 0.4), 40, 60)
+        report = MockedExplorationReport()
+        report.accurate = 0.95
+        conv, ltg, sel = scheduler.plan_next_iteration([], report, [])
+        self.assertEqual(conv, True)
+        self.assertTrue(ltg is None)
+        self.assertTrue(sel is None)
+
+    def test_converged_at_init_level(self):
+        scheduler = AdaptiveTrustLevelStageScheduler(
+            MockedStage(), TrustLevel(0.2, 0.4), 40, 60)
+        # the accurate ratio of the report is judged at a loosened level
+        report = HistExplorationReport(
+            Counter({'candidate' : 50, 'accurate' : 950, 'failed' : 0}), None,
+            self.report.histogram('force'),
+        )
+        conv, ltg, sel = scheduler.plan_next_iteration([], report, [])
+        self.assertEqual(conv, False)
+        # all the deviations are below the initial level
+        devi = (np.arange(1000) + 0.5) / 1000. * 0.15
+        report = HistExplorationReport(
+            Counter({'candidate' : 500, 'accurate' : 500, 'failed' : 0}), None,
+            DeviHistogram(1.0, 200).add(devi),
+        )
+        conv, ltg, sel = scheduler.plan_next_iteration([], report, [])
+        self.assertEqual(conv, True)
+
+    def test_hist_reports(self):
+        # the deviations of the previous iteration are in [0, 0.5)
+        devi = (np.arange(1000) + 0.5) / 1000. * 0.5
+        prev_report = HistExplorationReport(
+            Counter({'candidate' : 200, 'accurate' : 200, 'failed' : 600}), None,
+            DeviHistogram(1.0, 200).add(devi),
+        )
+        # 200 candidates in the current report, 400 in the previous one
+        scheduler = AdaptiveTrustLevelStageScheduler(
+            MockedStage(), TrustLevel(0.2, 0.4), 150, 250, hist_decay = 0.)
+        conv, ltg, sel = scheduler.plan_next_iteration(
+            [None, prev_report], self.report, [])
+        self.assertAlmostEqual(sel.trust_level.level_f_lo, 0.2)
+        # the weighted estimate is (200 + 0.5 * 400) / 1.5 = 267, 
+        # (1000 * lo + 0.5 * 2000 * lo) / 1.5 = 200 at lo = 0.15
+        scheduler = AdaptiveTrustLevelStageScheduler(
+            MockedStage(), TrustLevel(0.2, 0.4), 150, 250)
+        conv, ltg, sel = scheduler.plan_next_iteration(
+            [None, prev_report], self.report, [])
+        self.assertAlmostEqual(sel.trust_level.level_f_lo, 0.15)
+        self.assertAlmostEqual(sel.trust_level.level_f_hi, 2. * sel.trust_level.level_f_lo)
+        with self.assertRaises(RuntimeError):
+            AdaptiveTrustLevelStageScheduler(
+                MockedStage(), TrustLevel(0.2, 0.4), 150, 250, hist_decay = 2.)
+
+    def test_max_numb_iter(self):
+        scheduler = AdaptiveTrustLevelStageScheduler(
+            MockedStage(), TrustLevel(0.2, 0.4), 150, 250, max_numb_iter = 1)
+        scheduler.plan_next_iteration()
+        with self.assertRaisesRegex(FatalError, 'reached maximal number of iterations'):
+            scheduler.plan_next_iteration([], self.report, [])
+
+
 class TestExplorationScheduler(unittest.TestCase):
     def test_success(self):
         scheduler = ExplorationScheduler()        
@@ -200,6 +353,60 @@ class TestExplorationScheduler(unittest.TestCase):
         self.assertEqual(scheduler.get_iteration(), 2)
 
 
+    def test_early_conv(self):
+        scheduler = ExplorationScheduler(early_conv_window = 2, early_conv_gain = 0.05)
+        scheduler.add_stage_scheduler(
+            ConstTrustLevelStageScheduler(MockedStage(), TrustLevel(0.1, 0.3)))
+        scheduler.add_stage_scheduler(
+            ConstTrustLevelStageScheduler(MockedStage1(), TrustLevel(0.2, 0.4)))
+        reports = []
+        for accu in [0.5, 0.84, 0.86]:
+            rr = MockedExplorationReport()
+            rr.accurate = accu
+            reports.append(rr)
+
+        conv, ltg, sel = scheduler.plan_next_iteration()
+        self.assertTrue(isinstance(ltg, MockedExplorationTaskGroup))
+        # only one report, no prediction
+        conv, ltg, sel = scheduler.plan_next_iteration(reports[0], [])
+        self.assertTrue(isinstance(ltg, MockedExplorationTaskGroup))
+        self.assertEqual(scheduler.get_stage(), 0)
+        # gain 0.34
+        conv, ltg, sel = scheduler.plan_next_iteration(reports[1], [])
+        self.assertTrue(isinstance(ltg, MockedExplorationTaskGroup))
+        self.assertEqual(scheduler.get_stage(), 0)
+        # gain 0.02, the projected 0.88 is close to the conv_accuracy 0.9, 
+        # goes to the next stage
+        conv, ltg, sel = scheduler.plan_next_iteration(reports[2], [])
+        self.assertEqual(conv, False)
+        self.assertTrue(isinstance(ltg, MockedExplorationTaskGroup1))
+        self.assertEqual(scheduler.get_stage(), 1)
+        self.assertEqual(scheduler.get_iteration(), 3)
+        # the reports of the previous stage are not used
+        conv, ltg, sel = scheduler.plan_next_iteration(reports[2], [])
+        self.assertTrue(isinstance(ltg, MockedExplorationTaskGroup1))
+        self.assertEqual(scheduler.get_stage(), 1)
+
+    def test_early_conv_not_converged(self):
+        # decreasing, flat, and small gain far from the conv_accuracy
+        for accus in [[0.3, 0.25], [0.86, 0.86], [0.5, 0.51]]:
+            scheduler = ExplorationScheduler(early_conv_window = 2, early_conv_gain = 0.05)
+            scheduler.add_stage_scheduler(
+                ConstTrustLevelStageScheduler(MockedStage(), TrustLevel(0.1, 0.3)))
+            scheduler.plan_next_iteration()
+            for accu in accus:
+                rr = MockedExplorationReport()
+                rr.accurate = accu
+                conv, ltg, sel = scheduler.plan_next_iteration(rr, [])
+                self.assertEqual(conv, False)
+                self.assertTrue(isinstance(ltg, MockedExplorationTaskGroup))
+                self.assertEqual(scheduler.get_stage(), 0)
+
+    def test_early_conv_window(self):
+        with self.assertRaises(RuntimeError):
+            ExplorationScheduler(early_conv_window = 1)
+
+
     def test_continue_adding_success(self):
         scheduler = ExplorationScheduler()        
         trust_level = TrustLevel(0.1, 0.3)
@@ -0,0 +1,69 @@
+from context import dpgen2
+import os, textwrap, dpdata
+import numpy as np
+import unittest
+from pathlib import Path
+from dpgen2.exploration.selector import (
+    LammpsDumpReader,
+)
+
+def _make_frame(step, shift):
+    return textwrap.dedent(
+        f"""ITEM: TIMESTEP
+        {step}
+        ITEM: NUMBER OF ATOMS
+        3
+        ITEM: BOX BOUNDS xy xz yz pp pp pp
+        1.0000000000000000e+00 1.3444699999999999e+01 5.0000000000000000e-01
+        2.0000000000000000e+00 1.4444699999999999e+01 0.0000000000000000e+00
+        3.0000000000000000e+00 1.5444699999999999e+01 0.0000000000000000e+00
+        ITEM: ATOMS id type x y z fx fy fz
+        1 2 11.09 {2.87+shift} 4.74 0.183043 -0.287677 -0.0974527
+        2 1 11.83 {2.56+shift} 4.18 -0.224674 0.5841 0.074659
+        3 2 12.25 {3.32+shift} 3.68 0.0416311 -0.296424 0.0227936
+        """)
+
+
+class TestLammpsDumpReader(unittest.TestCase):
+    def setUp(self):
+        self.nframes = 5
+        self.dump_file = Path('reader.dump')
+        self.dump_file.write_text(
+            ''.join([_make_frame(ii, float(ii)) for ii in range(self.nframes)]))
+        self.type_map = ['O', 'H']
+        self.ref = dpdata.System(
+            str(self.dump_file), fmt='lammps/dump', type_map=self.type_map)
+
+    def tearDown(self):
+        if self.dump_file.is_file():
+            os.remove(self.dump_file)
+
+    def test_nframes(self):
+        reader = LammpsDumpReader(self.dump_file, self.type_map)
+        self.assertEqual(reader.get_nframes(), self.nframes)
+        self.assertEqual(len(reader), self.nframes)
+
+    def test_read_frames(self):
+        reader = LammpsDumpReader(self.dump_file, self.type_map)
+        idx = [1, 3, 4]
+        ss = reader.read_frames(idx)
+        ref = self.ref.sub_system(idx)
+        self.assertEqual(ss.get_nframes(), 3)
+        self.assertEqual(ss['atom_names'], ref['atom_names'])
+        self.assertEqual(ss['atom_numbs'], ref['atom_numbs'])
+        np.testing.assert_equal(ss['atom_types'], ref['atom_types'])
+        np.testing.assert_almost_equal(ss['cells'], ref['cells'])
+        np.testing.assert_almost_equal(ss['coords'], ref['coords'])
+
+    def test_read_empty(self):
+        reader = LammpsDumpReader(self.dump_file, self.type_map)
+        ss = reader.read_frames([])
+        self.assertEqual(ss.get_nframes(), 0)
+        self.assertEqual(ss['atom_names'], self.ref['atom_names'])
+        self.assertEqual(ss['atom_numbs'], self.ref['atom_numbs'])
+
+    def test_out_of_range(self):
+        reader = LammpsDumpReader(self.dump_file, self.type_map)
+        with self.assertRaises(RuntimeError) as context:
+            reader.read_frames([self.nframes])
+        self.assertTrue('out of range' in str(context.exception))
@@ -0,0 +1,154 @@
+from context import dpgen2
+import unittest, jsonpickle
+from mock import patch
+from dpgen2.exploration.task.lmp import (
+    make_lmp_input,
+    LmpInputTemplate,
+)
+from dpgen2.exploration.task import NPTTaskGroup
+
+# the inputs written by make_lmp_input before the template was introduced,
+# with the velocity seed 1111
+npt_input = '\n'.join([
+    'variable        NSTEPS          equal 1000',
+    'variable        THERMO_FREQ     equal 10',
+    'variable        DUMP_FREQ       equal 10',
+    'variable        TEMP            equal 100.000000',
+    'variable        PRES            equal 1.000000',
+    'variable        TAU_T           equal 0.100000',
+    'variable        TAU_P           equal 0.500000',
+    '',
+    'units           metal',
+    'boundary        p p p',
+    'atom_style      atomic',
+    '',
+    'neighbor        1.0 bin',
+    '',
+    'box          tilt large',
+    'if "${restart} > 0" then "read_restart dpgen.restart.*" else "read_data conf.lmp"',
+    'change_box   all triclinic',
+    'mass            1 1.000000',
+    'mass            2 16.000000',
+    'pair_style      deepmd model.000.pb model.001.pb  out_freq ${THERMO_FREQ} out_file model_devi.out ',
+    'pair_coeff      ',
+    '',
+    'thermo_style    custom step temp pe ke etotal press vol lx ly lz xy xz yz',
+    'thermo          ${THERMO_FREQ}',
+    'dump            1 all custom ${DUMP_FREQ} traj/*.lammpstrj id type x y z fx fy fz',
+    'restart         10000 dpgen.restart',
+    '',
+    'if "${restart} == 0" then "velocity        all create ${TEMP} 1111"',
+    'fix             1 all npt temp ${TEMP} ${TEMP} ${TAU_T} iso ${PRES} ${PRES} ${TAU_P}',
+    '',
+    'timestep        0.001000',
+    'run             ${NSTEPS} upto',
+]) + '\n'
+
+nvt_input = '\n'.join([
+    'variable        NSTEPS          equal 500',
+    'variable        THERMO_FREQ     equal 20',
+    'variable        DUMP_FREQ       equal 20',
+    'variable        TEMP            equal 300.000000',
+    'variable        ELE_TEMP        equal 2.000000',
+    'variable        TAU_T           equal 0.100000',
+    '',
+    'units           metal',
+    'boundary        f f f',
+    'atom_style      atomic',
+    '',
+    'neighbor        1.0 bin',
+    'neigh_modify    delay 2',
+    '',
+    'box          tilt large',
+    'if "${restart} > 0" then "read_restart dpgen.restart.*" else "read_data conf.lmp"',
+    'change_box   all triclinic',
+    'mass            1 1.000000',
+    'pair_style      deepmd model.000.pb  out_freq ${THERMO_FREQ} out_file model_devi.out relative 0.1 fparam ${ELE_TEMP}',
+    'pair_coeff      ',
+    '',
+    'thermo_style    custom step temp pe ke etotal press vol lx ly lz xy xz yz',
+    'thermo          ${THERMO_FREQ}',
+    'dump            1 all custom ${DUMP_FREQ} dump.traj id type x y z fx fy fz',
+    'restart         10000 dpgen.restart',
+    '',
+    'if "${restart} == 0" then "velocity        all create ${TEMP} 1111"',
+    'fix             1 all nvt temp ${TEMP} ${TEMP} ${TAU_T}',
+    'velocity        all zero linear',
+    'fix             fm all momentum 1 linear 1 1 1',
+    '',
+    'timestep        0.002000',
+    'run             ${NSTEPS} upto',
+]) + '\n'
+
+
+class TestLmpInputTemplate(unittest.TestCase):
+    @patch('dpgen2.exploration.task.lmp.lmp_input.random')
+    def test_render(self, mock_random):
+        mock_random.randrange.return_value = 1110
+        template = LmpInputTemplate(
+            'conf.lmp', 'npt', ['model.000.pb', 'model.001.pb'], 1000, 0.001, None, 10, [1., 16.],
+            has_pres = True,
+        )
+        self.assertEqual(template.render(100., 1.), npt_input)
+        self.assertEqual(
+            template.render(300., 10.),
+            npt_input.replace('equal 100.000000', 'equal 300.000000')\
+            .replace('PRES            equal 1.000000', 'PRES            equal 10.000000'))
+        self.assertEqual(
+            make_lmp_input(
+                'conf.lmp', 'npt', ['model.000.pb', 'model.001.pb'], 1000, 0.001, None, 10, [1., 16.],
+                100., pres = 1.),
+            npt_input)
+        with self.assertRaises(RuntimeError):
+            template.render(100.)
+
+    @patch('dpgen2.exploration.task.lmp.lmp_input.random')
+    def test_render_options(self, mock_random):
+        mock_random.randrange.return_value = 1110
+        template = LmpInputTemplate(
+            'conf.lmp', 'nvt', ['model.000.pb'], 500, 0.002, 2, 20, [1.],
+            relative_f_epsilon = 0.1, ele_temp_f = 2., nopbc = True, 
+            trj_seperate_files = False,
+        )
+        self.assertEqual(template.render(300.), nvt_input)
+        self.assertEqual(
+            make_lmp_input(
+                'conf.lmp', 'nvt', ['model.000.pb'], 500, 0.002, 2, 20, [1.], 300.,
+                relative_f_epsilon = 0.1, ele_temp_f = 2., nopbc = True, 
+                trj_seperate_files = False),
+            nvt_input)
+
+    @patch('dpgen2.exploration.task.lmp.lmp_input.random')
+    def test_escape(self, mock_random):
+        mock_random.randrange.return_value = 1110
+        template = LmpInputTemplate(
+            'conf%d.lmp', 'nvt', ['model%s.pb'], 1000, 0.001, None, 10, [1.],
+        )
+        ret = template.render(100.)
+        self.assertTrue('read_data conf%d.lmp' in ret)
+        self.assertTrue('deepmd model%s.pb ' in ret)
+        self.assertTrue('all create ${TEMP} 1111' in ret)
+
+    def test_npt_requires_pres(self):
+        with self.assertRaises(RuntimeError):
+            LmpInputTemplate('conf.lmp', 'npt', ['model.pb'], 1000, 0.001, None, 10, [1.])
+
+    def test_cached_in_task_group(self):
+        tgroup = NPTTaskGroup()
+        tgroup.set_conf(['foo', 'bar'])
+        tgroup.set_md(2, [1., 16.], [100., 200.], [1., 10.])
+        with patch('dpgen2.exploration.task.npt_task_group.LmpInputTemplate', 
+                   wraps=LmpInputTemplate) as mocked:
+            tgroup.make_task()
+            tgroup.make_task()
+        self.assertEqual(len(tgroup), 8)
+        self.assertEqual(mocked.call_count, 1)
+        # the template is kept by the jsonpickle round trip between iterations
+        tgroup = jsonpickle.decode(jsonpickle.encode(tgroup))
+        self.assertEqual(list(tgroup.lmp_templates.keys()), ['pres'])
+        with patch('dpgen2.exploration.task.npt_task_group.LmpInputTemplate', 
+                   wraps=LmpInputTemplate) as mocked:
+            tgroup.make_task()
+        self.assertEqual(len(tgroup), 8)
+        self.assertEqual(mocked.call_count, 0)
+        self.assertEqual(list(tgroup.lmp_templates.keys()), ['pres'])
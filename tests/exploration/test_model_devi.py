@@ -0,0 +1,78 @@
+from context import dpgen2
+import os, textwrap
+import numpy as np
+import unittest
+from pathlib import Path
+from mock import patch
+from dpgen2.exploration.selector import (
+    load_model_devi,
+    dump_model_devi_npy,
+)
+
+class TestLoadModelDevi(unittest.TestCase):
+    def setUp(self):
+        self.fname = Path('model_devi.test.out')
+        self.fname.write_text(textwrap.dedent(
+            """#       step         max_devi_v         min_devi_v         avg_devi_v         max_devi_f         min_devi_f         avg_devi_f
+            0 0.1 0.0 0.0 0.2 0.0 0.0
+            10 0.2 0.0 0.0 0.3 0.0 0.0
+            20 0.3 0.0 0.0 0.4 0.0 0.0
+            """))
+        self.cache_file = Path('model_devi.test.out.fv.npy')
+        self.bin_file = Path('model_devi.test.npy')
+
+    def tearDown(self):
+        for ii in [self.fname, self.cache_file, self.bin_file]:
+            if ii.is_file():
+                os.remove(ii)
+
+    def test_load_text(self):
+        mdf, mdv = load_model_devi(self.fname, cache=False)
+        np.testing.assert_almost_equal(mdf, [0.2, 0.3, 0.4])
+        np.testing.assert_almost_equal(mdv, [0.1, 0.2, 0.3])
+        self.assertFalse(self.cache_file.is_file())
+
+    def test_cache(self):
+        mdf, mdv = load_model_devi(self.fname)
+        self.assertTrue(self.cache_file.is_file())
+        np.testing.assert_almost_equal(np.load(self.cache_file), [[0.2, 0.1], [0.3, 0.2], [0.4, 0.3]])
+        # the cache is used if it is not older than the text file
+        np.save(self.cache_file, np.array([[1., 2.]]))
+        mdf, mdv = load_model_devi(self.fname)
+        np.testing.assert_almost_equal(mdf, [1.])
+        np.testing.assert_almost_equal(mdv, [2.])
+
+    def test_stale_cache(self):
+        np.save(self.cache_file, np.array([[1., 2.]]))
+        stat = os.stat(self.fname)
+        os.utime(self.cache_file, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10**9))
+        mdf, mdv = load_model_devi(self.fname)
+        np.testing.assert_almost_equal(mdf, [0.2, 0.3, 0.4])
+        np.testing.assert_almost_equal(mdv, [0.1, 0.2, 0.3])
+        np.testing.assert_almost_equal(np.load(self.cache_file), [[0.2, 0.1], [0.3, 0.2], [0.4, 0.3]])
+
+    def test_binary(self):
+        ret = dump_model_devi_npy(self.fname, 'model_devi.test')
+        self.assertEqual(ret, self.bin_file)
+        self.assertTrue(self.bin_file.is_file())
+        mdf, mdv = load_model_devi(self.bin_file)
+        np.testing.assert_almost_equal(mdf, [0.2, 0.3, 0.4])
+        np.testing.assert_almost_equal(mdv, [0.1, 0.2, 0.3])
+
+    def test_binary_next_to_text(self):
+        dump_model_devi_npy(self.fname, self.bin_file)
+        # the text file is not parsed if the binary file is next to it
+        with patch('numpy.loadtxt') as mocked_loadtxt:
+            mdf, mdv = load_model_devi(self.fname)
+        mocked_loadtxt.assert_not_called()
+        np.testing.assert_almost_equal(mdf, [0.2, 0.3, 0.4])
+        np.testing.assert_almost_equal(mdv, [0.1, 0.2, 0.3])
+        self.assertFalse(self.cache_file.is_file())
+
+    def test_stale_binary_next_to_text(self):
+        np.save(self.bin_file, np.array([[0., 2., 0., 0., 1., 0., 0.]]))
+        stat = os.stat(self.fname)
+        os.utime(self.bin_file, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10**9))
+        mdf, mdv = load_model_devi(self.fname)
+        np.testing.assert_almost_equal(mdf, [0.2, 0.3, 0.4])
+        np.testing.assert_almost_equal(mdv, [0.1, 0.2, 0.3])
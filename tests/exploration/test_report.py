@@ -3,7 +3,11 @@ import os, textwrap
 import numpy as np
 import unittest
 from collections import Counter
-from dpgen2.exploration.report import NaiveExplorationReport
+from dpgen2.exploration.report import (
+    NaiveExplorationReport,
+    DeviHistogram,
+    HistExplorationReport,
+)
 
 class TestNaiveExplorationReport(unittest.TestCase):
     def test_naive_fv(self):
@@ -64,3 +68,87 @@ class TestNaiveExplorationReport(unittest.TestCase):
         with self.assertRaises(RuntimeError) as context:
             report.ratio('force', 'bar')
         self.assertTrue('invalid item bar' in str(context.exception))
+
+
+class TestDeviHistogram(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.devi = rng.random(1000) * 0.5
+        self.devi[:10] += 1.
+        
+    def test_moments(self):
+        hist = DeviHistogram(1.0, 100).add(self.devi)
+        self.assertEqual(hist.numb, 1000)
+        self.assertEqual(hist.counts[-1], 10)
+        self.assertAlmostEqual(hist.mean, np.mean(self.devi))
+        self.assertAlmostEqual(hist.std, np.std(self.devi))
+        self.assertAlmostEqual(hist.max, np.max(self.devi))
+
+    def test_merge(self):
+        hist = DeviHistogram(1.0, 100).add(self.devi)
+        hist_0 = DeviHistogram(1.0, 100).add(self.devi[:300])
+        hist_1 = DeviHistogram(1.0, 100).add(self.devi[300:])
+        merged = hist_0 + hist_1
+        self.assertEqual(hist_0.numb, 300)
+        np.testing.assert_equal(merged.counts, hist.counts)
+        self.assertAlmostEqual(merged.mean, hist.mean)
+        self.assertAlmostEqual(merged.m2, hist.m2)
+        self.assertAlmostEqual(merged.min, hist.min)
+        with self.assertRaises(RuntimeError):
+            hist_0.merge(DeviHistogram(1.0, 50))
+
+    def test_quantile(self):
+        hist = DeviHistogram(1.0, 100).add(self.devi)
+        for qq in [0.1, 0.5, 0.9]:
+            self.assertAlmostEqual(hist.quantile(qq), np.quantile(self.devi, qq), delta=0.01)
+        self.assertAlmostEqual(hist.quantile(1.), np.max(self.devi))
+        self.assertIsNone(DeviHistogram().quantile(0.5))
+
+    def test_count_below(self):
+        hist = DeviHistogram(1.0, 100).add(self.devi)
+        for xx in [0.1, 0.25, 0.4]:
+            self.assertAlmostEqual(hist.count_below(xx), np.sum(self.devi < xx), delta=5)
+        self.assertAlmostEqual(hist.count_below(1.0), 990)
+        self.assertAlmostEqual(hist.count_below(2.0), 1000)
+        self.assertAlmostEqual(hist.count_below(-1.0), 0)
+
+
+class TestHistExplorationReport(unittest.TestCase):
+    def test_ratio(self):
+        counter_f = Counter({'candidate' : 5, 'accurate' : 4, 'failed' : 1})
+        counter_v = Counter()
+        report = HistExplorationReport(counter_f, counter_v)
+        self.assertAlmostEqual(report.ratio('force', 'candidate'), 0.5)
+        self.assertAlmostEqual(report.candidate_ratio(), 0.5)
+        self.assertAlmostEqual(report.accurate_ratio(), 0.4)
+        self.assertAlmostEqual(report.failed_ratio(), 0.1)
+        self.assertIsNone(report.ratio('virial', 'candidate'))
+        with self.assertRaises(RuntimeError):
+            report.ratio('foo', 'candidate')
+        with self.assertRaises(RuntimeError):
+            report.ratio('force', 'foo')
+
+    def test_merge_tags(self):
+        devi_0 = np.array([0.1, 0.2, 0.3, 0.4])
+        devi_1 = np.array([0.05, 0.15])
+        report_0 = HistExplorationReport(
+            Counter({'candidate' : 2, 'accurate' : 1, 'failed' : 1}), None,
+            DeviHistogram().add(devi_0),
+        ).tagged('foo')
+        report_1 = HistExplorationReport(
+            Counter({'candidate' : 0, 'accurate' : 2, 'failed' : 0}), None,
+            DeviHistogram().add(devi_1),
+        ).tagged('bar')
+        report = report_0 + report_1
+        self.assertAlmostEqual(report.candidate_ratio(), 1./3.)
+        self.assertAlmostEqual(report.candidate_ratio('foo'), 0.5)
+        self.assertAlmostEqual(report.accurate_ratio('bar'), 1.)
+        self.assertEqual(report.histogram('force').numb, 6)
+        self.assertEqual(report.histogram('force', 'foo').numb, 4)
+        self.assertAlmostEqual(report.quantile('force', 1., 'bar'), 0.15)
+        self.assertAlmostEqual(report.count('force', 0.0, 0.25), 4., delta=0.5)
+        with self.assertRaises(RuntimeError):
+            report.candidate_ratio('baz')
+        # the merged reports are not changed
+        self.assertEqual(report_0.histogram('force').numb, 4)
+        self.assertEqual(list(report_0.tags.keys()), ['foo'])
@@ -0,0 +1,93 @@
+from context import dpgen2
+import os, shutil, json
+import unittest
+from pathlib import Path
+from dpgen2.exploration.task import (
+    ExplorationTask,
+    ExplorationTaskGroup,
+    dump_task_group,
+    load_task_group_index,
+    render_task_file,
+    NPTTaskGroup,
+)
+
+class TestTaskGroupStore(unittest.TestCase):
+    def setUp(self):
+        self.path = Path('task_grp_store')
+        self.grp = ExplorationTaskGroup()
+        for ii in range(4):
+            tt = ExplorationTask()
+            tt.add_file('conf.lmp', f'conf {ii % 2}')
+            tt.add_file('in.lammps', 'the shared input')
+            self.grp.add_task(tt)
+
+    def tearDown(self):
+        if self.path.is_dir():
+            shutil.rmtree(self.path)
+
+    def _read_blob(self, hh):
+        return (self.path / 'blobs' / hh).read_text()
+
+    def test_dedup(self):
+        dump_task_group(self.grp, self.path)
+        # 2 confs and 1 input
+        self.assertEqual(len(list((self.path / 'blobs').iterdir())), 3)
+        index = load_task_group_index(self.path)
+        self.assertEqual(len(index), 4)
+        self.assertEqual(index[0]['in.lammps'], index[3]['in.lammps'])
+        self.assertEqual(index[0]['conf.lmp'], index[2]['conf.lmp'])
+        self.assertNotEqual(index[0]['conf.lmp'], index[1]['conf.lmp'])
+        for ii, record in enumerate(index):
+            files = {fname : self._read_blob(hh) for fname, hh in record.items()}
+            self.assertEqual(files, self.grp[ii].files())
+
+    def test_template(self):
+        grp = ExplorationTaskGroup()
+        template = 'temp %(temp)f seed %(seed)d\n'
+        for ii in range(4):
+            tt = ExplorationTask()
+            tt.add_file('conf.lmp', f'conf {ii % 2}')
+            tt.add_file_template('in.lammps', template, {'temp' : 100. * ii, 'seed' : ii + 1})
+            grp.add_task(tt)
+        self.assertEqual(grp[2].files()['in.lammps'], 'temp 200.000000 seed 3\n')
+        dump_task_group(grp, self.path)
+        # 2 confs and 1 template
+        self.assertEqual(len(list((self.path / 'blobs').iterdir())), 3)
+        index = load_task_group_index(self.path)
+        for ii, record in enumerate(index):
+            entry = record['in.lammps']
+            self.assertEqual(entry['params'], {'temp' : 100. * ii, 'seed' : ii + 1})
+            self.assertEqual(self._read_blob(entry['template']), template)
+            self.assertEqual(
+                render_task_file(self._read_blob(entry['template']), entry['params']),
+                grp[ii].files()['in.lammps'])
+            self.assertEqual(self._read_blob(record['conf.lmp']), f'conf {ii % 2}')
+
+    def test_npt_task_group(self):
+        grp = NPTTaskGroup()
+        grp.set_md(2, [1., 16.], [100., 200.], [1., 10.])
+        grp.set_conf(['foo'])
+        grp.make_task()
+        dump_task_group(grp, self.path)
+        # 1 conf and 1 template of the input
+        self.assertEqual(len(list((self.path / 'blobs').iterdir())), 2)
+        index = load_task_group_index(self.path)
+        self.assertEqual(len(index), 4)
+        self.assertEqual(
+            [(rr['in.lammps']['params']['temp'], rr['in.lammps']['params']['pres']) for rr in index],
+            [(100., 1.), (100., 10.), (200., 1.), (200., 10.)])
+        for ii, record in enumerate(index):
+            entry = record['in.lammps']
+            self.assertEqual(
+                render_task_file(self._read_blob(entry['template']), entry['params']),
+                grp[ii].files()['in.lammps'])
+
+    def test_none(self):
+        dump_task_group(None, self.path)
+        self.assertEqual(load_task_group_index(self.path), [])
+
+    def test_version(self):
+        dump_task_group(self.grp, self.path)
+        (self.path / 'index.json').write_text(json.dumps({'version' : 0, 'tasks' : []}))
+        with self.assertRaises(RuntimeError):
+            load_task_group_index(self.path)
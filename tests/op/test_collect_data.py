@@ -0,0 +1,67 @@
+from op.context import dpgen2
+import numpy as np
+import unittest, json, shutil, os
+from pathlib import Path
+import dpdata
+from fake_data_set import fake_system, fake_multi_sys
+from dflow.python import (
+    OP,
+    OPIO,
+)
+from dpgen2.op.collect_data import CollectData
+from dpgen2.constants import (
+    data_provenance_name,
+)
+from dpgen2.utils.data_index import load_data_index
+
+class TestCollectData(unittest.TestCase):
+    def setUp(self):
+        self.iter_data = [Path('iter_data/iter-000000'), Path('iter_data/iter-000001')]
+        for ii in self.iter_data:
+            ii.mkdir(exist_ok=True, parents=True)
+        self.labeled_data = [Path(f'labeled/data_task.{ii:06d}') for ii in range(4)]
+        # task 0, 2 and the system foo3 of task 3 are of the same formula
+        systems = [fake_system(1, 3), fake_system(1, 5), fake_system(2, 3)]
+        for idx, ss in enumerate(systems):
+            ss.data['coords'] += idx
+            ss.to_deepmd_npy(self.labeled_data[idx])
+        ms = fake_multi_sys([1, 2], [3, 2])
+        for ss in ms.systems.values():
+            ss.data['coords'] += 3
+        ms.to_deepmd_npy(self.labeled_data[3])
+        self.name = 'iter-000002'
+
+    def tearDown(self):
+        for ii in ['iter_data', 'labeled', self.name]:
+            if Path(ii).exists():
+                shutil.rmtree(ii)
+
+    def test(self):
+        op = CollectData()
+        out = op.execute(OPIO({
+            'name' : self.name,
+            'labeled_data' : self.labeled_data,
+            'iter_data' : self.iter_data,
+        }))
+        self.assertEqual(out['iter_data'], self.iter_data + [Path(self.name)])
+        name = Path(self.name)
+        self.assertEqual(
+            load_data_index(name), 
+            [
+                {'path' : 'foo2', 'nframes' : 2},
+                {'path' : 'foo3', 'nframes' : 4},
+                {'path' : 'foo5', 'nframes' : 1},
+            ])
+        # the frames are merged in order
+        ss = dpdata.LabeledSystem(str(name/'foo3'), fmt='deepmd/npy')
+        np.testing.assert_equal(ss['coords'][:, 0, 0], [0, 2, 2, 3])
+        provenance = json.loads((name/data_provenance_name).read_text())
+        self.assertEqual(provenance['systems']['foo3'], [
+            {'source' : 'data_task.000000', 'frame_start' : 0, 'nframes' : 1},
+            {'source' : 'data_task.000002', 'frame_start' : 1, 'nframes' : 2},
+            {'source' : 'data_task.000003/foo3', 'frame_start' : 3, 'nframes' : 1},
+        ])
+        self.assertEqual(provenance['systems']['foo5'], [
+            {'source' : 'data_task.000001', 'frame_start' : 0, 'nframes' : 1},
+        ])
+
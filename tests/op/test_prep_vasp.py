@@ -0,0 +1,95 @@
+from op.context import dpgen2
+import numpy as np
+import unittest, json, shutil, os
+from pathlib import Path
+import dpdata
+from dflow.python import (
+    OP,
+    OPIO,
+)
+from dpgen2.fp.vasp import VaspInputs
+from dpgen2.op.prep_vasp import PrepVasp, make_poscars, vasp_blob_store_name
+from dpgen2.constants import (
+    vasp_task_pattern,
+    vasp_conf_name,
+    vasp_input_name,
+    vasp_pot_name,
+)
+from dpdata.vasp.poscar import from_system_data
+
+
+def _make_system(nframes, atom_names, atom_numbs, atom_types, seed=0):
+    rng = np.random.default_rng(seed)
+    ss = dpdata.System()
+    ss.data['atom_names'] = list(atom_names)
+    ss.data['atom_numbs'] = list(atom_numbs)
+    ss.data['atom_types'] = np.array(atom_types, dtype=int)
+    ss.data['cells'] = np.array([np.diag(ii) for ii in rng.random([nframes, 3]) * 5 + 5])
+    ss.data['coords'] = rng.random([nframes, len(atom_types), 3]) * 10
+    ss.data['orig'] = np.zeros(3)
+    return ss
+
+
+class TestVaspInputs(unittest.TestCase):
+    def test_make_potcar(self):
+        vi = VaspInputs('incar', {'O' : 'pot O\n', 'H' : 'pot H\n'})
+        poscar = from_system_data(_make_system(1, ['H', 'O'], [2, 1], [1, 0, 0]))
+        self.assertEqual(vi.make_potcar(poscar), 'pot H\npot O\n')
+        with self.assertRaises(RuntimeError):
+            vi.make_potcar_by_atom_names(['C'])
+
+
+class TestPrepVasp(unittest.TestCase):
+    def setUp(self):
+        self.systems = [
+            _make_system(2, ['O', 'H'], [1, 2], [1, 0, 1], seed=0),
+            _make_system(1, ['O', 'H'], [2, 1], [0, 1, 0], seed=1),
+            _make_system(3, ['O', 'H'], [1, 2], [0, 1, 1], seed=2),
+        ]
+        # a multi-system and a system
+        ms = dpdata.MultiSystems(*self.systems[:2])
+        ms.to_deepmd_npy('confs/ms')
+        self.systems[2].to_deepmd_npy('confs/sys')
+        self.confs = [Path('confs/ms'), Path('confs/sys')]
+        self.inputs = VaspInputs('incar template', {'O' : 'pot O\n', 'H' : 'pot H\n'})
+
+    def tearDown(self):
+        for ii in ['confs', vasp_blob_store_name] + [vasp_task_pattern % ii for ii in range(6)]:
+            if Path(ii).exists():
+                shutil.rmtree(ii)
+
+    def test_make_poscars(self):
+        for ss in self.systems:
+            poscars = make_poscars(ss)
+            self.assertEqual(len(poscars), ss.get_nframes())
+            for ii, pp in enumerate(poscars):
+                self.assertEqual(pp, from_system_data(ss, ii))
+
+    def test(self):
+        op = PrepVasp()
+        out = op.execute(OPIO({
+            'inputs' : self.inputs,
+            'confs' : self.confs,
+        }))
+        task_names = out['task_names']
+        task_paths = out['task_paths']
+        self.assertEqual(task_names, [vasp_task_pattern % ii for ii in range(6)])
+        self.assertEqual(task_paths, [Path(ii) for ii in task_names])
+        # all the frames are read
+        ms = dpdata.MultiSystems()
+        for ii in task_paths:
+            ss = dpdata.System(str(ii/vasp_conf_name), fmt='vasp/poscar')
+            ms.append(ss)
+            self.assertEqual((ii/vasp_input_name).read_text(), 'incar template')
+            self.assertEqual(
+                (ii/vasp_pot_name).read_text(), 
+                self.inputs.make_potcar((ii/vasp_conf_name).read_text()))
+        self.assertEqual(ms.get_nframes(), 6)
+        self.assertEqual(sorted(ms.systems.keys()), ['H1O2', 'H2O1'])
+        # the INCAR and the POTCAR of each element order are shared
+        incars = set([os.stat(ii/vasp_input_name).st_ino for ii in task_paths])
+        potcars = set([os.stat(ii/vasp_pot_name).st_ino for ii in task_paths])
+        orders = set([(ii/vasp_conf_name).read_text().split('\n')[5] for ii in task_paths])
+        self.assertEqual(len(incars), 1)
+        self.assertEqual(len(orders), 2)
+        self.assertEqual(len(potcars), 2)
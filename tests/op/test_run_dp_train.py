@@ -2,13 +2,14 @@ from op.context import dpgen2
 import numpy as np
 import unittest, json, shutil, os
 from pathlib import Path
-from dpgen2.op.run_dp_train import RunDPTrain
+from dpgen2.op.run_dp_train import RunDPTrain, _expand_all_multi_sys_to_sys
+from dpgen2.utils.data_index import make_data_index
 from fake_data_set import fake_system, fake_multi_sys
 from dpgen2.constants import (
     train_task_pattern,
     train_script_name,
 )
-from mock import patch, call
+from mock import patch, call, ANY
 from dflow.python import (
     OP,
     OPIO,
@@ -18,6 +19,17 @@ from dflow.python import (
     FatalError,
 )
 
+def _mocked_run_command(rets):
+    # mock run_command that writes the outputs to the log
+    rets = iter(rets)
+    def run(cmd, log=None, **kwargs):
+        ret, out, err = next(rets)
+        if log is not None:
+            log.write(out)
+            log.write(err)
+        return ret, out, err
+    return run
+
 class TestRunDPTrain(unittest.TestCase):
     def setUp(self):
         self.atom_name = 'foo'
@@ -276,7 +288,7 @@ class TestRunDPTrain(unittest.TestCase):
 
     @patch('dpgen2.op.run_dp_train.run_command')
     def test_exec_v1(self, mocked_run):
-        mocked_run.side_effect = [ (0, 'foo\n', ''), (0, 'bar\n', '') ]
+        mocked_run.side_effect = _mocked_run_command([ (0, 'foo\n', ''), (0, 'bar\n', '') ])
 
         config = self.config.copy()
         config['init_model_policy'] = 'no'
@@ -305,8 +317,8 @@ class TestRunDPTrain(unittest.TestCase):
         self.assertEqual(out['log'], work_dir/'train.log')
         
         calls = [
-            call(['dp', 'train', train_script_name]),
-            call(['dp', 'freeze', '-o', 'frozen_model.pb']),
+            call(['dp', 'train', train_script_name], log=ANY, tail_lines=ANY),
+            call(['dp', 'freeze', '-o', 'frozen_model.pb'], log=ANY, tail_lines=ANY),
         ]
         mocked_run.assert_has_calls(calls)
         
@@ -320,7 +332,7 @@ class TestRunDPTrain(unittest.TestCase):
 
     @patch('dpgen2.op.run_dp_train.run_command')
     def test_exec_v2(self, mocked_run):
-        mocked_run.side_effect = [ (0, 'foo\n', ''), (0, 'bar\n', '') ]
+        mocked_run.side_effect = _mocked_run_command([ (0, 'foo\n', ''), (0, 'bar\n', '') ])
 
         config = self.config.copy()
         config['init_model_policy'] = 'no'
@@ -349,8 +361,8 @@ class TestRunDPTrain(unittest.TestCase):
         self.assertEqual(out['log'], work_dir/'train.log')
         
         calls = [
-            call(['dp', 'train', train_script_name]),
-            call(['dp', 'freeze', '-o', 'frozen_model.pb']),
+            call(['dp', 'train', train_script_name], log=ANY, tail_lines=ANY),
+            call(['dp', 'freeze', '-o', 'frozen_model.pb'], log=ANY, tail_lines=ANY),
         ]
         mocked_run.assert_has_calls(calls)
         
@@ -364,7 +376,7 @@ class TestRunDPTrain(unittest.TestCase):
 
     @patch('dpgen2.op.run_dp_train.run_command')
     def test_exec_v2_init_model(self, mocked_run):
-        mocked_run.side_effect = [ (0, 'foo\n', ''), (0, 'bar\n', '') ]
+        mocked_run.side_effect = _mocked_run_command([ (0, 'foo\n', ''), (0, 'bar\n', '') ])
 
         config = self.config.copy()
         config['init_model_policy'] = 'yes'
@@ -393,8 +405,8 @@ class TestRunDPTrain(unittest.TestCase):
         self.assertEqual(out['log'], work_dir/'train.log')
         
         calls = [
-            call(['dp', 'train', '--init-frz-model', str(self.init_model), train_script_name]),
-            call(['dp', 'freeze', '-o', 'frozen_model.pb']),
+            call(['dp', 'train', '--init-frz-model', str(self.init_model), train_script_name], log=ANY, tail_lines=ANY),
+            call(['dp', 'freeze', '-o', 'frozen_model.pb'], log=ANY, tail_lines=ANY),
         ]
         mocked_run.assert_has_calls(calls)
         
@@ -408,7 +420,7 @@ class TestRunDPTrain(unittest.TestCase):
 
     @patch('dpgen2.op.run_dp_train.run_command')
     def test_exec_v2_train_error(self, mocked_run):
-        mocked_run.side_effect = [ (1, '', 'foo\n'), (0, 'bar\n', '') ]
+        mocked_run.side_effect = _mocked_run_command([ (1, '', 'foo\n'), (0, 'bar\n', '') ])
 
         config = self.config.copy()
         config['init_model_policy'] = 'no'
@@ -434,7 +446,7 @@ class TestRunDPTrain(unittest.TestCase):
             )
         
         calls = [
-            call(['dp', 'train', train_script_name]),
+            call(['dp', 'train', train_script_name], log=ANY, tail_lines=ANY),
         ]
         mocked_run.assert_has_calls(calls)
         
@@ -446,7 +458,7 @@ class TestRunDPTrain(unittest.TestCase):
 
     @patch('dpgen2.op.run_dp_train.run_command')
     def test_exec_v2_freeze_error(self, mocked_run):
-        mocked_run.side_effect = [ (0, 'foo\n', ''), (1, '', 'bar\n') ]
+        mocked_run.side_effect = _mocked_run_command([ (0, 'foo\n', ''), (1, '', 'bar\n') ])
 
         config = self.config.copy()
         config['init_model_policy'] = 'no'
@@ -472,8 +484,8 @@ class TestRunDPTrain(unittest.TestCase):
             )
         
         calls = [
-            call(['dp', 'train', train_script_name]),
-            call(['dp', 'freeze', '-o', 'frozen_model.pb']),
+            call(['dp', 'train', train_script_name], log=ANY, tail_lines=ANY),
+            call(['dp', 'freeze', '-o', 'frozen_model.pb'], log=ANY, tail_lines=ANY),
         ]
         mocked_run.assert_has_calls(calls)
         
@@ -481,3 +493,31 @@ class TestRunDPTrain(unittest.TestCase):
         with open(work_dir/train_script_name) as fp:
             jdata = json.load(fp)
             self.assertDictEqual(jdata, self.expected_odict_v2)
+
+
+class TestExpandMultiSys(unittest.TestCase):
+    def setUp(self):
+        ms_0 = fake_multi_sys( [2, 5, 3], [4, 3, 4], 'foo')
+        ms_1 = fake_multi_sys( [3, 4, 2], [5, 3, 2], 'foo')
+        ms_0.to_deepmd_npy('data-0')
+        ms_1.to_deepmd_npy('data-1')
+        self.expected = ['data-0/foo3', 'data-0/foo4', 'data-1/foo2', 'data-1/foo3', 'data-1/foo5']
+
+    def tearDown(self):
+        for ii in ['data-0', 'data-1']:
+            if Path(ii).exists():
+                shutil.rmtree(ii)
+
+    def test_glob(self):
+        self.assertEqual(
+            _expand_all_multi_sys_to_sys(['data-0', 'data-1']), self.expected)
+
+    def test_index(self):
+        make_data_index('data-0')
+        make_data_index('data-1')
+        self.assertEqual(
+            _expand_all_multi_sys_to_sys(['data-0', 'data-1']), self.expected)
+        # the systems not in the index are not listed
+        fake_system(2, 7, 'foo').to_deepmd_npy('data-1/foo7')
+        self.assertEqual(
+            _expand_all_multi_sys_to_sys(['data-0', 'data-1']), self.expected)
@@ -0,0 +1,97 @@
+from op.context import dpgen2
+import numpy as np
+import unittest, json, shutil, os
+from pathlib import Path
+from dpgen2.op.run_lmp import RunLmp
+from dpgen2.constants import (
+    lmp_conf_name,
+    lmp_input_name,
+    lmp_log_name,
+    lmp_traj_name,
+    lmp_model_devi_name,
+    lmp_model_devi_npy_name,
+)
+from dpgen2.exploration.selector import load_model_devi
+from mock import patch, call
+from dflow.python import (
+    OP,
+    OPIO,
+    OPIOSign,
+    Artifact,
+    TransientError,
+    FatalError,
+)
+
+class TestRunLmp(unittest.TestCase):
+    def setUp(self):
+        self.task_path = Path('task/path')
+        self.task_path.mkdir(parents=True, exist_ok=True)
+        (self.task_path/lmp_conf_name).write_text('foo')
+        (self.task_path/lmp_input_name).write_text('bar')
+        self.task_name = 'task.000000'
+        self.model_path = Path('models/path')
+        self.model_path.mkdir(parents=True, exist_ok=True)
+        self.models = [self.model_path/Path(f'model.{ii:03d}.pb') for ii in range(4)]
+        for idx,ii in enumerate(self.models):
+            ii.write_text(f'model{idx}')
+
+    def tearDown(self):
+        for ii in ['task', 'models', self.task_name]:
+            if Path(ii).exists():
+                shutil.rmtree(ii)
+
+    def _mocked_run(self, cmd, **kwargs):
+        Path(lmp_model_devi_name).write_text(
+            '#  step max_devi_v min_devi_v avg_devi_v max_devi_f min_devi_f avg_devi_f\n'
+            '0 0.1 0.0 0.0 0.2 0.0 0.0\n'
+            '10 0.3 0.0 0.0 0.4 0.0 0.0\n')
+        return 0, 'foo\n', ''
+
+    def test_normalize_config(self):
+        config = RunLmp.normalize_config({})
+        self.assertEqual(config['command'], 'lmp')
+
+    @patch('dpgen2.op.run_lmp.run_command')
+    def test_success(self, mocked_run):
+        mocked_run.side_effect = self._mocked_run
+        op = RunLmp()
+        out = op.execute(
+            OPIO({
+                'config' : {'command' : 'mylmp'},
+                'task_name' : self.task_name,
+                'task_path' : self.task_path,
+                'models' : self.models,
+            }))
+        work_dir = Path(self.task_name)
+        # check output
+        self.assertEqual(out['log'], work_dir/lmp_log_name)
+        self.assertEqual(out['traj'], work_dir/lmp_traj_name)
+        self.assertEqual(out['model_devi'], work_dir/lmp_model_devi_npy_name)
+        # check call
+        calls = [
+            call(' '.join(['mylmp', '-i', lmp_input_name, '-log', lmp_log_name]), shell=True),
+        ]
+        mocked_run.assert_has_calls(calls)
+        # check input files are correctly linked
+        self.assertEqual((work_dir/lmp_conf_name).read_text(), 'foo')
+        self.assertEqual((work_dir/lmp_input_name).read_text(), 'bar')
+        for ii in range(4):
+            self.assertEqual((work_dir/f'model.{ii:03d}.pb').read_text(), f'model{ii}')
+        # the model deviation is converted to the binary format
+        self.assertTrue((work_dir/lmp_model_devi_name).is_file())
+        mdf, mdv = load_model_devi(out['model_devi'])
+        np.testing.assert_almost_equal(mdf, [0.2, 0.4])
+        np.testing.assert_almost_equal(mdv, [0.1, 0.3])
+
+    @patch('dpgen2.op.run_lmp.run_command')
+    def test_error(self, mocked_run):
+        mocked_run.side_effect = [ (1, 'foo\n', '') ]
+        op = RunLmp()
+        with self.assertRaises(TransientError) as ee:
+            out = op.execute(
+                OPIO({
+                    'config' : {'command' : 'mylmp'},
+                    'task_name' : self.task_name,
+                    'task_path' : self.task_path,
+                    'models' : self.models,
+                }))
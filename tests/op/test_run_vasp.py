@@ -0,0 +1,213 @@
+from op.context import dpgen2
+import numpy as np
+import unittest, json, shutil, os
+from pathlib import Path
+import dpdata
+from mock import patch
+from dflow.python import (
+    OP,
+    OPIO,
+    TransientError,
+)
+from dpgen2.op.run_vasp import RunVasp
+from dpgen2.fp.outcar import read_outcar_last_frame
+from dpgen2.constants import (
+    vasp_conf_name,
+    vasp_input_name,
+    vasp_log_name,
+)
+
+
+def _make_outcar(cells, coords, forces, energies, stresses, nelm=60, nscf=None):
+    # a minimal OUTCAR of atoms O H H
+    nscf = [3] * len(cells) if nscf is None else nscf
+    lines = [
+        ' vasp.5.4.4.18Apr17-6-g9f103f2a35',
+        '   TITEL  = PAW_PBE O 08Apr2002',
+        '   TITEL  = PAW_PBE H 15Jun2001',
+        '   NELM   =     %d;   NELMIN=  2; NELMDL= -5     # of ELM steps' % nelm,
+        '   ions per type =               1   2',
+    ]
+    for ii in range(len(cells)):
+        for jj in range(nscf[ii]):
+            lines.append('----------------------------------------- Iteration %4d(%4d)  ---------------------------------------' % (ii+1, jj+1))
+            lines.append('  free energy    TOTEN  =       %.8f eV' % (energies[ii] + jj))
+        lines += [
+            '  FORCE on cell =-STRESS in cart. coord.  units (eV):',
+            '  Direction    XX          YY          ZZ          XY          YZ          ZX',
+            '  --------------------------------------------------------------------------------------',
+        ]
+        for name in ['Alpha Z', 'Ewald', 'Hartree', 'E(xc)', 'Local', 'n-local', 'augment', 'Kinetic', 'Fock']:
+            lines.append('  %-8s' % name + '     1.00000' * 6)
+        lines += [
+            '  -----------------------------------------------------------------------------------',
+            '  Total         ' + ' '.join(['%.5f' % vv for vv in stresses[ii]]),
+            '  in kB         ' + ' '.join(['%.5f' % vv for vv in stresses[ii]]),
+            '  external pressure =        1.00 kB  Pullay stress =        0.00 kB',
+            '',
+            ' VOLUME and BASIS-vectors are now :',
+            ' -----------------------------------------------------------------------------',
+            '  energy-cutoff  :      650.00',
+            '  volume of cell :      %.2f' % np.linalg.det(cells[ii]),
+            '      direct lattice vectors                 reciprocal lattice vectors',
+        ]
+        for cc in cells[ii]:
+            lines.append('    %12.9f %12.9f %12.9f     0.000000000  0.000000000  0.000000000' % tuple(cc))
+        lines += [
+            '',
+            ' POSITION                                       TOTAL-FORCE (eV/Angst)',
+            ' -----------------------------------------------------------------------------------',
+        ]
+        for xx, ff in zip(coords[ii], forces[ii]):
+            lines.append('   %10.5f %10.5f %10.5f    %12.6f %12.6f %12.6f' % (tuple(xx) + tuple(ff)))
+        lines += [
+            ' -----------------------------------------------------------------------------------',
+            '    total drift:                               -0.000000     -0.000000      0.000000',
+            '',
+            '  FREE ENERGIE OF THE ION-ELECTRON SYSTEM (eV)',
+            '  ---------------------------------------------------',
+            '  free  energy   TOTEN  =       %.8f eV' % energies[ii],
+            '',
+            '  energy  without entropy=      %.8f  energy(sigma->0) =      %.8f' % (energies[ii], energies[ii]),
+            '',
+        ]
+    return '\n'.join(lines) + '\n'
+
+
+def _make_poscar(cell):
+    return 'O1 H2 \n1.0\n' + \
+        ''.join(['%.16e %.16e %.16e \n' % tuple(cc) for cc in cell]) + \
+        'O H \n1 2 \nCartesian\n' + \
+        '   0.0 0.0 0.0\n   1.0 0.0 0.0\n   0.0 1.0 0.0\n'
+
+
+class TestReadOutcar(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        # dpdata rotates the cells to lower triangular
+        self.cells = [np.diag([5., 6., 7.]), np.diag([5., 6., 7.]) + np.tril(rng.random([3, 3]))]
+        self.coords = rng.random([2, 3, 3]) * 5
+        self.forces = rng.random([2, 3, 3]) - 0.5
+        self.energies = [-10.5, -11.25]
+        self.stresses = rng.random([2, 6]) * 10 - 5
+        Path('OUTCAR').write_text(_make_outcar(
+            self.cells, self.coords, self.forces, self.energies, self.stresses))
+
+    def tearDown(self):
+        os.remove('OUTCAR')
+
+    def test_same_as_dpdata(self):
+        frame = read_outcar_last_frame('OUTCAR')
+        ref = dpdata.LabeledSystem('OUTCAR', fmt='vasp/outcar')
+        self.assertEqual(ref.get_nframes(), 2)
+        self.assertEqual(frame['atom_numbs'], [1, 2])
+        self.assertTrue(frame['converged'])
+        np.testing.assert_allclose(frame['cells'], ref['cells'][-1])
+        np.testing.assert_allclose(frame['coords'], ref['coords'][-1])
+        np.testing.assert_allclose(frame['forces'], ref['forces'][-1])
+        np.testing.assert_allclose(frame['energies'], ref['energies'][-1])
+        np.testing.assert_allclose(frame['virials'], ref['virials'][-1])
+
+    def test_not_converged(self):
+        Path('OUTCAR').write_text(_make_outcar(
+            self.cells, self.coords, self.forces, self.energies, self.stresses,
+            nelm=5, nscf=[3, 5]))
+        frame = read_outcar_last_frame('OUTCAR')
+        self.assertFalse(frame['converged'])
+        np.testing.assert_allclose(frame['energies'], self.energies[-1])
+
+    def test_no_step(self):
+        Path('OUTCAR').write_text(' vasp.5.4.4.18Apr17-6-g9f103f2a35\n')
+        self.assertEqual(read_outcar_last_frame('OUTCAR'), None)
+
+
+class TestRunVasp(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.cell = np.diag([5., 6., 7.]) + np.triu(rng.random([3, 3]))
+        self.outcar = _make_outcar(
+            [self.cell], rng.random([1, 3, 3]) * 5, rng.random([1, 3, 3]) - 0.5,
+            [-10.5], rng.random([1, 6]))
+        self.task_path = Path('task/path')
+        self.task_path.mkdir(parents=True, exist_ok=True)
+        (self.task_path/vasp_conf_name).write_text(_make_poscar(self.cell))
+        (self.task_path/vasp_input_name).write_text('incar')
+        self.task_name = 'task.000002'
+
+    def tearDown(self):
+        for ii in ['task'] + ['task.%06d' % ii for ii in range(4)]:
+            if Path(ii).exists():
+                shutil.rmtree(ii)
+
+    def _mocked_run(self, cmd, log=None, **kwargs):
+        Path('OUTCAR').write_text(self.outcar)
+        return 0, 'foo\n', ''
+
+    def _make_finished_task(self, name, cell):
+        Path(name).mkdir()
+        (Path(name)/vasp_conf_name).write_text(_make_poscar(cell))
+        for ii in ['WAVECAR', 'CHGCAR']:
+            (Path(name)/ii).write_text(f'{ii} of {name}')
+        dpdata.LabeledSystem('OUTCAR', fmt='vasp/outcar').to('deepmd/npy', f'{name}/data_{name}')
+
+    def _execute(self, config):
+        op = RunVasp()
+        return op.execute(OPIO({
+            'config' : config,
+            'task_name' : self.task_name,
+            'task_path' : self.task_path,
+        }))
+
+    def test_normalize_config(self):
+        config = RunVasp.normalize_config({})
+        self.assertEqual(config['command'], 'vasp_std')
+        self.assertEqual(config['reuse_wavefunction'], True)
+
+    @patch('dpgen2.op.run_vasp.run_command')
+    def test_success(self, mocked_run):
+        mocked_run.side_effect = self._mocked_run
+        out = self._execute({'command' : 'myvasp'})
+        work_dir = Path(self.task_name)
+        self.assertEqual(out['log'], work_dir/vasp_log_name)
+        self.assertEqual(out['labeled_data'], work_dir/('data_'+self.task_name))
+        self.assertEqual(mocked_run.call_args[0][0], 'myvasp')
+        self.assertEqual((work_dir/vasp_input_name).read_text(), 'incar')
+        ss = dpdata.LabeledSystem(str(out['labeled_data']), fmt='deepmd/npy')
+        Path('OUTCAR').write_text(self.outcar)
+        ref = dpdata.LabeledSystem('OUTCAR', fmt='vasp/outcar')
+        os.remove('OUTCAR')
+        self.assertEqual(ss['atom_names'], ['O', 'H'])
+        self.assertEqual(ss['atom_numbs'], [1, 2])
+        for kk in ['cells', 'coords', 'energies', 'forces', 'virials']:
+            np.testing.assert_allclose(ss[kk], ref[kk])
+
+    @patch('dpgen2.op.run_vasp.run_command')
+    def test_error(self, mocked_run):
+        mocked_run.side_effect = [(1, 'foo\n', 'bar\n')]
+        with self.assertRaises(TransientError):
+            self._execute({})
+
+    @patch('dpgen2.op.run_vasp.run_command')
+    def test_reuse_wavefunction(self, mocked_run):
+        mocked_run.side_effect = self._mocked_run
+        Path('OUTCAR').write_text(self.outcar)
+        # task 0 is farther, task 3 has a different cell
+        self._make_finished_task('task.000000', self.cell)
+        self._make_finished_task('task.000003', self.cell * 1.1)
+        os.remove('OUTCAR')
+        self._execute({})
+        work_dir = Path(self.task_name)
+        self.assertEqual((work_dir/'WAVECAR').read_text(), 'WAVECAR of task.000000')
+        self.assertEqual((work_dir/'CHGCAR').read_text(), 'CHGCAR of task.000000')
+        self.assertIn('task.000000', (work_dir/vasp_log_name).read_text())
+        # the nearest task is reused
+        shutil.rmtree(work_dir)
+        Path('OUTCAR').write_text(self.outcar)
+        self._make_finished_task('task.000001', self.cell)
+        os.remove('OUTCAR')
+        self._execute({})
+        self.assertEqual((work_dir/'WAVECAR').read_text(), 'WAVECAR of task.000001')
+        # not reused if disabled
+        shutil.rmtree(work_dir)
+        self._execute({'reuse_wavefunction' : False})
+        self.assertFalse((work_dir/'WAVECAR').exists())
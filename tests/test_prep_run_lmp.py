@@ -36,7 +36,7 @@ except ModuleNotFoundError:
 from context import upload_python_package
 from dpgen2.op.prep_lmp import PrepLmp
 from dpgen2.superop.prep_run_lmp import PrepRunLmp
-from dpgen2.exploration.task import ExplorationTask, ExplorationTaskGroup
+from dpgen2.exploration.task import ExplorationTask, ExplorationTaskGroup, dump_task_group, load_task_group_index
 from mocked_ops import (
     mocked_numb_models,
     MockedRunLmp,
@@ -54,14 +54,18 @@ from dpgen2.constants import (
     lmp_model_devi_name,
 )
 
-def make_task_group_list(ngrp, ntask_per_grp):
+def make_task_group_list(ngrp, ntask_per_grp, template = False):
     tgrp = ExplorationTaskGroup()
     for ii in range(ngrp):
         for jj in range(ntask_per_grp):
             tt = ExplorationTask()
-            tt\
-                .add_file(lmp_conf_name, f'group{ii} task{jj} conf')\
-                .add_file(lmp_input_name, f'group{ii} task{jj} input')
+            tt.add_file(lmp_conf_name, f'group{ii} task{jj} conf')
+            if template:
+                tt.add_file_template(
+                    lmp_input_name, 'group%(grp)d task%(task)d input', 
+                    {'grp' : ii, 'task' : jj})
+            else:
+                tt.add_file(lmp_input_name, f'group{ii} task{jj} input')
             tgrp.add_task(tt)
     return tgrp
 
@@ -101,6 +105,8 @@ class TestPrepLmp(unittest.TestCase):
         task_grp = Path('lmp_task_grp.dat')
         if task_grp.is_file():
             os.remove(task_grp)
+        if Path('lmp_blobs').is_dir():
+            shutil.rmtree('lmp_blobs')
 
     def test(self):
         op = PrepLmp()
@@ -115,6 +121,45 @@ class TestPrepLmp(unittest.TestCase):
 
 
 
+class TestPrepLmpTaskGroupDir(unittest.TestCase):
+    def setUp(self):
+        self.ngrp = 2
+        self.ntask_per_grp = 3
+        self.task_group_list = dump_task_group(
+            make_task_group_list(self.ngrp, self.ntask_per_grp, template = True),
+            Path('lmp_task_grp'))
+        self.index = load_task_group_index(self.task_group_list)
+        
+    def tearDown(self):
+        for ii in range(self.ngrp * self.ntask_per_grp):
+            work_path = Path(lmp_task_pattern % ii)
+            if work_path.is_dir():
+                shutil.rmtree(work_path)
+        if self.task_group_list.is_dir():
+            shutil.rmtree(self.task_group_list)
+        if Path('lmp_blobs').is_dir():
+            shutil.rmtree('lmp_blobs')
+
+    def test(self):
+        op = PrepLmp()
+        out = op.execute( OPIO({
+            'lmp_task_grp' : self.task_group_list,
+        }) )
+        tdirs = check_lmp_tasks(self, self.ngrp, self.ntask_per_grp)
+        tdirs = [str(ii) for ii in tdirs]
+
+        self.assertEqual(tdirs, out['task_names'])
+        self.assertEqual(tdirs, [str(ii) for ii in out['task_paths']])
+        # the confs and one template are stored in the task group
+        self.assertEqual(len(list((self.task_group_list/'blobs').iterdir())), 
+                         self.ngrp * self.ntask_per_grp + 1)
+        self.assertEqual(len(list(Path('lmp_blobs').iterdir())), 
+                         2 * self.ngrp * self.ntask_per_grp)
+        self.assertTrue(os.path.samefile(
+            Path(tdirs[0])/lmp_conf_name, 
+            Path('lmp_blobs')/self.index[0][lmp_conf_name]))
+
+
 class TestMockedRunLmp(unittest.TestCase):
     def setUp(self):
         self.ntask = 2
@@ -231,11 +276,19 @@ class TestPrepRunLmp(unittest.TestCase):
 
 
     def test(self):
+        self._run_prep_run_lmp()
+
+    def test_group(self):
+        # 6 tasks are run in 2 groups
+        self._run_prep_run_lmp(group_size = 4, pool_size = 2)
+
+    def _run_prep_run_lmp(self, **kwargs):
         steps = PrepRunLmp(
             "prep-run-lmp",
             PrepLmp,
             MockedRunLmp,
             upload_python_package = upload_python_package,
+            **kwargs,
         )        
         prep_run_step = Step(
             'prep-run-step', 
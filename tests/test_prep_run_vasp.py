@@ -182,11 +182,18 @@ class TestPrepRunVasp(unittest.TestCase):
         os.chdir(cwd)
 
     def test(self):
+        self._run_prep_run_vasp()
+
+    def test_group(self):
+        self._run_prep_run_vasp(group_size = 2, pool_size = 2)
+
+    def _run_prep_run_vasp(self, **kwargs):
         steps = PrepRunFp(
             "prep-run-vasp",
             MockedPrepVasp,
             MockedRunVasp,
             upload_python_package = upload_python_package,
+            **kwargs,
         )
         prep_run_step = Step(
             'prep-run-step', 
@@ -0,0 +1,53 @@
+from utils.context import dpgen2
+import os, shutil
+import unittest
+from pathlib import Path
+from mock import patch
+from dpgen2.utils.blob_store import BlobStore, link_file
+
+class TestBlobStore(unittest.TestCase):
+    def setUp(self):
+        self.store_path = Path('blob_store')
+        self.work_path = Path('blob_work')
+        self.work_path.mkdir(exist_ok=True)
+
+    def tearDown(self):
+        for ii in [self.store_path, self.work_path]:
+            if ii.is_dir():
+                shutil.rmtree(ii)
+
+    def test_add_text(self):
+        store = BlobStore(self.store_path)
+        b0 = store.add_text('foo')
+        b1 = store.add_text('bar')
+        b2 = store.add_text('foo')
+        self.assertEqual(b0, b2)
+        self.assertNotEqual(b0, b1)
+        self.assertEqual(b0.read_text(), 'foo')
+        self.assertEqual(len(list(self.store_path.iterdir())), 2)
+
+    def test_add_file(self):
+        store = BlobStore(self.store_path)
+        src = self.work_path / 'src'
+        src.write_text('foo')
+        blob = store.add_file(src)
+        self.assertEqual(blob, store.add_text('foo'))
+        self.assertTrue(os.path.samefile(blob, src))
+
+    def test_link_file(self):
+        store = BlobStore(self.store_path)
+        blob = store.add_text('foo')
+        dst = self.work_path / 'dst'
+        dst.write_text('old')
+        link_file(blob, dst)
+        self.assertEqual(dst.read_text(), 'foo')
+        self.assertTrue(os.path.samefile(blob, dst))
+
+    def test_link_file_fallback(self):
+        store = BlobStore(self.store_path)
+        blob = store.add_text('foo')
+        dst = self.work_path / 'dst'
+        with patch('dpgen2.utils.blob_store.os.link', side_effect=OSError):
+            link_file(blob, dst)
+        self.assertEqual(dst.read_text(), 'foo')
+        self.assertFalse(os.path.samefile(blob, dst))
@@ -0,0 +1,60 @@
+from utils.context import dpgen2
+import numpy as np
+import unittest, json, shutil, os
+from pathlib import Path
+from fake_data_set import fake_system, fake_multi_sys
+from dpgen2.constants import data_index_name
+from dpgen2.utils.data_index import (
+    npy_nframes,
+    count_frames,
+    make_data_index,
+    load_data_index,
+    get_data_size,
+)
+
+class TestDataIndex(unittest.TestCase):
+    def setUp(self):
+        self.nframes = [2, 5, 3]
+        self.natoms = [4, 3, 5]
+        ms = fake_multi_sys(self.nframes, self.natoms, 'foo')
+        # the system of 5 frames is split into 2 sets
+        ms.to_deepmd_npy('data-0', set_size=3)
+        ss = fake_system(4, 2, 'foo')
+        ss.to_deepmd_npy('sys-0')
+
+    def tearDown(self):
+        for ii in ['data-0', 'sys-0', 'npy']:
+            if Path(ii).exists():
+                shutil.rmtree(ii)
+
+    def test_npy_nframes(self):
+        Path('npy').mkdir()
+        np.save('npy/a.npy', np.zeros([7, 3]))
+        np.save('npy/b.npy', np.zeros([0, 3]))
+        self.assertEqual(npy_nframes('npy/a.npy'), 7)
+        self.assertEqual(npy_nframes('npy/b.npy'), 0)
+
+    def test_count_frames(self):
+        self.assertEqual(count_frames('sys-0'), 4)
+        self.assertEqual(count_frames('data-0/foo3'), 5)
+        self.assertEqual(len(list(Path('data-0/foo3').glob('set.*'))), 2)
+
+    def test_make_index(self):
+        self.assertEqual(load_data_index('data-0'), None)
+        self.assertEqual(get_data_size('data-0'), 10)
+        systems = make_data_index('data-0')
+        self.assertTrue((Path('data-0')/data_index_name).is_file())
+        expected = [
+            {'path' : 'foo3', 'nframes' : 5},
+            {'path' : 'foo4', 'nframes' : 2},
+            {'path' : 'foo5', 'nframes' : 3},
+        ]
+        self.assertEqual(systems, expected)
+        self.assertEqual(load_data_index('data-0'), expected)
+        self.assertEqual(get_data_size('data-0'), 10)
+
+    def test_use_index(self):
+        make_data_index('data-0')
+        # the data are not read if indexed
+        shutil.rmtree('data-0/foo3')
+        self.assertEqual(get_data_size('data-0'), 10)
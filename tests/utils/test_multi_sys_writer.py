@@ -0,0 +1,151 @@
+from utils.context import dpgen2
+import dpdata
+import numpy as np
+import unittest, shutil
+from pathlib import Path
+from dpgen2.utils.multi_sys_writer import MultiSystemsWriter
+
+
+def _make_system(nframes, atom_names, atom_types, labeled=False, seed=0):
+    rng = np.random.default_rng(seed)
+    natoms = len(atom_types)
+    ss = dpdata.LabeledSystem() if labeled else dpdata.System()
+    ss.data['atom_names'] = list(atom_names)
+    ss.data['atom_numbs'] = [atom_types.count(ii) for ii in range(len(atom_names))]
+    ss.data['atom_types'] = np.array(atom_types, dtype=int)
+    ss.data['cells'] = rng.random([nframes, 3, 3])
+    ss.data['coords'] = rng.random([nframes, natoms, 3])
+    ss.data['orig'] = np.zeros(3)
+    if labeled:
+        ss.data['energies'] = rng.random([nframes])
+        ss.data['forces'] = rng.random([nframes, natoms, 3])
+        ss.data['virials'] = rng.random([nframes, 3, 3])
+    return ss
+
+
+class TestMultiSystemsWriter(unittest.TestCase):
+    def setUp(self):
+        self.out = Path('ms_writer')
+        self.ref = Path('ms_ref')
+
+    def tearDown(self):
+        for ii in [self.out, self.ref]:
+            if ii.is_dir():
+                shutil.rmtree(ii)
+
+    def _check_same(self, systems, labeled, set_size=5000):
+        with MultiSystemsWriter(self.out, set_size=set_size) as writer:
+            for ss in systems:
+                writer.append(ss)
+        ms_ref = dpdata.MultiSystems()
+        for ss in systems:
+            ms_ref.append(ss)
+        ms_ref.to_deepmd_npy(self.ref)
+        ms = dpdata.MultiSystems()
+        ms.from_deepmd_npy(self.out, labeled=labeled)
+        ref = dpdata.MultiSystems()
+        ref.from_deepmd_npy(self.ref, labeled=labeled)
+        self.assertEqual(
+            sorted([ii.name for ii in self.out.iterdir()]),
+            sorted([ii.name for ii in self.ref.iterdir()]))
+        self.assertEqual(ms.get_nframes(), ref.get_nframes())
+        for kk in ref.systems.keys():
+            for dd in ['atom_names', 'atom_numbs']:
+                self.assertEqual(ms[kk][dd], ref[kk][dd])
+            np.testing.assert_equal(ms[kk]['atom_types'], ref[kk]['atom_types'])
+            for dd in ['cells', 'coords'] + (['energies', 'forces', 'virials'] if labeled else []):
+                np.testing.assert_almost_equal(ms[kk][dd], ref[kk][dd])
+        return writer
+
+    def test_same_as_multi_systems(self):
+        systems = [
+            _make_system(3, ['O', 'H'], [0, 1, 1], seed=0),
+            _make_system(0, ['O', 'H'], [0, 1, 1], seed=1),
+            _make_system(2, ['O', 'H'], [0, 1, 1], seed=2),
+            _make_system(4, ['O', 'H'], [0, 0, 1], seed=3),
+        ]
+        writer = self._check_same(systems, False)
+        self.assertEqual(writer.get_nframes(), 9)
+        self.assertEqual(writer.get_nframes('O1H2'), 5)
+
+    def test_labeled(self):
+        systems = [
+            _make_system(3, ['O', 'H'], [0, 1, 1], labeled=True, seed=0),
+            _make_system(2, ['O', 'H'], [0, 1, 1], labeled=True, seed=1),
+        ]
+        self._check_same(systems, True)
+
+    def test_new_atom_names(self):
+        systems = [
+            _make_system(3, ['O', 'H'], [0, 1, 1], seed=0),
+            _make_system(2, ['C', 'O'], [0, 1], seed=1),
+            _make_system(2, ['H', 'O'], [1, 0, 0], seed=2),
+        ]
+        writer = self._check_same(systems, False)
+        self.assertEqual(writer.atom_names, ['O', 'H', 'C'])
+        self.assertEqual(sorted(writer.formulas), ['O1H0C1', 'O1H2C0'])
+
+    def test_sort_atom_types(self):
+        systems = [
+            _make_system(3, ['O', 'H'], [1, 0, 1], labeled=True, seed=0),
+            _make_system(2, ['O', 'H'], [0, 1, 1], labeled=True, seed=1),
+        ]
+        # the first system is written before the second is appended
+        self._check_same(systems, True, set_size=2)
+
+    def test_set_size(self):
+        systems = [
+            _make_system(3, ['O', 'H'], [0, 1, 1], seed=0),
+            _make_system(4, ['O', 'H'], [0, 1, 1], seed=1),
+        ]
+        self._check_same(systems, False, set_size=3)
+        sets = sorted([ii.name for ii in (self.out / 'O1H2').glob('set.*')])
+        self.assertEqual(sets, ['set.000', 'set.001', 'set.002'])
+        nframes = [np.load(self.out / 'O1H2' / ii / 'box.npy').shape[0] for ii in sets]
+        self.assertEqual(nframes, [3, 3, 1])
+
+    def test_mixed_labeled(self):
+        writer = MultiSystemsWriter(self.out)
+        writer.append(_make_system(1, ['O', 'H'], [0, 1, 1]))
+        with self.assertRaises(RuntimeError):
+            writer.append(_make_system(1, ['O', 'H'], [0, 1, 1], labeled=True))
+
+    def test_mixed_virials(self):
+        # e.g. frames from an OUTCAR without stress
+        no_virials = _make_system(2, ['O', 'H'], [0, 1, 1], labeled=True, seed=1)
+        del no_virials.data['virials']
+        with MultiSystemsWriter(self.out) as writer:
+            writer.append(_make_system(3, ['O', 'H'], [0, 1, 1], labeled=True, seed=0))
+            with self.assertRaises(RuntimeError):
+                writer.append(no_virials)
+            # the frames of another formula may have no virials
+            no_virials.data['atom_types'] = np.array([0, 0, 1])
+            no_virials.data['atom_numbs'] = [2, 1]
+            writer.append(no_virials)
+            with self.assertRaises(RuntimeError):
+                writer.append(_make_system(1, ['O', 'H'], [0, 0, 1], labeled=True, seed=2))
+        self.assertEqual(writer.get_nframes('O1H2'), 3)
+        self.assertEqual(writer.get_nframes('O2H1'), 2)
+        # the npy files of each set have the same frames
+        for formula, nframes in [('O1H2', 3), ('O2H1', 2)]:
+            set_path = self.out / formula / 'set.000'
+            for ii in set_path.glob('*.npy'):
+                self.assertEqual(np.load(ii).shape[0], nframes)
+        self.assertTrue((self.out / 'O1H2' / 'set.000' / 'virial.npy').is_file())
+        self.assertFalse((self.out / 'O2H1' / 'set.000' / 'virial.npy').is_file())
+        ss = dpdata.LabeledSystem(str(self.out / 'O2H1'), fmt='deepmd/npy')
+        self.assertEqual(ss.get_nframes(), 2)
+
+    def test_sources(self):
+        with MultiSystemsWriter(self.out) as writer:
+            writer.append(_make_system(3, ['O', 'H'], [0, 1, 1]), 'a')
+            writer.append(_make_system(2, ['O', 'H'], [0, 0, 1]), 'b')
+            writer.append(_make_system(0, ['O', 'H'], [0, 1, 1]), 'c')
+            writer.append(_make_system(1, ['H', 'O'], [1, 0, 0]), 'd')
+        self.assertEqual(writer.sources('O1H2'), [
+            {'source' : 'a', 'frame_start' : 0, 'nframes' : 3},
+            {'source' : 'd', 'frame_start' : 3, 'nframes' : 1},
+        ])
+        self.assertEqual(writer.sources('O2H1'), [
+            {'source' : 'b', 'frame_start' : 0, 'nframes' : 2},
+        ])
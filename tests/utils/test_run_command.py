@@ -46,3 +46,29 @@ class TestRunCommand(unittest.TestCase):
         self.assertEqual(out, '')
         self.assertEqual(err, "ls: cannot access 'tar': No such file or directory\n")
         os.chdir('..')
+
+    def test_log(self):
+        os.chdir(self.work_path)
+        with open('log', 'w') as fp:
+            ret, out, err = run_command(['ls', 'foo', 'bar'], log=fp)
+            ret, out, err = run_command(['ls', 'tar'], log=fp)
+            ret, out, err = run_command(['ls', 'foo'], log=fp)
+        self.assertEqual(ret, 0)
+        self.assertEqual(out, 'foo\n')
+        self.assertEqual(err, '')
+        log = Path('log').read_text().split('\n')
+        self.assertEqual(log[0:2], ['bar', 'foo'])
+        self.assertEqual(log[2:], ["ls: cannot access 'tar': No such file or directory", 'foo', ''])
+        os.chdir('..')
+
+    def test_tail_lines(self):
+        ret, out, err = run_command('seq 1 100; seq 1 3 1>&2', shell=True, tail_lines=2)
+        self.assertEqual(ret, 0)
+        self.assertEqual(out, '99\n100\n')
+        self.assertEqual(err, '2\n3\n')
+
+    def test_timeout(self):
+        ret, out, err = run_command('echo foo; sleep 10; echo bar', shell=True, timeout=0.5)
+        self.assertNotEqual(ret, 0)
+        self.assertEqual(out, 'foo\n')
+        self.assertEqual(err, 'command timed out after 0.5 seconds\n')